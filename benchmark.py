@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Benchmarks do pipeline principal sobre sessões sintéticas (trace_generator, com seed).
+
+Mede o custo por operação (µs) de:
+- reader.read_game_data: leitura + decodificação de uma amostra (FakeBackend)
+- reader.decode: só a decodificação das regiões (struct pré-compilado)
+- stats.update: StatsCalculator.update
+- stats.get_stats: get_stats após cada update (padrão da interface)
+- stats.get_stats_idle: get_stats sem amostras novas
+- xp_table.update_base_xp: XPTableManager.update_base_xp (write-behind)
+- xp_table.save: gravação completa da tabela
+- gui.update_ui: atualização dos cards (só com display; senão fica como 'skipped')
+
+Roda sem interface (Linux/Windows). Resultado em JSON, comparado com o baseline
+versionado (benchmark_baseline.json, ou --baseline) só quando plataforma, versão
+do Python e parâmetros do trace são os mesmos do baseline; sai com código 1 se
+algum caso ficou mais lento que a tolerância. --update-baseline regrava o baseline.
+
+Uso:
+    python benchmark.py [--seed N] [--samples N] [--clients N] [--repeat N]
+                        [--output resultado.json] [--baseline base.json] [--tolerance 0.25]
+                        [--update-baseline]
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+from typing import Callable, Dict, List, Optional
+from trace_generator import generate_trace
+
+# Baseline versionado junto com o código
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+def _per_op(run: Callable[[], tuple], repeat: int) -> Dict:
+    """Executa run() `repeat` vezes; run retorna (operações, segundos). Usa a melhor rodada"""
+    best = None
+    ops = 0
+    for _ in range(repeat):
+        # Como o timeit: coleta de lixo desligada durante a rodada (menos ruído entre execuções)
+        gc.collect()
+        gc.disable()
+        try:
+            ops, seconds = run()
+        finally:
+            gc.enable()
+        if ops and (best is None or seconds / ops < best):
+            best = seconds / ops
+    return {'us': best * 1e6 if best is not None else None, 'ops': ops}
+
+def bench_reader(trace: List[tuple], repeat: int) -> Dict[str, Dict]:
+    import memory_reader
+    from memory_backends import FakeBackend, FakeProcess
+
+    pid = trace[0][1]
+    process = FakeProcess(pid)
+    backend = FakeBackend([process])
+    session = memory_reader.ProcessSession(pid, memory=backend)
+    states = [snapshot._asdict() for _, sample_pid, snapshot in trace if sample_pid == pid]
+
+    def read():
+        elapsed = 0.0
+        for values in states:
+            process.set_fields(values)
+            start = time.perf_counter()
+            session.read_game_data()
+            elapsed += time.perf_counter() - start
+        return len(states), elapsed
+
+    def decode():
+        session.read_game_data()
+        regions = list(zip(session.plan.regions, session.buffers))
+        count = len(states)
+        start = time.perf_counter()
+        for _ in range(count):
+            for region, buffer in regions:
+                region.decode(buffer)
+        return count, time.perf_counter() - start
+
+    results = {'reader.read_game_data': _per_op(read, repeat), 'reader.decode': _per_op(decode, repeat)}
+    session.close()
+    return results
+
+def _new_calculator(workdir: str):
+    from stats_calculator import StatsCalculator
+    from xp_table_manager import XPTableManager
+    from replay import ReplayClock
+
+    clock = ReplayClock(0.0)
+    # Tabela vazia em diretório temporário (não toca o xp_table.json real)
+    xp_table = XPTableManager(os.path.join(workdir, f'xp_table_{time.perf_counter_ns()}.json'), auto_download=False)
+    return StatsCalculator(clock=clock, xp_table=xp_table), clock
+
+def bench_stats(trace: List[tuple], repeat: int, workdir: str) -> Dict[str, Dict]:
+    pid = trace[0][1]
+    samples = [(t, snapshot) for t, sample_pid, snapshot in trace if sample_pid == pid]
+
+    def update():
+        calculator, clock = _new_calculator(workdir)
+        elapsed = 0.0
+        for t, snapshot in samples:
+            clock.now = t
+            start = time.perf_counter()
+            calculator.update(snapshot)
+            elapsed += time.perf_counter() - start
+        calculator.xp_table.close()
+        return len(samples), elapsed
+
+    def get_stats():
+        calculator, clock = _new_calculator(workdir)
+        elapsed = 0.0
+        for t, snapshot in samples:
+            clock.now = t
+            calculator.update(snapshot)
+            start = time.perf_counter()
+            calculator.get_stats()
+            elapsed += time.perf_counter() - start
+        calculator.xp_table.close()
+        return len(samples), elapsed
+
+    def get_stats_idle():
+        calculator, clock = _new_calculator(workdir)
+        for t, snapshot in samples[:100]:
+            clock.now = t
+            calculator.update(snapshot)
+        calculator.get_stats()
+        count = len(samples)
+        start = time.perf_counter()
+        for _ in range(count):
+            calculator.get_stats()
+        elapsed = time.perf_counter() - start
+        calculator.xp_table.close()
+        return count, elapsed
+
+    return {
+        'stats.update': _per_op(update, repeat),
+        'stats.get_stats': _per_op(get_stats, repeat),
+        'stats.get_stats_idle': _per_op(get_stats_idle, repeat)
+    }
+
+def bench_xp_table(trace: List[tuple], repeat: int, workdir: str) -> Dict[str, Dict]:
+    from xp_table_manager import XPTableManager
+
+    updates = [(snapshot.nvBase, snapshot.xpBase) for _, _, snapshot in trace]
+
+    def update_base_xp():
+        table = XPTableManager(os.path.join(workdir, f'xp_update_{time.perf_counter_ns()}.json'), auto_download=False)
+        start = time.perf_counter()
+        for i, (level, xp) in enumerate(updates):
+            # Um level up confirmado a cada 1000 atualizações (grava na hora)
+            table.update_base_xp(level, xp, confirmed=(i % 1000 == 999))
+        elapsed = time.perf_counter() - start
+        table.close()
+        return len(updates), elapsed
+
+    def save():
+        table = XPTableManager(os.path.join(workdir, f'xp_save_{time.perf_counter_ns()}.json'), auto_download=False)
+        for level in range(1, 301):
+            table.update_base_xp(level, level * 1000, confirmed=True)
+        table.flush()
+        count = 20
+        start = time.perf_counter()
+        for _ in range(count):
+            table.save()
+        elapsed = time.perf_counter() - start
+        table.close()
+        return count, elapsed
+
+    return {
+        'xp_table.update_base_xp': _per_op(update_base_xp, repeat),
+        'xp_table.save': _per_op(save, repeat)
+    }
+
+def bench_gui(trace: List[tuple], repeat: int, workdir: str) -> Dict[str, Dict]:
+    """Atualização dos cards da interface; precisa de display (ex.: xvfb-run no Linux)"""
+    try:
+        import customtkinter as ctk
+        from gui import ROLensGUI
+        root = ctk.CTk()
+    except Exception as e:
+        return {'gui.update_ui': {'us': None, 'ops': 0, 'skipped': str(e)}}
+
+    # Instância sem o construtor (que abre a tela inicial e baixa a tabela de XP)
+    app = ROLensGUI.__new__(ROLensGUI)
+    app.root = root
+    app.card_slots = {}
+    app.font_cache = {}
+    app.stat_cards = {
+        name: ctk.CTkFrame(root)
+        for name in ('personagem', 'sessao', 'base_xp', 'job_xp', 'combate', 'hp_sp')
+    }
+
+    pid = trace[0][1]
+    calculator, clock = _new_calculator(workdir)
+    frames = []
+    for t, sample_pid, snapshot in trace:
+        if sample_pid == pid:
+            clock.now = t
+            calculator.update(snapshot)
+            frames.append(dict(calculator.get_stats()))
+    calculator.xp_table.close()
+
+    def update_ui():
+        start = time.perf_counter()
+        for stats in frames:
+            app._update_ui(stats)
+        root.update_idletasks()
+        return len(frames), time.perf_counter() - start
+
+    try:
+        return {'gui.update_ui': _per_op(update_ui, repeat)}
+    finally:
+        root.destroy()
+
+def run_benchmarks(seed: int = 1, samples: int = 20000, clients: int = 4, repeat: int = 3) -> Dict:
+    """Gera o trace sintético e roda todos os casos"""
+    trace = list(generate_trace(seed=seed, clients=clients, hz=10.0, duration=samples / 10.0 + 1, samples=samples))
+    workdir = tempfile.mkdtemp(prefix='rolens_bench_')
+    results = {}
+    try:
+        results.update(bench_reader(trace, repeat))
+        results.update(bench_stats(trace, repeat, workdir))
+        results.update(bench_xp_table(trace, repeat, workdir))
+        results.update(bench_gui(trace, repeat, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'seed': seed,
+            'samples': samples,
+            'clients': clients,
+            'repeat': repeat,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created': time.time()
+        },
+        'results': results
+    }
+
+def compare(results: Dict, baseline: Dict, tolerance: float = 0.25) -> List[Dict]:
+    """Compara com o baseline; retorna [{'name', 'us', 'baseline', 'ratio', 'regression'}]"""
+    rows = []
+    for name, result in results['results'].items():
+        base = baseline.get('results', {}).get(name, {}).get('us')
+        current = result.get('us')
+        ratio = current / base if current is not None and base else None
+        rows.append({
+            'name': name,
+            'us': current,
+            'baseline': base,
+            'ratio': ratio,
+            'regression': ratio is not None and ratio > 1 + tolerance
+        })
+    return rows
+
+def baseline_mismatch(results: Dict, baseline: Dict) -> List[str]:
+    """Campos de meta que diferem entre o resultado e o baseline (tempos só são comparáveis na mesma máquina)"""
+    meta = results.get('meta', {})
+    base_meta = baseline.get('meta', {})
+    return [
+        key for key in ('platform', 'python', 'seed', 'samples', 'clients')
+        if base_meta.get(key) != meta.get(key)
+    ]
+
+def parse_benchmark_args(args):
+    """
+    Interpreta os argumentos: --seed, --samples, --clients, --repeat, --output,
+    --baseline, --tolerance (com valor) e --update-baseline
+    """
+    options = {
+        'seed': 1, 'samples': 20000, 'clients': 4, 'repeat': 3,
+        'output': None, 'baseline': DEFAULT_BASELINE, 'tolerance': 0.25, 'update_baseline': False
+    }
+    converters = {
+        '--seed': int, '--samples': int, '--clients': int, '--repeat': int,
+        '--output': str, '--baseline': str, '--tolerance': float
+    }
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '--update-baseline':
+            options['update_baseline'] = True
+            i += 1
+        elif arg in converters:
+            if i + 1 >= len(args):
+                raise ValueError(f"Missing value for {arg}")
+            options[arg[2:]] = converters[arg](args[i + 1])
+            i += 2
+        else:
+            raise ValueError(f"Unknown option {arg}")
+    if options['samples'] <= 0 or options['repeat'] <= 0 or options['clients'] <= 0:
+        raise ValueError('Invalid sample/repeat/client count')
+    return options
+
+def main():
+    try:
+        options = parse_benchmark_args(sys.argv[1:])
+    except ValueError as e:
+        print(f"Erro: {e}")
+        print(__doc__.split('Uso:')[1].rstrip())
+        sys.exit(2)
+
+    results = run_benchmarks(options['seed'], options['samples'], options['clients'], options['repeat'])
+
+    if options['output']:
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    baseline_file = options['baseline']
+    update_baseline = options['update_baseline']
+    baseline: Optional[Dict] = None
+    if not update_baseline:
+        if os.path.exists(baseline_file):
+            with open(baseline_file, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        else:
+            print(f"Baseline {baseline_file} não encontrado (use --update-baseline para criar)")
+
+    if baseline is not None:
+        mismatch = baseline_mismatch(results, baseline)
+        if mismatch:
+            base_meta = baseline.get('meta', {})
+            print(f"Aviso: baseline {baseline_file} gravado em outro ambiente ou com outros parâmetros; comparação ignorada")
+            for key in mismatch:
+                print(f"  {key}: baseline {base_meta.get(key)!r}, atual {results['meta'].get(key)!r}")
+            print("  (use --update-baseline para gravar um baseline desta máquina)")
+            baseline = None
+
+    rows = compare(results, baseline or {}, options['tolerance'])
+    for row in rows:
+        us = f"{row['us']:10.2f} µs" if row['us'] is not None else "   skipped   "
+        line = f"{row['name']:26s} {us}"
+        if row['ratio'] is not None:
+            line += f"  (baseline {row['baseline']:.2f} µs, {row['ratio']:.2f}x)"
+            if row['regression']:
+                line += "  ✗ REGRESSÃO"
+        print(line)
+
+    if update_baseline:
+        with open(baseline_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f"✓ Baseline gravado em {baseline_file}")
+
+    if any(row['regression'] for row in rows):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
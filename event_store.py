@@ -0,0 +1,76 @@
+"""
+Histórico completo de eventos da sessão em colunas (array), sem limite de tamanho.
+
+Cada evento ocupa 40 bytes (timestamp float64, delta de XP base, delta de XP job,
+delta de HP e nível base), em vez de um dict por evento. Os timestamps são
+crescentes, então recortes por intervalo de tempo são uma busca binária.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Optional, Tuple
+
+COLUMNS = ('t', 'baseXP', 'jobXP', 'hp', 'level')
+
+class EventStore:
+    """Eventos da sessão em colunas append-only"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.t = array('d')
+        self.base_xp = array('q')
+        self.job_xp = array('q')
+        self.hp = array('q')       # variação de HP (negativo = dano recebido)
+        self.level = array('q')    # nível base no momento do evento
+
+    def append(self, t: float, base_xp: int = 0, job_xp: int = 0, hp: int = 0, level: int = 0):
+        """Registra um evento (t não pode ser menor que o do último evento)"""
+        if self.t and t < self.t[-1]:
+            t = self.t[-1]
+        self.t.append(t)
+        self.base_xp.append(base_xp)
+        self.job_xp.append(job_xp)
+        self.hp.append(hp)
+        self.level.append(level)
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    @property
+    def nbytes(self) -> int:
+        """Memória usada pelos dados das colunas"""
+        return sum(len(column) * column.itemsize for column in self.columns().values())
+
+    def columns(self) -> Dict[str, array]:
+        """Colunas completas (sem cópia)"""
+        return {
+            't': self.t,
+            'baseXP': self.base_xp,
+            'jobXP': self.job_xp,
+            'hp': self.hp,
+            'level': self.level
+        }
+
+    def index_range(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[int, int]:
+        """Índices [i, j) dos eventos com start <= t <= end (busca binária)"""
+        i = 0 if start is None else bisect_left(self.t, start)
+        j = len(self.t) if end is None else bisect_right(self.t, end)
+        return i, max(i, j)
+
+    def slice(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, array]:
+        """Colunas dos eventos entre start e end (cópias compactas em array)"""
+        i, j = self.index_range(start, end)
+        return {name: column[i:j] for name, column in self.columns().items()}
+
+    def totals(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, int]:
+        """Somas no intervalo: XP base/job ganha, kills e dano recebido"""
+        i, j = self.index_range(start, end)
+        base_xp = self.base_xp[i:j]
+        return {
+            'baseXP': sum(base_xp),
+            'jobXP': sum(self.job_xp[i:j]),
+            'kills': sum(1 for value in base_xp if value > 0),
+            'damage': -sum(value for value in self.hp[i:j] if value < 0)
+        }
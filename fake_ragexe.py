@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Cliente simulado para testes no Linux: um processo chamado Ragexe.exe com uma
+imagem de memória nos offsets do perfil, lida pelo LinuxBackend real.
+
+A imagem é um arquivo esparso chamado Ragexe.exe mapeado com mmap, então o
+/proc/<pid>/maps mostra o "módulo" Ragexe.exe e o endereço base sai do mesmo
+caminho usado com clientes reais no Wine. O nome do processo (comm) também é
+trocado para Ragexe.exe, então list_processes() encontra os simuladores.
+
+A imagem é alterada em tempo real por um cenário de grind aleatório (com seed,
+trace_generator.GrindingClient) ou por uma gravação .rolrec. Logo após os campos
+do perfil fica o instante da última escrita (simTime, µs desde a época), lido
+pelo perfil 'simulador' para medir a defasagem ponta a ponta.
+
+Uso:
+    python fake_ragexe.py run [--seed N] [--hz N] [--duration s] [--profile nome]
+                              [--replay arquivo.rolrec] [--source-pid N]
+    python fake_ragexe.py measure [--clients N] [--hz N] [--sim-hz N] [--duration s] [--workers N] [--json]
+"""
+
+import os
+import sys
+import json
+import mmap
+import time
+import random
+import shutil
+import struct
+import tempfile
+import subprocess
+from typing import Dict, List, Optional
+import memory_reader
+
+SIMULATOR_PROFILE_NAME = 'simulador'
+PAGE_SIZE = mmap.PAGESIZE
+
+# prctl (Linux)
+PR_SET_NAME = 15
+PR_SET_PTRACER = 0x59616d61
+PR_SET_PTRACER_ANY = 0xffffffffffffffff
+
+def simulator_profile(profile: Optional[Dict] = None) -> Dict:
+    """Perfil com os campos do perfil base mais o simTime logo após o último campo"""
+    profile = profile or memory_reader.DEFAULT_PROFILE
+    fields = memory_reader.parse_profile_fields(profile)
+    end = max(offset + length for _, offset, _, length, _ in fields)
+    heartbeat = (end + 7) // 8 * 8
+    return {
+        'description': 'Cliente simulado (fake_ragexe.py)',
+        'module': profile.get('module', 'Ragexe.exe'),
+        'fields': list(profile['fields']) + [{'name': 'simTime', 'offset': heartbeat, 'type': 'uint64'}]
+    }
+
+def register_simulator_profile(profile: Optional[Dict] = None) -> str:
+    """Registra o perfil do simulador nos perfis do leitor; retorna o nome"""
+    memory_reader.offset_profiles.register(SIMULATOR_PROFILE_NAME, simulator_profile(profile))
+    return SIMULATOR_PROFILE_NAME
+
+def set_process_name(name: str):
+    """Troca o nome do processo (/proc/<pid>/comm) e permite a leitura por outros processos"""
+    from ctypes import CDLL, c_char_p, c_ulong
+    libc = CDLL(None, use_errno=True)
+    libc.prctl(PR_SET_NAME, c_char_p(name.encode('utf-8')[:15]), 0, 0, 0)
+    # Com ptrace_scope = 1 só processos ancestrais poderiam ler esta memória
+    libc.prctl(PR_SET_PTRACER, c_ulong(PR_SET_PTRACER_ANY), 0, 0, 0)
+
+class MemoryImage:
+    """Imagem de memória do cliente: arquivo esparso mapeado, escrito nos offsets do perfil"""
+
+    def __init__(self, profile: Dict, directory: str):
+        self.fields = memory_reader.parse_profile_fields(profile)
+        self.module = profile.get('module', 'Ragexe.exe')
+        size = max(offset + length for _, offset, _, length, _ in self.fields)
+        size = (size + PAGE_SIZE - 1) // PAGE_SIZE * PAGE_SIZE
+
+        self.path = os.path.join(directory, self.module)
+        with open(self.path, 'wb') as f:
+            f.truncate(size)
+        self.file = open(self.path, 'r+b')
+        self.memory = mmap.mmap(self.file.fileno(), size)
+
+        # Inteiros gravados sem sinal com máscara (valores fora do intervalo do tipo dão a volta, como no cliente)
+        self.writers = []
+        for name, offset, field_type, length, _ in self.fields:
+            code = memory_reader.FIELD_FORMATS[field_type]
+            if code == 's':
+                self.writers.append((name, offset, None, length))
+            else:
+                self.writers.append((name, offset, struct.Struct('<' + code.upper()), (1 << (length * 8)) - 1))
+
+    def write(self, values: Dict):
+        """Escreve os valores presentes em `values` nos offsets dos campos"""
+        memory = self.memory
+        for name, offset, packer, mask in self.writers:
+            value = values.get(name)
+            if value is None:
+                continue
+            if packer is None:
+                raw = value.encode('utf-8')[:mask - 1]
+                memory[offset:offset + mask] = raw + b'\x00' * (mask - len(raw))
+            else:
+                packer.pack_into(memory, offset, int(value) & mask)
+
+    def close(self):
+        self.memory.close()
+        self.file.close()
+
+def _random_states(seed: int, hz: float):
+    """Estados de um cliente de grind aleatório, um por tick"""
+    from trace_generator import GrindingClient
+    client = GrindingClient(random.Random(seed), os.getpid())
+    dt = 1.0 / hz
+    while True:
+        client.advance(dt)
+        yield dt, client.snapshot()._asdict()
+
+def _recorded_states(filename: str, source_pid: Optional[int]):
+    """Estados de um PID de uma gravação .rolrec, no ritmo gravado"""
+    from session_recorder import SessionReader
+    last_t = None
+    for t, pid, sample in SessionReader(filename):
+        if source_pid is None:
+            source_pid = pid
+        if pid != source_pid or sample.error:
+            continue
+        yield (t - last_t if last_t is not None else 0.0), sample._asdict()
+        last_t = t
+
+def run(seed: int = 1, hz: float = 10.0, duration: float = 0.0, profile: Optional[str] = None,
+        replay_file: Optional[str] = None, source_pid: Optional[int] = None):
+    """Executa o simulador até `duration` segundos (0 = até ser encerrado)"""
+    _, base_profile = memory_reader.offset_profiles.get_profile(profile)
+    sim_profile = simulator_profile(base_profile)
+
+    workdir = tempfile.mkdtemp(prefix='rolens_sim_')
+    image = MemoryImage(sim_profile, workdir)
+    set_process_name(image.module)
+
+    states = _recorded_states(replay_file, source_pid) if replay_file else _random_states(seed, hz)
+    started = time.monotonic()
+    deadline = started
+    try:
+        first = True
+        for delay, values in states:
+            deadline += delay
+            now = time.monotonic()
+            if deadline > now:
+                time.sleep(deadline - now)
+            if duration and time.monotonic() - started >= duration:
+                break
+            values['simTime'] = int(time.time() * 1e6)
+            image.write(values)
+            if first:
+                # Avisa quem iniciou o simulador que a imagem está pronta
+                print(f"ready {os.getpid()}", flush=True)
+                first = False
+    except KeyboardInterrupt:
+        pass
+    finally:
+        image.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def spawn_simulators(count: int, seed: int = 1, hz: float = 10.0, duration: float = 0.0,
+                     profile: Optional[str] = None) -> List[subprocess.Popen]:
+    """Inicia `count` simuladores (seeds consecutivas) e espera todos ficarem prontos"""
+    command = [sys.executable, os.path.abspath(__file__), 'run', '--hz', str(hz), '--duration', str(duration)]
+    if profile:
+        command += ['--profile', profile]
+
+    processes = [
+        subprocess.Popen(command + ['--seed', str(seed + i)], stdout=subprocess.PIPE, text=True)
+        for i in range(count)
+    ]
+    for process in processes:
+        line = process.stdout.readline()
+        if not line.startswith('ready'):
+            stop_simulators(processes)
+            raise RuntimeError(f"Simulador {process.pid} não iniciou")
+    return processes
+
+def stop_simulators(processes: List[subprocess.Popen]):
+    """Encerra os simuladores"""
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        if process.stdout:
+            process.stdout.close()
+
+def percentile(values: List[float], p: float) -> float:
+    """Percentil p (0-100) por interpolação linear"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100
+    low = int(k)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (k - low)
+
+def measure(clients: int = 8, hz: float = 5.0, sim_hz: float = 10.0, duration: float = 10.0,
+            workers: int = 4, profile: Optional[str] = None) -> Dict:
+    """
+    Inicia os simuladores e roda o MultiSampler real (LinuxBackend) + um StatsCalculator
+    por cliente. Retorna CPU por cliente e a defasagem ponta a ponta (escrita → stats).
+    """
+    from sampler import MultiSampler
+    from stats_calculator import StatsCalculator
+    from xp_table_manager import XPTableManager
+
+    profile_name = register_simulator_profile(memory_reader.offset_profiles.get_profile(profile)[1])
+    processes = spawn_simulators(clients, hz=sim_hz, profile=profile)
+    workdir = tempfile.mkdtemp(prefix='rolens_measure_')
+    xp_table = XPTableManager(os.path.join(workdir, 'xp_table.json'), auto_download=False)
+    sampler = MultiSampler([process.pid for process in processes], max_workers=workers, profile=profile_name)
+    calculators = {process.pid: StatsCalculator(xp_table=xp_table) for process in processes}
+
+    staleness = []
+    errors = 0
+    ticks = 0
+    period = 1.0 / hz
+    try:
+        cpu_start = time.process_time()
+        started = time.monotonic()
+        next_tick = started
+        while time.monotonic() - started < duration:
+            batch = sampler.sample()
+            for snapshot in batch['snapshots']:
+                if 'error' in snapshot:
+                    errors += 1
+                    continue
+                data = snapshot['data']
+                calculator = calculators[snapshot['pid']]
+                calculator.update(data)
+                calculator.get_stats()
+                staleness.append(time.time() - data.extra['simTime'] / 1e6)
+            ticks += 1
+            next_tick += period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        elapsed = time.monotonic() - started
+        cpu = time.process_time() - cpu_start
+    finally:
+        sampler.close()
+        xp_table.close()
+        stop_simulators(processes)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'clients': clients,
+        'hz': hz,
+        'simHz': sim_hz,
+        'ticks': ticks,
+        'samples': len(staleness),
+        'errors': errors,
+        'elapsed': elapsed,
+        # Fração de um núcleo usada pelo monitor, por cliente monitorado
+        'cpuPerClient': cpu / elapsed / clients if elapsed > 0 else 0.0,
+        'cpuPerSampleUs': cpu / len(staleness) * 1e6 if staleness else 0.0,
+        'stalenessMs': {
+            'p50': percentile(staleness, 50) * 1000,
+            'p95': percentile(staleness, 95) * 1000,
+            'p99': percentile(staleness, 99) * 1000,
+            'max': max(staleness) * 1000 if staleness else 0.0
+        }
+    }
+
+def parse_simulator_args(command, args):
+    """
+    Interpreta os argumentos do comando: run (--seed, --hz, --duration, --profile,
+    --replay, --source-pid) ou measure (--clients, --hz, --sim-hz, --duration,
+    --workers, --profile, --json)
+    """
+    if command == 'run':
+        options = {'seed': 1, 'hz': 10.0, 'duration': 0.0, 'profile': None, 'replay': None, 'source_pid': None}
+        converters = {'--seed': int, '--hz': float, '--duration': float, '--profile': str,
+                      '--replay': str, '--source-pid': int}
+    else:
+        options = {'clients': 8, 'hz': 5.0, 'sim_hz': 10.0, 'duration': 10.0, 'workers': 4,
+                   'profile': None, 'json': False}
+        converters = {'--clients': int, '--hz': float, '--sim-hz': float, '--duration': float,
+                      '--workers': int, '--profile': str}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '--json' and command == 'measure':
+            options['json'] = True
+            i += 1
+        elif arg in converters:
+            if i + 1 >= len(args):
+                raise ValueError(f"Missing value for {arg}")
+            options[arg[2:].replace('-', '_')] = converters[arg](args[i + 1])
+            i += 2
+        else:
+            raise ValueError(f"Unknown option {arg}")
+    if options['hz'] <= 0 or options['duration'] < 0:
+        raise ValueError('Invalid rate/duration')
+    if command == 'measure' and (options['clients'] <= 0 or options['workers'] <= 0 or options['sim_hz'] <= 0):
+        raise ValueError('Invalid client/worker count or simulator rate')
+    return options
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('run', 'measure'):
+        print("Uso: python fake_ragexe.py run|measure [opções]")
+        sys.exit(1)
+    if not sys.platform.startswith('linux'):
+        print("O simulador só funciona no Linux")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    try:
+        options = parse_simulator_args(command, sys.argv[2:])
+    except ValueError as e:
+        print(f"Erro: {e}")
+        print(__doc__.split('Uso:')[1].rstrip())
+        sys.exit(2)
+
+    if command == 'run':
+        run(options['seed'], options['hz'], options['duration'], options['profile'],
+            options['replay'], options['source_pid'])
+        return
+
+    report = measure(options['clients'], options['hz'], options['sim_hz'], options['duration'],
+                     options['workers'], options['profile'])
+    if options['json']:
+        print(json.dumps(report, indent=2))
+        return
+    staleness = report['stalenessMs']
+    print(f"{report['clients']} clientes a {report['hz']:g} Hz por {report['elapsed']:.1f}s: "
+          f"{report['samples']:,} amostras, {report['errors']} erros")
+    print(f"CPU por cliente: {report['cpuPerClient'] * 100:.2f}% de um núcleo "
+          f"({report['cpuPerSampleUs']:.0f} µs por amostra)")
+    print(f"Defasagem (ms): p50 {staleness['p50']:.1f}, p95 {staleness['p95']:.1f}, "
+          f"p99 {staleness['p99']:.1f}, máx {staleness['max']:.1f}")
+
+if __name__ == '__main__':
+    main()
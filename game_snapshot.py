@@ -0,0 +1,61 @@
+"""
+Tipos imutáveis produzidos pelo leitor de memória.
+
+GameSnapshot é uma NamedTuple (tupla com __slots__ vazios): o leitor a cria uma
+vez por amostra e ela é repassada por referência ao StatsCalculator e à
+interface, sem cópias. A conversão para dict só acontece na fronteira JSON
+(to_dict), onde o baseAddress também é formatado em hexadecimal.
+"""
+
+from typing import Dict, NamedTuple, Optional
+
+class GameSnapshot(NamedTuple):
+    """Uma leitura dos dados do personagem"""
+    xpBase: int = 0
+    xpJob: int = 0
+    hp: int = 0
+    sp: int = 0
+    nvBase: int = 0
+    nvJob: int = 0
+    hpMax: int = 0
+    spMax: int = 0
+    nome: str = ''
+    baseAddress: int = 0
+    # Campos de perfis de offsets que não fazem parte do snapshot padrão
+    extra: Optional[Dict] = None
+
+    # Leitura bem-sucedida (ReadError tem o mesmo atributo preenchido)
+    error = None
+
+    def to_dict(self) -> Dict:
+        """Formato JSON (o mesmo do antigo dict do read_game_data)"""
+        data = self._asdict()
+        extra = data.pop('extra')
+        if extra:
+            data.update(extra)
+        data['baseAddress'] = hex(self.baseAddress)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'GameSnapshot':
+        """Cria a partir do formato JSON (aceita baseAddress em hexadecimal)"""
+        values = {}
+        extra = {}
+        for name, value in data.items():
+            if name == 'baseAddress' and isinstance(value, str):
+                value = int(value, 16)
+            if name in SNAPSHOT_INDEX and name != 'extra':
+                values[name] = value
+            else:
+                extra[name] = value
+        return cls(extra=extra or None, **values)
+
+class ReadError(NamedTuple):
+    """Falha de leitura (processo fechado, sem permissão...)"""
+    error: str
+
+    def to_dict(self) -> Dict:
+        return {'error': self.error}
+
+# Posição de cada campo no snapshot (usado pelo ReadPlan para montar a tupla)
+SNAPSHOT_INDEX = {name: i for i, name in enumerate(GameSnapshot._fields)}
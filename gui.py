@@ -4,26 +4,34 @@ ROLens - Interface Gráfica Moderna
 Interface gráfica com CustomTkinter para monitoramento do Ragnarok Online
 """
 
+import sys
 import customtkinter as ctk
 import threading
+import queue
 import time
 from PIL import Image
 import qrcode
 from io import BytesIO
 import memory_reader
 from stats_calculator import StatsCalculator
+from sampler import sample_once, BackgroundSampler
+from game_snapshot import ReadError
+from stage_timers import timers
 import os
 from datetime import datetime
 import logging
 
-# Configura logging em arquivo
-try:
-    LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rolens_debug.log')
-    # Cria arquivo de log imediatamente
-    with open(LOG_FILE, 'w', encoding='utf-8') as f:
-        f.write(f"=== ROLens Debug Log - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ===\n")
-except:
-    LOG_FILE = 'rolens_debug.log'
+# Log de debug em arquivo (criado ao abrir a interface, não na importação do módulo)
+LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rolens_debug.log')
+
+def init_log():
+    """Cria (ou recria) o arquivo de log"""
+    global LOG_FILE
+    try:
+        with open(LOG_FILE, 'w', encoding='utf-8') as f:
+            f.write(f"=== ROLens Debug Log - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ===\n")
+    except:
+        LOG_FILE = 'rolens_debug.log'
 
 def log_debug(message):
     """Escreve mensagem de debug no arquivo de log"""
@@ -41,10 +49,25 @@ def log_debug(message):
         except:
             pass
 
+# Taxa de amostragem da memória (Hz) e intervalo de desenho da interface (ms)
+SAMPLE_HZ = 5.0
+FRAME_INTERVAL_MS = 100
+
+# Timers por etapa do pipeline (sempre ligados; card de debug com F12)
+read_timer = timers.histogram('read')
+record_timer = timers.histogram('record')
+update_timer = timers.histogram('stats.update')
+get_stats_timer = timers.histogram('stats.get_stats')
+ui_timer = timers.histogram('ui')
+frame_timer = timers.histogram('frame')
+# Ordem das etapas no card de debug (xp_table.* vêm do XPTableManager)
+DEBUG_STAGES = ('read', 'record', 'stats.update', 'stats.get_stats', 'ui', 'frame', 'xp_table.lock', 'xp_table.flush')
+
 class ROLensGUI:
     """Interface gráfica moderna para o ROLens"""
     
-    def __init__(self):
+    def __init__(self, record_file=None):
+        init_log()
         log_debug("=== ROLensGUI.__init__ chamado ===")
         # Configurações do CustomTkinter
         ctk.set_appearance_mode("dark")
@@ -60,8 +83,25 @@ class ROLensGUI:
         # Variáveis
         self.stats_calculator = StatsCalculator()
         self.selected_pid = None
+        # Perfil de offsets do cliente monitorado (None = perfil ativo do offsets.json)
+        self.selected_profile = None
         self.running = False
-        self.update_thread = None
+        self.sampler = None
+        # Protege o stats_calculator (atualizado pelo produtor, resetado pela interface)
+        self.stats_lock = threading.Lock()
+        # Labels persistentes dos cards e cache de fontes
+        self.card_slots = {}
+        self.font_cache = {}
+        self.rendered_stats = None
+        # Último erro de leitura registrado no log (só mudanças de estado são registradas)
+        self.read_error = None
+        # Gravação opcional das amostras (python gui.py --record sessao.rolrec)
+        self.record_file = record_file
+        self.recorder = None
+        # Card de debug (tempos por etapa), escondido até F12
+        self.debug_card = None
+        self.debug_visible = False
+        self.debug_refreshed = 0.0
         
         # Criar interface
         self._create_welcome_screen()
@@ -270,12 +310,15 @@ class ROLensGUI:
         info_label.pack(pady=3)
         self.root.update()
         
+        # Lê todos os processos em paralelo (um cliente travado não atrasa os demais)
+        all_data = sample_once([proc['pid'] for proc in processes])
+        
         for proc in processes:
             try:
-                game_data = memory_reader.read_game_data(proc['pid'])
-                if 'error' not in game_data and 'nome' in game_data and game_data['nome']:
-                    proc['char_name'] = game_data['nome']
-                    proc['level'] = f"Lv {game_data['nvBase']}/{game_data['nvJob']}"
+                game_data = all_data.get(proc['pid'], ReadError('No data'))
+                if not game_data.error and game_data.nome:
+                    proc['char_name'] = game_data.nome
+                    proc['level'] = f"Lv {game_data.nvBase}/{game_data.nvJob}"
                 else:
                     proc['char_name'] = None
             except:
@@ -283,8 +326,11 @@ class ROLensGUI:
         
         info_label.destroy()
         
+        # Perfis de offsets: com mais de um (builds diferentes do cliente), escolhe por janela
+        profile_names = sorted(memory_reader.offset_profiles.profiles)
+        
         # Frame para lista
-        list_frame = ctk.CTkScrollableFrame(selection_frame, height=360)
+        list_frame = ctk.CTkScrollableFrame(selection_frame, height=320 if len(profile_names) > 1 else 360)
         list_frame.pack(fill="both", expand=True, padx=5, pady=5)
         
         # Variável para processo selecionado
@@ -306,6 +352,29 @@ class ROLensGUI:
             )
             radio.pack(pady=5, anchor="w")
         
+        profile_var = None
+        if len(profile_names) > 1:
+            profile_frame = ctk.CTkFrame(selection_frame, fg_color="transparent")
+            profile_frame.pack(pady=(0, 5))
+            
+            profile_label = ctk.CTkLabel(
+                profile_frame,
+                text="Perfil de offsets:",
+                font=ctk.CTkFont(size=11)
+            )
+            profile_label.pack(side="left", padx=5)
+            
+            profile_var = ctk.StringVar(value=memory_reader.offset_profiles.active)
+            profile_menu = ctk.CTkOptionMenu(
+                profile_frame,
+                values=profile_names,
+                variable=profile_var,
+                width=150,
+                height=28,
+                font=ctk.CTkFont(size=11)
+            )
+            profile_menu.pack(side="left", padx=5)
+        
         # Botões
         btn_frame = ctk.CTkFrame(selection_frame, fg_color="transparent")
         btn_frame.pack(pady=5)
@@ -323,7 +392,10 @@ class ROLensGUI:
         start_btn = ctk.CTkButton(
             btn_frame,
             text="Iniciar →",
-            command=lambda: self._start_monitoring(int(selected_var.get())),
+            command=lambda: self._start_monitoring(
+                int(selected_var.get()),
+                profile_var.get() if profile_var is not None else None
+            ),
             font=ctk.CTkFont(size=11, weight="bold"),
             height=32,
             width=150,
@@ -332,20 +404,21 @@ class ROLensGUI:
         )
         start_btn.pack(side="left", padx=5)
         
-    def _start_monitoring(self, pid):
-        """Inicia monitoramento"""
+    def _start_monitoring(self, pid, profile=None):
+        """Inicia monitoramento (profile = perfil de offsets do cliente; None = perfil ativo)"""
         self.selected_pid = pid
+        self.selected_profile = profile
         
         # Testa conexão
-        initial_data = memory_reader.read_game_data(pid)
-        if 'error' in initial_data:
+        initial_data = memory_reader.read_game_data(pid, profile)
+        if initial_data.error:
             error_window = ctk.CTkToplevel(self.root)
             error_window.title("Erro")
             error_window.geometry("400x200")
             
             error_label = ctk.CTkLabel(
                 error_window,
-                text=f"Erro ao conectar: {initial_data['error']}\n\n"
+                text=f"Erro ao conectar: {initial_data.error}\n\n"
                      "Execute este programa como Administrador!",
                 font=ctk.CTkFont(size=14),
                 text_color="red"
@@ -362,7 +435,7 @@ class ROLensGUI:
         
         # Inicializa stats
         log_debug(f"=== INICIANDO MONITORAMENTO ===")
-        log_debug(f"PID selecionado: {pid}")
+        log_debug(f"PID selecionado: {pid} (perfil: {profile or memory_reader.offset_profiles.active})")
         log_debug(f"Dados iniciais: {initial_data}")
         
         self.stats_calculator.initialize(initial_data)
@@ -372,9 +445,25 @@ class ROLensGUI:
         self._create_monitoring_screen()
         log_debug("Tela de monitoramento criada")
         
-        # Inicia loop de atualização usando after() do Tkinter (thread-safe)
+        if self.record_file and self.recorder is None:
+            try:
+                self.recorder = memory_reader.open_recorder(self.record_file, profile)
+                log_debug(f"Gravando amostras em {self.record_file}")
+            except Exception as e:
+                log_debug(f"Erro ao iniciar gravação: {e}")
+        
+        # Amostragem em thread própria; a interface só consome a fila
         self.running = True
-        log_debug("Iniciando loop de atualização...")
+        self.sampler = BackgroundSampler(
+            lambda: self._read_sample(pid),
+            hz=SAMPLE_HZ,
+            process=self._process_sample,
+            on_error=lambda e: log_debug(f"Erro na amostragem: {e}")
+        )
+        self.sampler.start()
+        log_debug("Thread de amostragem iniciada")
+        
+        # Loop de desenho usando after() do Tkinter (thread-safe)
         self._schedule_update()
         log_debug("Loop de atualização agendado")
         
@@ -462,6 +551,8 @@ class ROLensGUI:
         
         # Grid 2x3 para cards de stats (igual ao terminal)
         self.stat_cards = {}
+        self.card_slots = {}
+        self.rendered_stats = None
         
         # Linha 1: Personagem | Sessão
         self.stat_cards['personagem'] = self._create_stat_card(stats_container, "Personagem", 0, 0)
@@ -475,6 +566,10 @@ class ROLensGUI:
         self.stat_cards['combate'] = self._create_stat_card(stats_container, "Combate", 2, 0)
         self.stat_cards['hp_sp'] = self._create_stat_card(stats_container, "HP / SP", 2, 1)
         
+        # Linha 4 (escondida): tempos por etapa, alternada com F12
+        self._create_debug_card(stats_container, 3)
+        self.root.bind('<F12>', self._toggle_debug_card)
+        
         
     def _create_stat_card(self, parent, title, row, col):
         """Cria card de estatística com cores do terminal"""
@@ -501,70 +596,204 @@ class ROLensGUI:
         
         return content_frame
         
+    def _create_debug_card(self, parent, row):
+        """Cria o card de debug (tempos por etapa em µs), inicialmente escondido"""
+        self.debug_card = ctk.CTkFrame(parent)
+        self.debug_card.grid(row=row, column=0, columnspan=2, padx=2, pady=2, sticky="nsew")
+        
+        header = ctk.CTkFrame(self.debug_card, fg_color="transparent")
+        header.pack(fill="x", padx=4, pady=(2, 1))
+        
+        title_label = ctk.CTkLabel(
+            header,
+            text="Debug: p50 / p95 / p99 / máx (µs)",
+            font=ctk.CTkFont(size=12, weight="bold"),
+            text_color="#00ffff"
+        )
+        title_label.pack(side="left")
+        
+        save_btn = ctk.CTkButton(
+            header,
+            text="Salvar",
+            command=self._dump_timings,
+            width=50,
+            height=20,
+            font=ctk.CTkFont(size=9)
+        )
+        save_btn.pack(side="right")
+        
+        self.debug_content = ctk.CTkFrame(self.debug_card, fg_color="transparent")
+        self.debug_content.pack(fill="both", expand=True, padx=4, pady=1)
+        
+        self.debug_card.grid_remove()
+        self.debug_visible = False
+    
+    def _toggle_debug_card(self, event=None):
+        """Mostra/esconde o card de debug (F12)"""
+        if self.debug_card is None:
+            return
+        self.debug_visible = not self.debug_visible
+        if self.debug_visible:
+            self.root.geometry("385x720")
+            self.debug_card.grid()
+            self._refresh_debug_card()
+        else:
+            self.debug_card.grid_remove()
+            self.root.geometry("385x506")
+    
+    def _refresh_debug_card(self):
+        """Atualiza o card de debug com o resumo dos histogramas"""
+        self.debug_refreshed = time.monotonic()
+        summary = timers.summary()
+        lines = []
+        for stage in DEBUG_STAGES:
+            stats = summary.get(stage)
+            if not stats or not stats['count']:
+                continue
+            # Vermelho: o p99 da etapa já passa de um quadro da interface
+            color = "#ff0000" if stats['p99'] >= FRAME_INTERVAL_MS * 1000 else "#ffffff"
+            lines.append((
+                f"{stage}: {stats['p50']:,.0f} / {stats['p95']:,.0f} / {stats['p99']:,.0f} / "
+                f"{stats['max']:,.0f} ({stats['count']:,})",
+                color
+            ))
+        if self.sampler:
+            lines.append((f"Ticks perdidos: {self.sampler.missed_ticks} | descartadas: {self.sampler.dropped}", "#ffff00"))
+        self._update_card_content(self.debug_content, lines)
+    
+    def _dump_timings(self):
+        """Grava os histogramas de tempo em rolens_timings.json (ao lado do log)"""
+        filename = os.path.join(os.path.dirname(os.path.abspath(LOG_FILE)), 'rolens_timings.json')
+        try:
+            timers.dump(filename)
+            log_debug(f"Tempos por etapa gravados em {filename}")
+        except Exception as e:
+            log_debug(f"Erro ao gravar tempos por etapa: {e}")
+    
     def _schedule_update(self):
-        """Agenda próxima atualização (thread-safe)"""
+        """Agenda próximo quadro da interface (thread-safe)"""
         if self.running:
-            log_debug("_schedule_update chamado")
             self._update_data()
-            # Agenda próxima atualização em 1000ms (1 segundo)
-            self.root.after(1000, self._schedule_update)
+            self.root.after(FRAME_INTERVAL_MS, self._schedule_update)
         else:
             log_debug("Loop parado (running=False)")
     
-    def _update_data(self):
-        """Atualiza dados do jogo (chamado pelo loop do Tkinter)"""
+    def _read_sample(self, pid):
+        """Lê a memória do processo (executa na thread de amostragem)"""
+        start = time.perf_counter_ns()
+        data = memory_reader.read_game_data(pid, self.selected_profile)
+        read_timer.record(time.perf_counter_ns() - start)
+        return data
+    
+    def _process_sample(self, game_data):
+        """Processa uma amostra na thread de amostragem e retorna as stats (ou None)"""
         try:
-            log_debug(f"Tentando ler PID: {self.selected_pid}")
-            # Lê dados do jogo
-            game_data = memory_reader.read_game_data(self.selected_pid)
+            if self.recorder is not None:
+                start = time.perf_counter_ns()
+                self.recorder.record(self.selected_pid, game_data)
+                record_timer.record(time.perf_counter_ns() - start)
             
-            log_debug(f"Dados recebidos: {game_data}")
+            if game_data.error:
+                # Um registro por erro novo, não um por amostra (SAMPLE_HZ vezes por segundo)
+                if game_data.error != self.read_error:
+                    log_debug(f"ERRO ao ler dados: {game_data.error}")
+                    self.read_error = game_data.error
+                return None
+            if self.read_error is not None:
+                log_debug(f"Leitura restabelecida: {game_data}")
+                self.read_error = None
             
-            if 'error' not in game_data:
-                log_debug("Sem erro, atualizando stats...")
-                # Atualiza estatísticas
+            # Atualiza estatísticas
+            with self.stats_lock:
+                start = time.perf_counter_ns()
                 self.stats_calculator.update(game_data)
+                updated = time.perf_counter_ns()
                 stats = self.stats_calculator.get_stats()
-                
-                log_debug("Stats obtidas, atualizando UI...")
-                # Atualiza interface diretamente (já estamos na thread principal)
-                self._update_ui(stats)
-                log_debug("UI atualizada com sucesso!")
-            else:
-                log_debug(f"ERRO ao ler dados: {game_data['error']}")
+                get_stats_timer.record(time.perf_counter_ns() - updated)
+                update_timer.record(updated - start)
+                return stats
         except Exception as e:
             log_debug(f"EXCEÇÃO ao atualizar dados: {e}")
             import traceback
             log_debug(traceback.format_exc())
+            return None
+    
+    def _update_data(self):
+        """Consome as amostras da fila e redesenha (chamado pelo loop do Tkinter)"""
+        frame_start = time.perf_counter_ns()
+        try:
+            pending = self.sampler.drain() if self.sampler else []
+            # Só o estado mais recente precisa ser desenhado; get_stats devolve
+            # o mesmo dict quando nada mudou, então o quadro pode ser pulado
+            if pending and pending[-1] is not self.rendered_stats:
+                self.rendered_stats = pending[-1]
+                start = time.perf_counter_ns()
+                self._update_ui(pending[-1])
+                ui_timer.record(time.perf_counter_ns() - start)
+            # Card de debug: no máximo uma atualização por segundo
+            if self.debug_visible and time.monotonic() - self.debug_refreshed >= 1.0:
+                self._refresh_debug_card()
+            frame_timer.record(time.perf_counter_ns() - frame_start)
+        except Exception as e:
+            log_debug(f"EXCEÇÃO ao atualizar interface: {e}")
+            import traceback
+            log_debug(traceback.format_exc())
             
+    def _get_font(self, size, weight="normal"):
+        """Retorna uma fonte compartilhada (criada uma única vez por tamanho/peso)"""
+        key = (size, weight)
+        font = self.font_cache.get(key)
+        if font is None:
+            font = ctk.CTkFont(size=size, weight=weight)
+            self.font_cache[key] = font
+        return font
+    
     def _update_card_content(self, card_frame, lines):
-        """Atualiza conteúdo de um card com linhas coloridas"""
-        # Limpa conteúdo anterior
-        for widget in card_frame.winfo_children():
-            widget.destroy()
-        
-        # Adiciona cada linha com sua cor
-        for text, color in lines:
-            label = ctk.CTkLabel(
-                card_frame,
-                text=text,
-                font=ctk.CTkFont(size=12),
-                text_color=color,
-                anchor="w"
-            )
-            label.pack(anchor="w", pady=0)
+        """
+        Atualiza conteúdo de um card com linhas coloridas.
+        Os labels são persistentes: só chama configure() quando texto ou cor mudou,
+        e linhas que sobram são apenas escondidas.
+        """
+        slots = self.card_slots.setdefault(card_frame, [])
+        
+        for i, (text, color) in enumerate(lines):
+            if i < len(slots):
+                slot = slots[i]
+                if slot['text'] != text or slot['color'] != color:
+                    slot['label'].configure(text=text, text_color=color)
+                    slot['text'] = text
+                    slot['color'] = color
+                if not slot['visible']:
+                    slot['label'].pack(anchor="w", pady=0)
+                    slot['visible'] = True
+            else:
+                label = ctk.CTkLabel(
+                    card_frame,
+                    text=text,
+                    font=self._get_font(12),
+                    text_color=color,
+                    anchor="w"
+                )
+                label.pack(anchor="w", pady=0)
+                slots.append({'label': label, 'text': text, 'color': color, 'visible': True})
+        
+        # Esconde linhas que não são mais usadas (ex.: card Job em "Coletando...")
+        for slot in slots[len(lines):]:
+            if slot['visible']:
+                slot['label'].pack_forget()
+                slot['visible'] = False
     
     def _update_ui(self, stats):
         """Atualiza interface com novos dados"""
         try:
-            current = stats.get('currentData', {})
+            current = stats['currentData']
             base_prog = stats.get('baseProgress', {})
             job_prog = stats.get('jobProgress', {})
             
             # Card Personagem
-            nome = current.get('nome', 'Desconhecido')
-            nvBase = current.get('nvBase', '?')
-            nvJob = current.get('nvJob', '?')
+            nome = current.nome or 'Desconhecido'
+            nvBase = current.nvBase
+            nvJob = current.nvJob
             
             self._update_card_content(self.stat_cards['personagem'], [
                 (f"Nome: {nome}", "#00ff00"),  # Verde
@@ -586,16 +815,16 @@ class ROLensGUI:
             ])
             
             # Card Base XP
-            xp_base = current.get('xpBase') or 0
+            xp_base = current.xpBase
             falta_base = base_prog.get('xp_remaining') or 0
             perc_base = base_prog.get('percentage') or 0
             total_nv = base_prog.get('xp_required') or 0
-            xp_h_base = stats.get('baseXPPerHour') or 0
+            xp_h_base_recente = stats.get('rates', {}).get('5m', {}).get('baseXPPerHour') or 0
+            eta_base = stats.get('baseLevelUpETA')
             
-            # Calcula tempo estimado para level up
-            if xp_h_base > 0 and falta_base > 0:
-                horas_restantes = falta_base / xp_h_base
-                segundos_restantes = int(horas_restantes * 3600)
+            # Tempo estimado para level up (ritmo recente, EWMA)
+            if eta_base is not None:
+                segundos_restantes = int(eta_base)
                 h = segundos_restantes // 3600
                 m = (segundos_restantes % 3600) // 60
                 s = segundos_restantes % 60
@@ -614,21 +843,21 @@ class ROLensGUI:
                 (f"Falta: {falta_base:,}", "#00ff00"),  # Verde
                 (f"Total Nv: {total_nv:,}", "#ffffff"),  # Branco
                 (f"Tempo up: {tempo_estimado}", "#00ffff"),  # Ciano
-                (f"XP/h: {xp_h_base:,}", "#00ff00")  # Verde
+                (f"XP/h (5 min): {xp_h_base_recente:,}", "#00ff00")  # Verde
             ]
             
             self._update_card_content(self.stat_cards['base_xp'], base_lines)
             
             # Card Job XP
-            xp_job = current.get('xpJob') or 0
+            xp_job = current.xpJob
             falta_job = job_prog.get('xp_remaining') or 0
             perc_job = job_prog.get('percentage') or 0
-            xp_h_job = stats.get('jobXPPerHour') or 0
+            xp_h_job_recente = stats.get('rates', {}).get('5m', {}).get('jobXPPerHour') or 0
+            eta_job = stats.get('jobLevelUpETA')
             
-            # Calcula tempo estimado para level up Job
-            if xp_h_job > 0 and falta_job > 0:
-                horas_restantes_job = falta_job / xp_h_job
-                segundos_restantes_job = int(horas_restantes_job * 3600)
+            # Tempo estimado para level up Job (ritmo recente, EWMA)
+            if eta_job is not None:
+                segundos_restantes_job = int(eta_job)
                 h_job = segundos_restantes_job // 3600
                 m_job = (segundos_restantes_job % 3600) // 60
                 s_job = segundos_restantes_job % 60
@@ -643,7 +872,7 @@ class ROLensGUI:
                     (atual_job_line, "#ffaa00"),  # Laranja
                     (f"Falta: {falta_job:,}", "#00ff00"),  # Verde
                     (f"Tempo up: {tempo_estimado_job}", "#00ffff"),  # Ciano
-                    (f"XP/h: {xp_h_job:,}", "#00ff00")  # Verde
+                    (f"XP/h (5 min): {xp_h_job_recente:,}", "#00ff00")  # Verde
                 ]
             else:
                 job_lines = [
@@ -657,20 +886,22 @@ class ROLensGUI:
             mobs = stats.get('monstersKilled') or 0
             dano_total = stats.get('totalDamageTaken') or 0
             dano_min = stats.get('damagePerMinute') or 0
+            dano_min_recente = stats.get('rates', {}).get('5m', {}).get('damagePerMinute') or 0
             avg_base_xp = stats.get('avgBaseXPPerMob') or 0
             avg_job_xp = stats.get('avgJobXPPerMob') or 0
             
             self._update_card_content(self.stat_cards['combate'], [
                 (f"Mobs: {mobs}", "#ff0000"),  # Vermelho
                 (f"Dano Total: {dano_total:,}", "#ffffff"),  # Branco
-                (f"Dano/min: {dano_min:,}", "#ffff00")  # Amarelo
+                (f"Dano/min: {dano_min:,}", "#ffff00"),  # Amarelo
+                (f"Dano/min (5 min): {dano_min_recente:,}", "#ffff00")  # Amarelo
             ])
             
             # Card HP / SP
-            hp = current.get('hp') or 0
-            hpMax = current.get('hpMax') or 1
-            sp = current.get('sp') or 0
-            spMax = current.get('spMax') or 1
+            hp = current.hp
+            hpMax = current.hpMax or 1
+            sp = current.sp
+            spMax = current.spMax or 1
             hp_perc = (hp / hpMax * 100) if hpMax > 0 else 0
             sp_perc = (sp / spMax * 100) if spMax > 0 else 0
             
@@ -688,7 +919,8 @@ class ROLensGUI:
             
     def _reset_stats(self):
         """Reseta estatísticas"""
-        self.stats_calculator.reset()
+        with self.stats_lock:
+            self.stats_calculator.reset()
     
     def _update_xp_table(self):
         """Atualiza tabela XP do GitHub"""
@@ -706,32 +938,55 @@ class ROLensGUI:
         )
         status_label.pack(pady=30)
         
-        progress_window.update()
-        
-        # Tenta baixar do GitHub
-        success = self.stats_calculator.xp_table.download_from_github()
+        # Download em segundo plano: progresso e resultado chegam por uma fila
+        # e são aplicados na thread do Tkinter
+        events = queue.Queue()
+        self.stats_calculator.xp_table.refresh_async(
+            callback=lambda result: events.put(('result', result)),
+            progress=lambda info: events.put(('progress', info))
+        )
         
-        if success:
-            # Recarrega a tabela
-            self.stats_calculator.xp_table.load()
-            status_label.configure(
-                text="✓ Tabela XP atualizada com sucesso!",
-                text_color="#00ff00"
-            )
-        else:
-            status_label.configure(
-                text="❌ Erro ao baixar tabela XP.\nVerifique sua conexão com a internet.",
-                text_color="#ff0000"
+        def show_ok_button():
+            ok_btn = ctk.CTkButton(
+                progress_window,
+                text="OK",
+                command=progress_window.destroy,
+                width=100
             )
+            ok_btn.pack(pady=10)
         
-        # Botão OK
-        ok_btn = ctk.CTkButton(
-            progress_window,
-            text="OK",
-            command=progress_window.destroy,
-            width=100
-        )
-        ok_btn.pack(pady=10)
+        def poll():
+            if not progress_window.winfo_exists():
+                return
+            while not events.empty():
+                kind, info = events.get_nowait()
+                if kind == 'progress':
+                    if info['stage'] == 'downloading' and info.get('total'):
+                        status_label.configure(text=f"Baixando tabela XP do GitHub... {info['bytes'] * 100 // info['total']}%")
+                    elif info['stage'] == 'merging':
+                        status_label.configure(text="Mesclando tabela XP...")
+                    continue
+                
+                if info['status'] == 'not_modified':
+                    status_label.configure(
+                        text="✓ Tabela XP já está atualizada!",
+                        text_color="#00ff00"
+                    )
+                elif info['success']:
+                    status_label.configure(
+                        text="✓ Tabela XP atualizada com sucesso!",
+                        text_color="#00ff00"
+                    )
+                else:
+                    status_label.configure(
+                        text="❌ Erro ao baixar tabela XP.\nVerifique sua conexão com a internet.",
+                        text_color="#ff0000"
+                    )
+                show_ok_button()
+                return
+            progress_window.after(100, poll)
+        
+        poll()
         
     def _show_percentage_dialog(self, xp_type='base'):
         """Mostra diálogo para inserir porcentagem"""
@@ -757,10 +1012,11 @@ class ROLensGUI:
             try:
                 percentage = float(entry.get())
                 if 0 < percentage < 100:
-                    if xp_type == 'base':
-                        success = self.stats_calculator.set_base_xp_estimate_from_percentage(percentage)
-                    else:
-                        success = self.stats_calculator.set_job_xp_estimate_from_percentage(percentage)
+                    with self.stats_lock:
+                        if xp_type == 'base':
+                            success = self.stats_calculator.set_base_xp_estimate_from_percentage(percentage)
+                        else:
+                            success = self.stats_calculator.set_job_xp_estimate_from_percentage(percentage)
                     
                     if success:
                         dialog.destroy()
@@ -787,10 +1043,21 @@ class ROLensGUI:
         """Inicia a aplicação"""
         self.root.mainloop()
         self.running = False
+        if self.sampler:
+            self.sampler.stop()
+        if self.recorder:
+            self.recorder.close()
+        # Grava alterações pendentes da tabela de XP
+        self.stats_calculator.xp_table.close()
+        # Libera os handles mantidos pelas sessões do leitor
+        memory_reader.close_all_sessions()
 
 def main():
     """Função principal"""
-    app = ROLensGUI()
+    record_file = None
+    if '--record' in sys.argv[1:-1]:
+        record_file = sys.argv[sys.argv.index('--record') + 1]
+    app = ROLensGUI(record_file)
     app.run()
 
 if __name__ == '__main__':
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Teste de carga: quantos personagens um host consegue monitorar a 1, 5 e 10 Hz
+antes de perder ticks.
+
+Para cada taxa e quantidade de clientes, usa clientes simulados (fake_ragexe.py,
+lidos pelo LinuxBackend real) e roda no ritmo configurado o MultiSampler, um
+StatsCalculator por personagem e um XPTableManager por personagem gravando no
+mesmo arquivo (como várias janelas do ROLens abertas). Mede:
+- latência por tick (do horário agendado até as estatísticas calculadas): p50/p95/p99/máx
+- deadlines perdidos (tick terminou depois do início do próximo)
+- RSS ao longo do tempo (início, fim, crescimento por minuto)
+- espera pelo lock do arquivo da tabela de XP
+
+O resultado é a curva de escala (uma linha por taxa × clientes) e o maior número
+de clientes sem perder deadlines em cada taxa. Com --history a execução é anexada
+a um arquivo JSONL para acompanhar a curva entre versões.
+
+Uso (Linux):
+    python load_test.py [--rates 1,5,10] [--clients 1,2,4,8,16,32] [--duration s] [--workers N]
+                        [--sim-hz N] [--flush-interval s] [--max-missed 0.01]
+                        [--label v1.2] [--output curva.json] [--history carga.jsonl] [--json]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+from typing import Dict, List, Optional
+import memory_reader
+from fake_ragexe import register_simulator_profile, spawn_simulators, stop_simulators, percentile
+
+def read_rss() -> int:
+    """Memória residente do processo atual (bytes; 0 se indisponível)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def run_point(pids: List[int], hz: float, duration: float, workers: int, profile: str,
+              flush_interval: float) -> Dict:
+    """Roda uma configuração (taxa × clientes) e retorna suas métricas"""
+    from sampler import MultiSampler
+    from stats_calculator import StatsCalculator
+    from xp_table_manager import XPTableManager
+
+    workdir = tempfile.mkdtemp(prefix='rolens_load_')
+    table_file = os.path.join(workdir, 'xp_table.json')
+    xp_tables = [XPTableManager(table_file, auto_download=False, flush_interval=flush_interval) for _ in pids]
+    calculators = {pid: StatsCalculator(xp_table=xp_table) for pid, xp_table in zip(pids, xp_tables)}
+    sampler = MultiSampler(pids, max_workers=workers, profile=profile)
+
+    period = 1.0 / hz
+    latencies = []
+    missed = 0
+    errors = 0
+    rss = []
+    try:
+        # Primeira passada fora da medição (abre os processos e resolve os módulos)
+        sampler.sample()
+
+        cpu_start = time.process_time()
+        started = time.monotonic()
+        scheduled = started
+        next_rss = started
+        while scheduled - started < duration:
+            now = time.monotonic()
+            if scheduled > now:
+                time.sleep(scheduled - now)
+
+            batch = sampler.sample()
+            for snapshot in batch['snapshots']:
+                if 'error' in snapshot:
+                    errors += 1
+                    continue
+                calculator = calculators[snapshot['pid']]
+                calculator.update(snapshot['data'])
+                calculator.get_stats()
+
+            finished = time.monotonic()
+            latencies.append(finished - scheduled)
+            scheduled += period
+            if finished > scheduled:
+                # Deadline perdido: os ticks que já passaram são descartados (não acumula atraso)
+                missed += 1
+                scheduled += int((finished - scheduled) / period + 1) * period
+
+            if finished >= next_rss:
+                rss.append((finished - started, read_rss()))
+                next_rss = finished + 1.0
+        elapsed = time.monotonic() - started
+        cpu = time.process_time() - cpu_start
+        rss.append((elapsed, read_rss()))
+    finally:
+        sampler.close()
+        for xp_table in xp_tables:
+            xp_table.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    lock_waits = [xp_table.lock_wait for xp_table in xp_tables]
+    lock_count = sum(stats['count'] for stats in lock_waits)
+    lock_total = sum(stats['total'] for stats in lock_waits)
+    ticks = len(latencies)
+    rss_minutes = (rss[-1][0] - rss[0][0]) / 60
+    return {
+        'hz': hz,
+        'clients': len(pids),
+        'ticks': ticks,
+        'errors': errors,
+        'latencyMs': {
+            'p50': percentile(latencies, 50) * 1000,
+            'p95': percentile(latencies, 95) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'max': max(latencies) * 1000 if latencies else 0.0
+        },
+        'missed': missed,
+        'missedRate': missed / ticks if ticks else 0.0,
+        'cpuPerClient': cpu / elapsed / len(pids) if elapsed > 0 else 0.0,
+        'rssStartMB': rss[0][1] / 1e6,
+        'rssEndMB': rss[-1][1] / 1e6,
+        'rssGrowthMBPerMin': (rss[-1][1] - rss[0][1]) / 1e6 / rss_minutes if rss_minutes > 0 else 0.0,
+        'lockWaitMs': {
+            'count': lock_count,
+            'total': lock_total * 1000,
+            'avg': lock_total / lock_count * 1000 if lock_count else 0.0,
+            'max': max((stats['max'] for stats in lock_waits), default=0.0) * 1000
+        }
+    }
+
+def run_load_test(rates=(1.0, 5.0, 10.0), clients=(1, 2, 4, 8, 16, 32), duration: float = 20.0,
+                  workers: int = 4, sim_hz: float = 10.0, flush_interval: float = 5.0,
+                  max_missed: float = 0.01, label: Optional[str] = None, progress=None) -> Dict:
+    """
+    Mede a curva de escala. Em cada taxa, para de aumentar os clientes quando a
+    fração de deadlines perdidos passa de max_missed.
+    """
+    profile = register_simulator_profile(memory_reader.offset_profiles.get_profile()[1])
+    clients = sorted(clients)
+    simulators = spawn_simulators(clients[-1], hz=sim_hz)
+    pids = [process.pid for process in simulators]
+
+    curve = []
+    max_clients = {}
+    try:
+        for hz in rates:
+            max_clients[str(hz)] = 0
+            for count in clients:
+                point = run_point(pids[:count], hz, duration, workers, profile, flush_interval)
+                curve.append(point)
+                if progress is not None:
+                    progress(point)
+                if point['missedRate'] > max_missed:
+                    break
+                max_clients[str(hz)] = count
+    finally:
+        stop_simulators(simulators)
+
+    return {
+        'meta': {
+            'label': label,
+            'duration': duration,
+            'workers': workers,
+            'simHz': sim_hz,
+            'flushInterval': flush_interval,
+            'maxMissed': max_missed,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'created': time.time()
+        },
+        'maxClients': max_clients,
+        'curve': curve
+    }
+
+def format_point(point: Dict) -> str:
+    latency = point['latencyMs']
+    return (f"{point['hz']:5g} Hz {point['clients']:4d} clientes | "
+            f"tick p50 {latency['p50']:6.1f} p95 {latency['p95']:6.1f} p99 {latency['p99']:6.1f} "
+            f"máx {latency['max']:6.1f} ms | perdidos {point['missed']:4d} ({point['missedRate'] * 100:5.1f}%) | "
+            f"RSS {point['rssEndMB']:6.1f} MB ({point['rssGrowthMBPerMin']:+.2f} MB/min) | "
+            f"lock {point['lockWaitMs']['total']:.1f} ms")
+
+def parse_load_test_args(args):
+    """
+    Interpreta os argumentos: --rates e --clients (listas separadas por vírgula),
+    --duration, --workers, --sim-hz, --flush-interval, --max-missed, --label,
+    --output, --history (com valor) e --json
+    """
+    options = {
+        'rates': [1.0, 5.0, 10.0], 'clients': [1, 2, 4, 8, 16, 32], 'duration': 20.0, 'workers': 4,
+        'sim_hz': 10.0, 'flush_interval': 5.0, 'max_missed': 0.01,
+        'label': None, 'output': None, 'history': None, 'json': False
+    }
+    converters = {
+        '--rates': lambda value: [float(rate) for rate in value.split(',') if rate],
+        '--clients': lambda value: [int(count) for count in value.split(',') if count],
+        '--duration': float, '--workers': int, '--sim-hz': float, '--flush-interval': float,
+        '--max-missed': float, '--label': str, '--output': str, '--history': str
+    }
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '--json':
+            options['json'] = True
+            i += 1
+        elif arg in converters:
+            if i + 1 >= len(args):
+                raise ValueError(f"Missing value for {arg}")
+            options[arg[2:].replace('-', '_')] = converters[arg](args[i + 1])
+            i += 2
+        else:
+            raise ValueError(f"Unknown option {arg}")
+    if not options['rates'] or min(options['rates']) <= 0:
+        raise ValueError('Invalid --rates')
+    if not options['clients'] or min(options['clients']) <= 0:
+        raise ValueError('Invalid --clients')
+    if options['duration'] <= 0 or options['workers'] <= 0 or options['sim_hz'] <= 0:
+        raise ValueError('Invalid duration/worker count/simulator rate')
+    return options
+
+def main():
+    if not sys.platform.startswith('linux'):
+        print("O teste de carga usa clientes simulados e só funciona no Linux")
+        sys.exit(1)
+
+    try:
+        options = parse_load_test_args(sys.argv[1:])
+    except ValueError as e:
+        print(f"Erro: {e}")
+        print(__doc__.split('Uso (Linux):')[1].rstrip())
+        sys.exit(2)
+
+    as_json = options['json']
+    report = run_load_test(
+        rates=options['rates'],
+        clients=options['clients'],
+        duration=options['duration'],
+        workers=options['workers'],
+        sim_hz=options['sim_hz'],
+        flush_interval=options['flush_interval'],
+        max_missed=options['max_missed'],
+        label=options['label'],
+        progress=None if as_json else lambda point: print(format_point(point), flush=True)
+    )
+
+    if options['output']:
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if options['history']:
+        with open(options['history'], 'a', encoding='utf-8') as f:
+            f.write(json.dumps(report) + '\n')
+
+    if as_json:
+        print(json.dumps(report, indent=2))
+        return
+    for hz, count in report['maxClients'].items():
+        print(f"Máximo sem perder ticks a {float(hz):g} Hz: {count} clientes")
+
+if __name__ == '__main__':
+    main()
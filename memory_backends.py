@@ -0,0 +1,456 @@
+"""
+Backends de acesso à memória de processos.
+
+Cada backend implementa a mesma interface (listar processos, obter o endereço
+base de um módulo e ler blocos de memória), permitindo que o memory_reader
+rode no Windows (ReadProcessMemory), no Linux (process_vm_readv ou
+/proc/<pid>/mem, inclusive clientes rodando no Wine) ou contra uma imagem
+de memória sintética em processo (testes e benchmarks).
+"""
+
+import os
+import sys
+import errno
+from ctypes import *
+
+GAME_PROCESS_NAME = 'ragexe.exe'
+
+class MemoryBackend:
+    """Interface comum dos backends de memória"""
+
+    name = 'base'
+
+    def list_processes(self, process_name=GAME_PROCESS_NAME):
+        """Lista processos cujo executável tem o nome informado: [{'pid', 'name'}]"""
+        raise NotImplementedError
+
+    def open(self, pid):
+        """Abre o processo e retorna um handle (ou None em caso de falha)"""
+        raise NotImplementedError
+
+    def close(self, handle):
+        """Fecha um handle retornado por open()"""
+        raise NotImplementedError
+
+    def is_alive(self, handle):
+        """Verifica se o processo do handle ainda é o mesmo e está rodando"""
+        raise NotImplementedError
+
+    def get_module_base(self, pid, module_name):
+        """Obtém o endereço base de um módulo (0 se não encontrado)"""
+        raise NotImplementedError
+
+    def read_into(self, handle, address, buffer, size):
+        """Lê size bytes a partir de address para um buffer ctypes pré-alocado"""
+        raise NotImplementedError
+
+class WindowsBackend(MemoryBackend):
+    """Backend Windows (Toolhelp32 + ReadProcessMemory)"""
+
+    name = 'windows'
+
+    PROCESS_ALL_ACCESS = 0x1F0FFF
+    TH32CS_SNAPPROCESS = 0x00000002
+    TH32CS_SNAPMODULE = 0x00000008
+    STILL_ACTIVE = 259
+
+    def __init__(self):
+        from ctypes.wintypes import DWORD, ULONG, LONG, BYTE, HMODULE
+
+        # Estruturas do Windows
+        class PROCESSENTRY32(Structure):
+            _fields_ = [
+                ('dwSize', DWORD),
+                ('cntUsage', DWORD),
+                ('th32ProcessID', DWORD),
+                ('th32DefaultHeapID', POINTER(ULONG)),
+                ('th32ModuleID', DWORD),
+                ('cntThreads', DWORD),
+                ('th32ParentProcessID', DWORD),
+                ('pcPriClassBase', LONG),
+                ('dwFlags', DWORD),
+                ('szExeFile', c_char * 260)
+            ]
+
+        class MODULEENTRY32(Structure):
+            _fields_ = [
+                ('dwSize', DWORD),
+                ('th32ModuleID', DWORD),
+                ('th32ProcessID', DWORD),
+                ('GlblcntUsage', DWORD),
+                ('ProccntUsage', DWORD),
+                ('modBaseAddr', POINTER(BYTE)),
+                ('modBaseSize', DWORD),
+                ('hModule', HMODULE),
+                ('szModule', c_char * 256),
+                ('szExePath', c_char * 260)
+            ]
+
+        self.PROCESSENTRY32 = PROCESSENTRY32
+        self.MODULEENTRY32 = MODULEENTRY32
+        self.DWORD = DWORD
+
+        # Funções do Windows API
+        kernel32 = windll.kernel32
+        self.CreateToolhelp32Snapshot = kernel32.CreateToolhelp32Snapshot
+        self.Process32First = kernel32.Process32First
+        self.Process32Next = kernel32.Process32Next
+        self.Module32First = kernel32.Module32First
+        self.Module32Next = kernel32.Module32Next
+        self.OpenProcess = kernel32.OpenProcess
+        self.ReadProcessMemory = kernel32.ReadProcessMemory
+        self.CloseHandle = kernel32.CloseHandle
+        self.GetExitCodeProcess = kernel32.GetExitCodeProcess
+
+    def list_processes(self, process_name=GAME_PROCESS_NAME):
+        processes = []
+        snapshot = self.CreateToolhelp32Snapshot(self.TH32CS_SNAPPROCESS, 0)
+
+        if snapshot == -1:
+            return processes
+
+        pe32 = self.PROCESSENTRY32()
+        pe32.dwSize = sizeof(self.PROCESSENTRY32)
+
+        if self.Process32First(snapshot, byref(pe32)):
+            while True:
+                exe_name = pe32.szExeFile.decode('utf-8', errors='ignore')
+                if exe_name.lower() == process_name:
+                    processes.append({
+                        'pid': pe32.th32ProcessID,
+                        'name': exe_name
+                    })
+
+                if not self.Process32Next(snapshot, byref(pe32)):
+                    break
+
+        self.CloseHandle(snapshot)
+        return processes
+
+    def open(self, pid):
+        return self.OpenProcess(self.PROCESS_ALL_ACCESS, False, pid) or None
+
+    def close(self, handle):
+        self.CloseHandle(handle)
+
+    def is_alive(self, handle):
+        # O PID só pode ser reutilizado depois que o handle é fechado,
+        # então basta verificar se o processo do handle terminou
+        exit_code = self.DWORD()
+        if not self.GetExitCodeProcess(handle, byref(exit_code)):
+            return False
+        return exit_code.value == self.STILL_ACTIVE
+
+    def get_module_base(self, pid, module_name):
+        snapshot = self.CreateToolhelp32Snapshot(self.TH32CS_SNAPMODULE, pid)
+
+        if snapshot == -1:
+            return 0
+
+        me32 = self.MODULEENTRY32()
+        me32.dwSize = sizeof(self.MODULEENTRY32)
+
+        base_addr = 0
+        if self.Module32First(snapshot, byref(me32)):
+            while True:
+                mod_name = me32.szModule.decode('utf-8', errors='ignore')
+                if mod_name.lower() == module_name.lower():
+                    base_addr = cast(me32.modBaseAddr, c_void_p).value
+                    break
+
+                if not self.Module32Next(snapshot, byref(me32)):
+                    break
+
+        self.CloseHandle(snapshot)
+        return base_addr
+
+    def read_into(self, handle, address, buffer, size):
+        bytes_read = c_size_t()
+        return bool(self.ReadProcessMemory(handle, c_void_p(address), byref(buffer), size, byref(bytes_read)))
+
+class iovec(Structure):
+    _fields_ = [
+        ('iov_base', c_void_p),
+        ('iov_len', c_size_t)
+    ]
+
+class LinuxProcessHandle:
+    """Handle de processo no Linux (PID + instante de início para detectar reinício)"""
+
+    __slots__ = ('pid', 'start_time', 'mem_fd')
+
+    def __init__(self, pid, start_time):
+        self.pid = pid
+        self.start_time = start_time
+        self.mem_fd = None
+
+class LinuxBackend(MemoryBackend):
+    """
+    Backend Linux: lê com process_vm_readv e, se não for permitido,
+    cai para /proc/<pid>/mem. Também funciona com clientes rodando no Wine,
+    já que o Wine expõe o nome do executável e mapeia os módulos PE em /proc.
+    """
+
+    name = 'linux'
+
+    def __init__(self):
+        self.use_vm_readv = True
+        try:
+            libc = CDLL(None, use_errno=True)
+            self._process_vm_readv = libc.process_vm_readv
+            self._process_vm_readv.argtypes = [c_int, POINTER(iovec), c_ulong, POINTER(iovec), c_ulong, c_ulong]
+            self._process_vm_readv.restype = c_ssize_t
+        except (OSError, AttributeError):
+            self.use_vm_readv = False
+
+    def _read_start_time(self, pid):
+        """Retorna o instante de início do processo (campo 22 de /proc/<pid>/stat)"""
+        try:
+            with open(f'/proc/{pid}/stat', 'rb') as f:
+                stat = f.read()
+        except OSError:
+            return None
+        # O nome do processo (campo 2) pode conter espaços: pula até o último ')'
+        fields = stat[stat.rfind(b')') + 2:].split()
+        return int(fields[19])
+
+    def _process_names(self, pid):
+        """Nomes possíveis do executável (comm e argv[0])"""
+        names = []
+        try:
+            with open(f'/proc/{pid}/comm', 'rb') as f:
+                names.append(f.read().strip().decode('utf-8', errors='ignore'))
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                argv0 = f.read().split(b'\x00', 1)[0].decode('utf-8', errors='ignore')
+            if argv0:
+                names.append(argv0.replace('\\', '/').rsplit('/', 1)[-1])
+        except OSError:
+            pass
+        return names
+
+    def list_processes(self, process_name=GAME_PROCESS_NAME):
+        processes = []
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            for name in self._process_names(entry):
+                if name.lower() == process_name:
+                    processes.append({
+                        'pid': int(entry),
+                        'name': name
+                    })
+                    break
+        processes.sort(key=lambda proc: proc['pid'])
+        return processes
+
+    def open(self, pid):
+        start_time = self._read_start_time(pid)
+        if start_time is None:
+            return None
+        return LinuxProcessHandle(pid, start_time)
+
+    def close(self, handle):
+        if handle.mem_fd is not None:
+            os.close(handle.mem_fd)
+            handle.mem_fd = None
+
+    def is_alive(self, handle):
+        # Mesmo PID com outro instante de início = processo reiniciado
+        return self._read_start_time(handle.pid) == handle.start_time
+
+    def get_module_base(self, pid, module_name):
+        module_name = module_name.lower()
+        try:
+            with open(f'/proc/{pid}/maps', 'r', encoding='utf-8', errors='ignore') as f:
+                for line in f:
+                    parts = line.split(None, 5)
+                    if len(parts) < 6:
+                        continue
+                    path = parts[5].strip().replace('\\', '/')
+                    if path.rsplit('/', 1)[-1].lower() == module_name:
+                        return int(parts[0].split('-', 1)[0], 16)
+        except OSError:
+            pass
+        return 0
+
+    def read_into(self, handle, address, buffer, size):
+        if self.use_vm_readv:
+            local = iovec(addressof(buffer), size)
+            remote = iovec(address, size)
+            result = self._process_vm_readv(handle.pid, byref(local), 1, byref(remote), 1, 0)
+            if result == size:
+                return True
+            if result >= 0 or get_errno() not in (errno.EPERM, errno.ENOSYS):
+                return False
+            # Sem permissão para process_vm_readv: usa /proc/<pid>/mem
+            self.use_vm_readv = False
+
+        try:
+            if handle.mem_fd is None:
+                handle.mem_fd = os.open(f'/proc/{handle.pid}/mem', os.O_RDONLY)
+            data = os.pread(handle.mem_fd, size, address)
+        except OSError:
+            return False
+        if len(data) != size:
+            return False
+        memmove(addressof(buffer), data, size)
+        return True
+
+class FakeProcess:
+    """
+    Processo sintético para o FakeBackend.
+    A memória é esparsa (páginas alocadas sob demanda), então imagens com
+    offsets altos como os do Ragexe custam apenas as páginas escritas.
+    """
+
+    PAGE_SIZE = 4096
+
+    def __init__(self, pid, name='Ragexe.exe', modules=None, script=None):
+        self.pid = pid
+        self.name = name
+        # {nome do módulo: endereço base}
+        self.modules = modules or {name: 0x400000}
+        self.pages = {}
+        self.alive = True
+        # Sequência de dicts {campo: valor} aplicada um passo por amostra
+        self.script = iter(script) if script is not None else None
+        self.generation = 0
+
+    @property
+    def base_address(self):
+        """Endereço base do módulo principal"""
+        return self.modules[self.name]
+
+    def write(self, address, data):
+        """Escreve bytes em um endereço absoluto"""
+        page_size = self.PAGE_SIZE
+        pos = 0
+        while pos < len(data):
+            page_index, page_offset = divmod(address + pos, page_size)
+            page = self.pages.get(page_index)
+            if page is None:
+                page = self.pages[page_index] = bytearray(page_size)
+            chunk = min(len(data) - pos, page_size - page_offset)
+            page[page_offset:page_offset + chunk] = data[pos:pos + chunk]
+            pos += chunk
+
+    def read(self, address, size):
+        """Lê bytes de um endereço absoluto (páginas não escritas são zeros)"""
+        page_size = self.PAGE_SIZE
+        out = bytearray(size)
+        pos = 0
+        while pos < size:
+            page_index, page_offset = divmod(address + pos, page_size)
+            chunk = min(size - pos, page_size - page_offset)
+            page = self.pages.get(page_index)
+            if page is not None:
+                out[pos:pos + chunk] = page[page_offset:page_offset + chunk]
+            pos += chunk
+        return out
+
+    def set_fields(self, values, fields=None):
+        """
+        Escreve valores de campos na imagem usando o layout de um perfil
+        (lista de tuplas (nome, offset, tipo, tamanho, módulo); padrão = perfil embutido)
+        """
+        import struct
+        from memory_reader import FIELD_FORMATS, DEFAULT_PROFILE, parse_profile_fields
+
+        if fields is None:
+            fields = parse_profile_fields(DEFAULT_PROFILE)
+        for name, offset, field_type, length, module in fields:
+            if name not in values:
+                continue
+            address = self.modules.get(module, self.base_address) + offset
+            value = values[name]
+            if field_type == 'string':
+                raw = value.encode('utf-8')[:length - 1]
+                data = raw + b'\x00' * (length - len(raw))
+            else:
+                # Formato sem sinal com máscara: valores fora do intervalo do tipo dão a volta (como no cliente)
+                data = struct.pack('<' + FIELD_FORMATS[field_type].upper(), int(value) & ((1 << (length * 8)) - 1))
+            self.write(address, data)
+
+    def step(self):
+        """Avança um passo do script (se houver)"""
+        if self.script is None:
+            return
+        try:
+            self.set_fields(next(self.script))
+        except StopIteration:
+            self.script = None
+
+    def restart(self):
+        """Simula o reinício do cliente (mesmo PID, novo processo)"""
+        self.generation += 1
+        self.pages = {}
+        self.alive = True
+
+class FakeBackend(MemoryBackend):
+    """
+    Backend em processo que serve imagens de memória sintéticas.
+    Cada verificação de sessão (uma por amostra) avança o script do processo.
+    """
+
+    name = 'fake'
+
+    def __init__(self, processes=None):
+        self.processes = {}
+        for process in processes or []:
+            self.add_process(process)
+
+    def add_process(self, process):
+        self.processes[process.pid] = process
+        return process
+
+    def remove_process(self, pid):
+        process = self.processes.pop(pid, None)
+        if process is not None:
+            process.alive = False
+
+    def list_processes(self, process_name=GAME_PROCESS_NAME):
+        return [
+            {'pid': process.pid, 'name': process.name}
+            for process in sorted(self.processes.values(), key=lambda process: process.pid)
+            if process.alive and process.name.lower() == process_name
+        ]
+
+    def open(self, pid):
+        process = self.processes.get(pid)
+        if process is None or not process.alive:
+            return None
+        return (process, process.generation)
+
+    def close(self, handle):
+        pass
+
+    def is_alive(self, handle):
+        process, generation = handle
+        if not process.alive or process.generation != generation:
+            return False
+        process.step()
+        return True
+
+    def get_module_base(self, pid, module_name):
+        process = self.processes.get(pid)
+        if process is None:
+            return 0
+        for name, base_address in process.modules.items():
+            if name.lower() == module_name.lower():
+                return base_address
+        return 0
+
+    def read_into(self, handle, address, buffer, size):
+        process, generation = handle
+        if not process.alive or process.generation != generation:
+            return False
+        memmove(addressof(buffer), bytes(process.read(address, size)), size)
+        return True
+
+def get_default_backend():
+    """Escolhe o backend adequado para a plataforma atual"""
+    if sys.platform == 'win32':
+        return WindowsBackend()
+    if sys.platform.startswith('linux'):
+        return LinuxBackend()
+    return FakeBackend()
@@ -1,177 +1,646 @@
+import os
 import sys
 import json
+import time
 import struct
-from ctypes import *
-from ctypes.wintypes import *
-
-# Constantes do Windows API
-PROCESS_ALL_ACCESS = 0x1F0FFF
-TH32CS_SNAPPROCESS = 0x00000002
-
-# Estruturas do Windows
-class PROCESSENTRY32(Structure):
-    _fields_ = [
-        ('dwSize', DWORD),
-        ('cntUsage', DWORD),
-        ('th32ProcessID', DWORD),
-        ('th32DefaultHeapID', POINTER(ULONG)),
-        ('th32ModuleID', DWORD),
-        ('cntThreads', DWORD),
-        ('th32ParentProcessID', DWORD),
-        ('pcPriClassBase', LONG),
-        ('dwFlags', DWORD),
-        ('szExeFile', c_char * 260)
-    ]
+import threading
+from ctypes import c_int32, c_byte, create_string_buffer, sizeof
+import memory_backends
+from game_snapshot import GameSnapshot, ReadError, SNAPSHOT_INDEX
 
-class MODULEENTRY32(Structure):
-    _fields_ = [
-        ('dwSize', DWORD),
-        ('th32ModuleID', DWORD),
-        ('th32ProcessID', DWORD),
-        ('GlblcntUsage', DWORD),
-        ('ProccntUsage', DWORD),
-        ('modBaseAddr', POINTER(BYTE)),
-        ('modBaseSize', DWORD),
-        ('hModule', HMODULE),
-        ('szModule', c_char * 256),
-        ('szExePath', c_char * 260)
-    ]
+# Backend de memória em uso (Windows, Linux ou sintético)
+backend = memory_backends.get_default_backend()
 
-# Funções do Windows API
-kernel32 = windll.kernel32
-CreateToolhelp32Snapshot = kernel32.CreateToolhelp32Snapshot
-Process32First = kernel32.Process32First
-Process32Next = kernel32.Process32Next
-Module32First = kernel32.Module32First
-Module32Next = kernel32.Module32Next
-OpenProcess = kernel32.OpenProcess
-ReadProcessMemory = kernel32.ReadProcessMemory
-CloseHandle = kernel32.CloseHandle
+def set_backend(new_backend):
+    """Troca o backend de memória (fecha as sessões abertas no backend anterior)"""
+    global backend
+    close_all_sessions()
+    backend = new_backend
 
 def list_processes():
     """Lista todos os processos Ragexe.exe"""
-    processes = []
-    snapshot = CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
-
-    if snapshot == -1:
-        return processes
-
-    pe32 = PROCESSENTRY32()
-    pe32.dwSize = sizeof(PROCESSENTRY32)
-
-    if Process32First(snapshot, byref(pe32)):
-        while True:
-            exe_name = pe32.szExeFile.decode('utf-8', errors='ignore')
-            if exe_name.lower() == 'ragexe.exe':
-                processes.append({
-                    'pid': pe32.th32ProcessID,
-                    'name': exe_name
-                })
-
-            if not Process32Next(snapshot, byref(pe32)):
-                break
-
-    CloseHandle(snapshot)
-    return processes
+    return backend.list_processes()
 
 def get_module_base(pid, module_name):
     """Obtém o endereço base de um módulo"""
-    TH32CS_SNAPMODULE = 0x00000008
-    snapshot = CreateToolhelp32Snapshot(TH32CS_SNAPMODULE, pid)
-
-    if snapshot == -1:
-        return 0
-
-    me32 = MODULEENTRY32()
-    me32.dwSize = sizeof(MODULEENTRY32)
-
-    base_addr = 0
-    if Module32First(snapshot, byref(me32)):
-        while True:
-            mod_name = me32.szModule.decode('utf-8', errors='ignore')
-            if mod_name.lower() == module_name.lower():
-                base_addr = cast(me32.modBaseAddr, c_void_p).value
-                break
-
-            if not Module32Next(snapshot, byref(me32)):
-                break
-
-    CloseHandle(snapshot)
-    return base_addr
+    return backend.get_module_base(pid, module_name)
 
 def read_int32(handle, address):
     """Lê um valor int32 da memória"""
     buffer = c_int32()
-    bytes_read = c_size_t()
 
-    if ReadProcessMemory(handle, c_void_p(address), byref(buffer), sizeof(buffer), byref(bytes_read)):
+    if backend.read_into(handle, address, buffer, sizeof(buffer)):
         return buffer.value
     return 0
 
 def read_byte(handle, address):
     """Lê um byte da memória"""
     buffer = c_byte()
-    bytes_read = c_size_t()
 
-    if ReadProcessMemory(handle, c_void_p(address), byref(buffer), sizeof(buffer), byref(bytes_read)):
+    if backend.read_into(handle, address, buffer, sizeof(buffer)):
         return buffer.value
     return 0
 
 def read_string(handle, address, length=24):
     """Lê uma string da memória"""
     buffer = create_string_buffer(length)
-    bytes_read = c_size_t()
 
-    if ReadProcessMemory(handle, c_void_p(address), buffer, length, byref(bytes_read)):
+    if backend.read_into(handle, address, buffer, length):
         try:
             return buffer.value.decode('utf-8', errors='ignore').rstrip('\x00')
         except:
             return ""
     return ""
 
-def read_game_data(pid):
-    """Lê os dados do jogo"""
-    # Offsets
-    offsets = {
-        'xpBase': 0x106B6D0,
-        'xpJob': 0x106B6E8,
-        'hp': 0x106F28C,
-        'sp': 0x106F294,
-        'nvBase': 0x106B6F0,
-        'nvJob': 0x106B6F8,
-        'hpMax': 0x106F290,
-        'spMax': 0x106F298,
-        'name': 0x1071CD8
-    }
-
-    # Abre o processo
-    handle = OpenProcess(PROCESS_ALL_ACCESS, False, pid)
-    if not handle:
-        return {'error': 'Failed to open process'}
-
-    # Obtém o endereço base do módulo
-    base_address = get_module_base(pid, 'Ragexe.exe')
-    if not base_address:
-        CloseHandle(handle)
-        return {'error': 'Failed to get base address'}
-
-    # Lê os dados
-    data = {
-        'xpBase': read_int32(handle, base_address + offsets['xpBase']),
-        'xpJob': read_int32(handle, base_address + offsets['xpJob']),
-        'hp': read_int32(handle, base_address + offsets['hp']),
-        'sp': read_int32(handle, base_address + offsets['sp']),
-        'nvBase': read_byte(handle, base_address + offsets['nvBase']),
-        'nvJob': read_byte(handle, base_address + offsets['nvJob']),
-        'hpMax': read_int32(handle, base_address + offsets['hpMax']),
-        'spMax': read_int32(handle, base_address + offsets['spMax']),
-        'nome': read_string(handle, base_address + offsets['name'], 24),
-        'baseAddress': hex(base_address)
+def read_into(handle, address, buffer, size):
+    """Lê um bloco de memória diretamente para um buffer pré-alocado"""
+    return backend.read_into(handle, address, buffer, size)
+
+# Tipos suportados -> código do struct (little-endian)
+FIELD_FORMATS = {
+    'int8': 'b',
+    'uint8': 'B',
+    'int16': 'h',
+    'uint16': 'H',
+    'int32': 'i',
+    'uint32': 'I',
+    'int64': 'q',
+    'uint64': 'Q',
+    'string': 's'
+}
+
+# Tamanho padrão de cada tipo (strings precisam declarar 'length')
+FIELD_SIZES = {
+    'int8': 1,
+    'uint8': 1,
+    'int16': 2,
+    'uint16': 2,
+    'int32': 4,
+    'uint32': 4,
+    'int64': 8,
+    'uint64': 8,
+    'string': 24
+}
+
+# Perfil embutido, usado quando o arquivo de perfis não existe ou é inválido
+DEFAULT_PROFILE_NAME = 'default'
+DEFAULT_PROFILE = {
+    'description': 'Cliente padrão (offsets originais)',
+    'module': 'Ragexe.exe',
+    'fields': [
+        {'name': 'xpBase', 'offset': 0x106B6D0, 'type': 'int32'},
+        {'name': 'xpJob', 'offset': 0x106B6E8, 'type': 'int32'},
+        {'name': 'hp', 'offset': 0x106F28C, 'type': 'int32'},
+        {'name': 'sp', 'offset': 0x106F294, 'type': 'int32'},
+        {'name': 'nvBase', 'offset': 0x106B6F0, 'type': 'uint8'},
+        {'name': 'nvJob', 'offset': 0x106B6F8, 'type': 'uint8'},
+        {'name': 'hpMax', 'offset': 0x106F290, 'type': 'int32'},
+        {'name': 'spMax', 'offset': 0x106F298, 'type': 'int32'},
+        {'name': 'nome', 'offset': 0x1071CD8, 'type': 'string', 'length': 24}
+    ]
+}
+
+def parse_profile_fields(profile):
+    """
+    Converte a descrição declarativa de um perfil em tuplas
+    (nome, offset, tipo, tamanho, módulo), validando tipos e offsets.
+    Offsets podem ser int ou string hexadecimal ("0x106B6D0").
+    """
+    default_module = profile.get('module', 'Ragexe.exe')
+    fields = []
+    for entry in profile['fields']:
+        field_type = entry.get('type', 'int32')
+        if field_type not in FIELD_FORMATS:
+            raise ValueError(f"Tipo inválido para o campo {entry.get('name')}: {field_type}")
+        offset = entry['offset']
+        if isinstance(offset, str):
+            offset = int(offset, 0)
+        length = int(entry.get('length', FIELD_SIZES[field_type]))
+        fields.append((entry['name'], offset, field_type, length, entry.get('module', default_module)))
+    return fields
+
+# Valores padrão e posições fixas do GameSnapshot montado pelo ReadPlan
+SNAPSHOT_DEFAULTS = tuple(GameSnapshot())
+BASE_ADDRESS_INDEX = SNAPSHOT_INDEX['baseAddress']
+EXTRA_INDEX = SNAPSHOT_INDEX['extra']
+
+class ReadRegion:
+    """Região contígua de memória lida com uma única chamada e decodificada com struct pré-compilado"""
+
+    def __init__(self, fields):
+        fields = sorted(fields, key=lambda field: field[1])
+        self.module = fields[0][4]
+        self.offset = fields[0][1]
+        self.size = max(field[1] + field[3] for field in fields) - self.offset
+
+        # Monta o formato com padding ('x') entre os campos
+        fmt = '<'
+        cursor = self.offset
+        for _, offset, field_type, length, _ in fields:
+            if offset < cursor:
+                raise ValueError(f"Campos sobrepostos no offset {hex(offset)}")
+            if offset > cursor:
+                fmt += f"{offset - cursor}x"
+            code = FIELD_FORMATS[field_type]
+            fmt += f"{length}s" if code == 's' else code
+            cursor = offset + length
+
+        self.struct = struct.Struct(fmt)
+        self.names = tuple(field[0] for field in fields)
+        # Posição de cada campo no GameSnapshot (None = campo extra do perfil)
+        self.targets = tuple(
+            SNAPSHOT_INDEX[name] if name in SNAPSHOT_INDEX and name not in ('baseAddress', 'extra') else None
+            for name in self.names
+        )
+        self.has_extra = None in self.targets
+        self.string_indexes = tuple(i for i, field in enumerate(fields) if field[2] == 'string')
+        # Valores usados quando a leitura falha (mesmo comportamento dos read_*)
+        self.defaults = tuple('' if field[2] == 'string' else 0 for field in fields)
+
+    def decode(self, buffer):
+        """Decodifica os campos da região a partir do buffer"""
+        values = self.struct.unpack_from(buffer)
+        if self.string_indexes:
+            values = list(values)
+            for i in self.string_indexes:
+                values[i] = values[i].split(b'\x00', 1)[0].decode('utf-8', errors='ignore')
+        return values
+
+class ReadPlan:
+    """
+    Plano de leitura compilado: agrupa os campos em regiões contíguas
+    para que cada região custe uma única leitura (ReadProcessMemory/process_vm_readv).
+    """
+
+    def __init__(self, fields, max_gap=64, module='Ragexe.exe'):
+        self.fields = list(fields)
+        # Módulo principal (usado para 'baseAddress')
+        self.module = module
+        self.modules = sorted({field[4] for field in self.fields} | {module})
+        self.regions = []
+
+        # Agrupa campos do mesmo módulo próximos (distância <= max_gap) na mesma região
+        group = []
+        group_end = 0
+        for field in sorted(self.fields, key=lambda field: (field[4], field[1])):
+            offset, length = field[1], field[3]
+            if group and (field[4] != group[0][4] or offset - group_end > max_gap):
+                self.regions.append(ReadRegion(group))
+                group = []
+            if not group:
+                group_end = offset + length
+            group.append(field)
+            group_end = max(group_end, offset + length)
+        if group:
+            self.regions.append(ReadRegion(group))
+
+    @classmethod
+    def from_profile(cls, profile):
+        """Compila um perfil declarativo em um plano de leitura"""
+        return cls(parse_profile_fields(profile), module=profile.get('module', 'Ragexe.exe'))
+
+    def new_buffers(self):
+        """Cria os buffers reutilizáveis de uma sessão (um por região)"""
+        return [create_string_buffer(region.size) for region in self.regions]
+
+    def read(self, memory, handle, module_bases, buffers):
+        """Lê todas as regiões e monta o GameSnapshot direto dos valores decodificados"""
+        values = list(SNAPSHOT_DEFAULTS)
+        extra = None
+        read_into = memory.read_into
+        for region, buffer in zip(self.regions, buffers):
+            if read_into(handle, module_bases[region.module] + region.offset, buffer, region.size):
+                decoded = region.decode(buffer)
+            else:
+                decoded = region.defaults
+            if region.has_extra:
+                for target, name, value in zip(region.targets, region.names, decoded):
+                    if target is None:
+                        if extra is None:
+                            extra = {}
+                        extra[name] = value
+                    else:
+                        values[target] = value
+            else:
+                for target, value in zip(region.targets, decoded):
+                    values[target] = value
+        values[BASE_ADDRESS_INDEX] = module_bases.get(self.module, 0)
+        values[EXTRA_INDEX] = extra
+        return GameSnapshot._make(values)
+
+class OffsetProfiles:
+    """
+    Perfis de offsets versionados carregados de um arquivo JSON.
+    Cada perfil é compilado uma única vez em um ReadPlan; o arquivo é
+    recarregado automaticamente quando muda (verificação de mtime limitada
+    a uma vez por check_interval segundos).
+
+    Formato:
+    {
+      "version": 1,
+      "active": "default",
+      "profiles": {
+        "default": {
+          "description": "...",
+          "module": "Ragexe.exe",
+          "fields": [{"name": "xpBase", "offset": "0x106B6D0", "type": "int32"}, ...]
+        }
+      }
     }
+    """
+
+    def __init__(self, filename='offsets.json', check_interval=2.0):
+        self.filename = filename
+        self.check_interval = check_interval
+        self.version = 0
+        self.active = DEFAULT_PROFILE_NAME
+        self.profiles = {DEFAULT_PROFILE_NAME: DEFAULT_PROFILE}
+        # Perfis registrados em tempo de execução (sobrevivem aos recarregamentos do arquivo)
+        self.registered = {}
+        self._plans = {}
+        self._mtime = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Carrega (ou recarrega) os perfis do arquivo"""
+        profiles = {DEFAULT_PROFILE_NAME: DEFAULT_PROFILE}
+        active = DEFAULT_PROFILE_NAME
+        version = 0
+        mtime = None
+
+        if os.path.exists(self.filename):
+            try:
+                mtime = os.path.getmtime(self.filename)
+                with open(self.filename, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                version = data.get('version', 0)
+                profiles.update(data.get('profiles', {}))
+                profiles.update(self.registered)
+                active = data.get('active', active)
+                # Valida todos os perfis antes de trocar os planos em uso
+                plans = {name: ReadPlan.from_profile(profile) for name, profile in profiles.items()}
+            except Exception as e:
+                print(f"Erro ao carregar perfis de offsets: {e}", file=sys.stderr)
+                # Mantém os últimos perfis válidos e registra o mtime da versão com erro,
+                # para não reprocessar (nem repetir o erro) até o arquivo mudar de novo
+                with self._lock:
+                    self._mtime = mtime
+                    if not self._plans:
+                        self._plans = {
+                            name: ReadPlan.from_profile(profile)
+                            for name, profile in {DEFAULT_PROFILE_NAME: DEFAULT_PROFILE, **self.registered}.items()
+                        }
+                return False
+        else:
+            profiles.update(self.registered)
+            plans = {name: ReadPlan.from_profile(profile) for name, profile in profiles.items()}
+
+        with self._lock:
+            self.profiles = profiles
+            self.active = active if active in profiles else DEFAULT_PROFILE_NAME
+            self.version = version
+            self._plans = plans
+            self._mtime = mtime
+        return True
+
+    def check_reload(self):
+        """Recarrega o arquivo se ele foi modificado desde a última leitura"""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
 
-    CloseHandle(handle)
+        try:
+            mtime = os.path.getmtime(self.filename)
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return False
+        return self.load()
+
+    def register(self, name, profile):
+        """Registra um perfil em tempo de execução (ex.: simulador); valida antes de usar"""
+        plan = ReadPlan.from_profile(profile)
+        with self._lock:
+            self.registered[name] = profile
+            self.profiles = {**self.profiles, name: profile}
+            self._plans = {**self._plans, name: plan}
+
+    def get_profile(self, name=None):
+        """Retorna (nome, descrição) do perfil (ou do perfil ativo)"""
+        name = name if name in self.profiles else self.active
+        return name, self.profiles[name]
+
+    def get_plan(self, name=None):
+        """Retorna o plano compilado do perfil (ou do perfil ativo)"""
+        self.check_reload()
+        plans = self._plans
+        plan = plans.get(name or self.active)
+        if plan is None:
+            plan = plans.get(self.active) or plans[DEFAULT_PROFILE_NAME]
+        return plan
+
+# Perfis compartilhados por todas as sessões
+offset_profiles = OffsetProfiles()
+
+class ProcessSession:
+    """
+    Sessão persistente com um processo do jogo.
+    Mantém o handle aberto e o endereço base do módulo em cache entre leituras,
+    evitando abrir o processo e refazer o snapshot de módulos a cada tick.
+    """
+
+    def __init__(self, pid, profile=None, profiles=None, memory=None):
+        self.pid = pid
+        self.backend = memory or backend
+        # Nome do perfil de offsets (None = perfil ativo do arquivo)
+        self.profile = profile
+        self.profiles = profiles or offset_profiles
+        self.handle = None
+        self.module_bases = {}
+        self.plan = None
+        self.buffers = []
+        # Uma leitura por vez: os buffers são reutilizados e o handle é compartilhado
+        self._lock = threading.Lock()
+        # Descartada por close_session: não reabre o processo (o handle ficaria órfão)
+        self.discarded = False
+
+    @property
+    def base_address(self):
+        """Endereço base do módulo principal"""
+        if self.plan is None:
+            return 0
+        return self.module_bases.get(self.plan.module, 0)
+
+    def _resolve_modules(self, plan):
+        """Resolve o endereço base de todos os módulos usados pelo plano"""
+        module_bases = {}
+        for module in plan.modules:
+            base_address = self.backend.get_module_base(self.pid, module)
+            if not base_address:
+                return None
+            module_bases[module] = base_address
+        return module_bases
+
+    def _open(self):
+        """Abre o processo e resolve o endereço base dos módulos"""
+        self._close_handle()
+
+        handle = self.backend.open(self.pid)
+        if not handle:
+            return 'Failed to open process'
+
+        plan = self.profiles.get_plan(self.profile)
+        module_bases = self._resolve_modules(plan)
+        if not module_bases:
+            self.backend.close(handle)
+            return 'Failed to get base address'
+
+        self.handle = handle
+        self.module_bases = module_bases
+        self._set_plan(plan)
+        return None
+
+    def _set_plan(self, plan):
+        """Troca o plano de leitura, realocando os buffers"""
+        self.plan = plan
+        # Buffers pré-alocados, reutilizados a cada leitura
+        self.buffers = plan.new_buffers()
+
+    def is_alive(self):
+        """Verifica (de forma barata) se o processo do handle ainda está rodando e não foi reiniciado"""
+        if not self.handle:
+            return False
+        return self.backend.is_alive(self.handle)
+
+    def ensure_open(self):
+        """
+        Garante que a sessão está válida.
+        Só reabre o processo e refaz o snapshot de módulos se o processo morreu
+        ou foi reiniciado.
+        Retorna None em caso de sucesso ou a mensagem de erro.
+        """
+        if not self.is_alive():
+            return self._open()
+
+        # Perfil recarregado/alterado: troca o plano sem reabrir o processo
+        plan = self.profiles.get_plan(self.profile)
+        if plan is not self.plan:
+            missing = [module for module in plan.modules if module not in self.module_bases]
+            if missing:
+                module_bases = self._resolve_modules(plan)
+                if not module_bases:
+                    return 'Failed to get base address'
+                self.module_bases = module_bases
+            self._set_plan(plan)
+        return None
+
+    def read_game_data(self):
+        """Lê os dados do jogo usando o handle em cache. Retorna GameSnapshot ou ReadError"""
+        with self._lock:
+            if self.discarded:
+                return ReadError('Session closed')
+            error = self.ensure_open()
+            if error:
+                return ReadError(error)
+
+            return self.plan.read(self.backend, self.handle, self.module_bases, self.buffers)
+
+    def _close_handle(self):
+        if self.handle:
+            self.backend.close(self.handle)
+        self.handle = None
+        self.module_bases = {}
+
+    def close(self, discard=False):
+        """Fecha o handle do processo (espera a leitura em andamento terminar)"""
+        with self._lock:
+            self._close_handle()
+            if discard:
+                self.discarded = True
+
+# Sessões abertas por PID (reutilizadas entre chamadas de read_game_data).
+# Compartilhadas pelas threads do MultiSampler, do BackgroundSampler e da interface.
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def get_session(pid, profile=None):
+    """Retorna a sessão persistente do PID, criando se necessário"""
+    with _sessions_lock:
+        session = _sessions.get(pid)
+        if session is None:
+            session = ProcessSession(pid, profile)
+            _sessions[pid] = session
+        elif profile is not None:
+            session.profile = profile
+    return session
+
+def has_session(pid):
+    """Indica se o PID tem uma sessão aberta"""
+    with _sessions_lock:
+        return pid in _sessions
+
+def close_session(pid):
+    """Fecha e descarta a sessão de um PID"""
+    with _sessions_lock:
+        session = _sessions.pop(pid, None)
+    if session is not None:
+        session.close(discard=True)
+
+def close_all_sessions():
+    """Fecha todas as sessões abertas"""
+    with _sessions_lock:
+        pids = list(_sessions)
+    for pid in pids:
+        close_session(pid)
+
+def read_game_data(pid, profile=None):
+    """
+    Lê os dados do jogo (profile = nome do perfil de offsets, None = perfil ativo).
+    Retorna GameSnapshot ou ReadError (use .to_dict() para JSON).
+    """
+    session = get_session(pid, profile)
+    data = session.read_game_data()
+    if data.error:
+        # Não mantém sessões de processos inválidos (se outra thread já não trocou a sessão)
+        with _sessions_lock:
+            if _sessions.get(pid) is session:
+                del _sessions[pid]
+            else:
+                session = None
+        if session is not None:
+            session.close(discard=True)
     return data
 
+def parse_stream_args(args):
+    """
+    Interpreta os argumentos do comando stream:
+    --pid <pid>[,<pid>...] (pode repetir), --hz <n>, --profile <nome>, --record <arquivo>
+    """
+    options = {'pids': [], 'hz': 1.0, 'profile': None, 'record': None}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in ('--pid', '--hz', '--profile', '--record') and i + 1 >= len(args):
+            raise ValueError(f"Missing value for {arg}")
+        if arg == '--pid':
+            options['pids'].extend(int(pid) for pid in args[i + 1].split(',') if pid)
+            i += 2
+        elif arg == '--hz':
+            options['hz'] = float(args[i + 1])
+            i += 2
+        elif arg == '--profile':
+            options['profile'] = args[i + 1]
+            i += 2
+        elif arg == '--record':
+            options['record'] = args[i + 1]
+            i += 2
+        else:
+            raise ValueError(f"Unknown option {arg}")
+    if options['hz'] <= 0:
+        raise ValueError('Invalid rate')
+    return options
+
+def _read_commands(command_queue):
+    """Lê comandos de controle do stdin (thread auxiliar)"""
+    for line in sys.stdin:
+        line = line.strip()
+        if line:
+            command_queue.put(line)
+
+def _apply_command(line, pids, options):
+    """
+    Aplica um comando de controle: add <pid>, remove <pid>, hz <n>, quit.
+    Retorna o evento (dict) a ser emitido.
+    """
+    parts = line.split()
+    command = parts[0].lower()
+    try:
+        if command == 'add' and len(parts) == 2:
+            pid = int(parts[1])
+            if pid not in pids:
+                pids.append(pid)
+            return {'event': 'added', 'pid': pid}
+        if command == 'remove' and len(parts) == 2:
+            pid = int(parts[1])
+            if pid in pids:
+                pids.remove(pid)
+                close_session(pid)
+            return {'event': 'removed', 'pid': pid}
+        if command == 'hz' and len(parts) == 2:
+            hz = float(parts[1])
+            if hz <= 0:
+                raise ValueError
+            options['hz'] = hz
+            return {'event': 'rate', 'hz': hz}
+        if command == 'quit':
+            options['running'] = False
+            return {'event': 'quit'}
+    except ValueError:
+        pass
+    return {'event': 'error', 'error': f'Invalid command: {line}'}
+
+def open_recorder(filename, profile=None):
+    """Cria um SessionRecorder com o perfil de offsets em uso no cabeçalho"""
+    from session_recorder import SessionRecorder
+    name, profile_data = offset_profiles.get_profile(profile)
+    return SessionRecorder(filename, profile=name, profile_data=profile_data)
+
+def stream(pids, hz=1.0, profile=None, record=None):
+    """
+    Modo contínuo: mantém as sessões abertas e escreve uma linha JSON (NDJSON)
+    por PID a cada amostra, com timestamp monotônico ('t', em segundos).
+    Aceita comandos de controle no stdin (um por linha).
+    record: arquivo opcional onde as amostras brutas são gravadas (session_recorder)
+    """
+    import queue
+
+    pids = list(dict.fromkeys(pids))
+    options = {'hz': hz, 'running': True}
+    command_queue = queue.Queue()
+    threading.Thread(target=_read_commands, args=(command_queue,), daemon=True).start()
+
+    recorder = open_recorder(record, profile) if record else None
+    out = sys.stdout
+    next_tick = time.monotonic()
+    try:
+        while options['running']:
+            # Comandos pendentes
+            while not command_queue.empty():
+                event = _apply_command(command_queue.get_nowait(), pids, options)
+                event['t'] = time.monotonic()
+                out.write(json.dumps(event) + '\n')
+            if not options['running']:
+                break
+
+            for pid in pids:
+                data = read_game_data(pid, profile)
+                t = time.monotonic()
+                if recorder is not None:
+                    recorder.record(pid, data, t)
+                line = {'t': t, 'pid': pid}
+                line.update(data.to_dict())
+                out.write(json.dumps(line) + '\n')
+            out.flush()
+
+            # Relógio de taxa fixa: agenda pelo deadline, não pelo fim do trabalho
+            period = 1.0 / options['hz']
+            next_tick += period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -period:
+                # Atrasou mais de um período: descarta os ticks perdidos
+                next_tick = time.monotonic()
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    finally:
+        if recorder is not None:
+            recorder.close()
+        close_all_sessions()
+
 def main():
     if len(sys.argv) < 2:
         print(json.dumps({'error': 'Missing command'}))
@@ -190,11 +659,20 @@ def main():
 
         try:
             pid = int(sys.argv[2])
-            data = read_game_data(pid)
-            print(json.dumps(data))
+            profile = sys.argv[3] if len(sys.argv) > 3 else None
+            data = read_game_data(pid, profile)
+            print(json.dumps(data.to_dict()))
         except ValueError:
             print(json.dumps({'error': 'Invalid PID'}))
 
+    elif command == 'stream':
+        try:
+            options = parse_stream_args(sys.argv[2:])
+        except ValueError as e:
+            print(json.dumps({'error': str(e)}))
+            return
+        stream(options['pids'], options['hz'], options['profile'], options['record'])
+
     else:
         print(json.dumps({'error': 'Unknown command'}))
 
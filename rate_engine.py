@@ -0,0 +1,150 @@
+"""
+Taxas em janelas deslizantes (XP/h, kills/h, dano/min) com atualização e consulta O(1).
+
+Cada janela (ex.: 1, 5, 15 e 60 minutos) é um ring buffer de `buckets` fatias de
+tempo com a soma de cada canal; ao avançar o relógio, as fatias que saíram da
+janela são zeradas e descontadas do total corrente. Além das janelas, cada canal
+mantém uma média exponencial (EWMA) da taxa, usada para o ETA de level up.
+"""
+
+import math
+from array import array
+from typing import Dict, Iterable, Optional
+
+CHANNELS = ('baseXP', 'jobXP', 'kills', 'damage')
+DEFAULT_WINDOWS = (60, 300, 900, 3600)
+
+def window_label(seconds: int) -> str:
+    """Rótulo da janela: 60 -> '1m', 90 -> '90s'"""
+    return f"{seconds // 60}m" if seconds % 60 == 0 else f"{seconds}s"
+
+class RollingWindow:
+    """Somas por canal dos últimos `seconds` segundos, em `buckets` fatias (ring buffer)"""
+
+    def __init__(self, seconds: float, channels: int = len(CHANNELS), buckets: int = 60):
+        self.seconds = seconds
+        self.buckets = buckets
+        self.bucket_width = seconds / buckets
+        self.rings = [array('d', bytes(8 * buckets)) for _ in range(channels)]
+        self.totals = [0.0] * channels
+        self.current = None  # índice absoluto da fatia atual
+
+    def advance(self, t: float):
+        """Move a janela até t, zerando as fatias que saíram (amortizado O(1))"""
+        index = int(t // self.bucket_width)
+        if self.current is None:
+            self.current = index
+            return
+        if index <= self.current:
+            # Relógio parado (ou evento um pouco atrasado): fica na fatia atual
+            return
+        steps = min(index - self.current, self.buckets)
+        for step in range(1, steps + 1):
+            slot = (self.current + step) % self.buckets
+            for channel, ring in enumerate(self.rings):
+                if ring[slot]:
+                    self.totals[channel] -= ring[slot]
+                    ring[slot] = 0.0
+        self.current = index
+
+    def add(self, t: float, values: Iterable[float]):
+        """Soma os valores (um por canal) na fatia de t"""
+        self.advance(t)
+        slot = self.current % self.buckets
+        for channel, value in enumerate(values):
+            if value:
+                self.rings[channel][slot] += value
+                self.totals[channel] += value
+
+    def span(self, t: float) -> float:
+        """Duração coberta pela janela em t: fatias completas + parte da fatia atual"""
+        if self.current is None:
+            return 0.0
+        partial = t - self.current * self.bucket_width
+        return (self.buckets - 1) * self.bucket_width + min(max(partial, 0.0), self.bucket_width)
+
+class RateEngine:
+    """Taxas em janelas deslizantes e EWMA para os canais baseXP, jobXP, kills e damage"""
+
+    def __init__(self, windows=DEFAULT_WINDOWS, buckets: int = 60, half_life: float = 300.0):
+        self.window_seconds = tuple(windows)
+        self.buckets = buckets
+        self.tau = half_life / math.log(2)
+        self.reset()
+
+    def reset(self, t: Optional[float] = None):
+        """Zera todas as janelas; t é o início da sessão"""
+        self.windows = [RollingWindow(seconds, len(CHANNELS), self.buckets) for seconds in self.window_seconds]
+        self.ewma = [0.0] * len(CHANNELS)
+        self.ewma_time = t
+        self.start_time = t
+
+    def _decay_to(self, t: float):
+        """Aplica o decaimento exponencial até t"""
+        if self.ewma_time is None:
+            self.ewma_time = t
+            return
+        dt = t - self.ewma_time
+        if dt > 0:
+            factor = math.exp(-dt / self.tau)
+            self.ewma = [value * factor for value in self.ewma]
+            self.ewma_time = t
+
+    def add(self, t: float, base_xp: float = 0, job_xp: float = 0, kills: float = 0, damage: float = 0):
+        """Registra um evento em t"""
+        if self.start_time is None:
+            self.start_time = t
+        values = (base_xp, job_xp, kills, damage)
+        for window in self.windows:
+            window.add(t, values)
+        self._decay_to(t)
+        self.ewma = [total + value for total, value in zip(self.ewma, values)]
+
+    def rate(self, t: float, channel: str, seconds: float, per: float = 3600.0) -> float:
+        """Taxa do canal na janela de `seconds` segundos, por `per` segundos"""
+        window = next(w for w in self.windows if w.seconds == seconds)
+        window.advance(t)
+        span = window.span(t)
+        if self.start_time is not None:
+            # No começo da sessão a janela ainda não está cheia
+            span = min(span, t - self.start_time)
+        if span <= 0:
+            return 0.0
+        return window.totals[CHANNELS.index(channel)] / span * per
+
+    def ewma_rate(self, t: float, channel: str, per: float = 3600.0) -> float:
+        """Taxa exponencialmente ponderada do canal (eventos recentes pesam mais)"""
+        if self.start_time is None or self.ewma_time is None:
+            return 0.0
+        elapsed = t - self.start_time
+        if elapsed <= 0:
+            return 0.0
+        decayed = self.ewma[CHANNELS.index(channel)] * math.exp(-max(0.0, t - self.ewma_time) / self.tau)
+        # Corrige o viés do início da sessão (menos de um tau de histórico)
+        weight = self.tau * (1 - math.exp(-elapsed / self.tau))
+        return decayed / weight * per
+
+    def eta(self, t: float, remaining: Optional[int], channel: str = 'baseXP') -> Optional[float]:
+        """Segundos estimados até acumular `remaining` no ritmo EWMA do canal (None se desconhecido)"""
+        if not remaining or remaining <= 0:
+            return None
+        rate = self.ewma_rate(t, channel, per=1.0)
+        if rate <= 0:
+            return None
+        return remaining / rate
+
+    def get_rates(self, t: float) -> Dict[str, Dict]:
+        """
+        Taxas de todas as janelas: {
+            '5m': {'baseXPPerHour', 'jobXPPerHour', 'killsPerHour', 'damagePerMinute'}, ...
+        }
+        """
+        rates = {}
+        for window in self.windows:
+            rates[window_label(window.seconds)] = {
+                'baseXPPerHour': int(self.rate(t, 'baseXP', window.seconds)),
+                'jobXPPerHour': int(self.rate(t, 'jobXP', window.seconds)),
+                'killsPerHour': int(self.rate(t, 'kills', window.seconds)),
+                'damagePerMinute': int(self.rate(t, 'damage', window.seconds, per=60.0))
+            }
+        return rates
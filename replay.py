@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Replay de sessões gravadas (session_recorder) pelo StatsCalculator, mais rápido que o tempo real.
+
+O StatsCalculator recebe um ReplayClock que devolve o tempo da amostra gravada,
+então detecção de kills, taxas, ETA e tabela de XP se comportam como na sessão
+original, sem esperar o relógio. A tabela de XP usada é uma cópia temporária
+(o xp_table.json real não é alterado).
+
+Uso:
+    python replay.py <arquivo.rolrec> [--pid N] [--stats-every N] [--speed X] [--xp-table arquivo] [--json]
+    --stats-every: chama get_stats a cada N amostras (1 = como a interface; 0 = só no fim)
+    --speed: fator de tempo real (ex.: 60 = um minuto gravado por segundo); padrão: o mais rápido possível
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+from typing import Dict, Iterable, Optional
+from stats_calculator import StatsCalculator
+from xp_table_manager import XPTableManager
+
+class ReplayClock:
+    """Relógio controlado pelo replay (chamável, como time.time)"""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def replay(samples: Iterable[tuple], pid: Optional[int] = None, stats_every: int = 1, speed: Optional[float] = None,
+           xp_table_file: str = 'xp_table.json', time_origin: float = 0.0) -> Dict:
+    """
+    Passa as amostras (t, pid, GameSnapshot/ReadError) por um StatsCalculator por PID.
+    Retorna o relatório: amostras, erros, tempo gasto, amostras/s, aceleração e stats finais por PID.
+    """
+    workdir = tempfile.mkdtemp(prefix='rolens_replay_')
+    table_copy = os.path.join(workdir, 'xp_table.json')
+    if os.path.exists(xp_table_file):
+        shutil.copyfile(xp_table_file, table_copy)
+
+    clock = ReplayClock(time_origin)
+    xp_table = XPTableManager(table_copy, auto_download=False)
+    calculators: Dict[int, StatsCalculator] = {}
+    count = 0
+    errors = 0
+    first_t = None
+    last_t = None
+
+    started = time.perf_counter()
+    try:
+        for t, sample_pid, sample in samples:
+            if pid is not None and sample_pid != pid:
+                continue
+            if first_t is None:
+                first_t = t
+            last_t = t
+            clock.now = time_origin + t
+            count += 1
+
+            if speed:
+                # Replay em ritmo controlado: espera o tempo gravado / speed
+                delay = (t - first_t) / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+
+            if sample.error:
+                errors += 1
+                continue
+
+            calculator = calculators.get(sample_pid)
+            if calculator is None:
+                calculator = calculators[sample_pid] = StatsCalculator(clock=clock, xp_table=xp_table)
+            calculator.update(sample)
+            if stats_every and count % stats_every == 0:
+                calculator.get_stats()
+
+        elapsed = time.perf_counter() - started
+        final = {}
+        for sample_pid, calculator in calculators.items():
+            stats = dict(calculator.get_stats())
+            stats['currentData'] = stats['currentData'].to_dict()
+            final[sample_pid] = stats
+    finally:
+        xp_table.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    duration = (last_t - first_t) if first_t is not None else 0.0
+    return {
+        'samples': count,
+        'errors': errors,
+        'pids': sorted(calculators),
+        'elapsed': elapsed,
+        'samplesPerSecond': count / elapsed if elapsed > 0 else 0.0,
+        'sessionDuration': duration,
+        'speedup': duration / elapsed if elapsed > 0 else 0.0,
+        'final': final
+    }
+
+def parse_replay_args(args):
+    """
+    Interpreta os argumentos: <arquivo.rolrec>, --pid, --stats-every, --speed,
+    --xp-table (com valor) e --json
+    """
+    options = {'filename': None, 'pid': None, 'stats_every': 1, 'speed': None, 'xp_table': 'xp_table.json', 'json': False}
+    converters = {'--pid': int, '--stats-every': int, '--speed': float, '--xp-table': str}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '--json':
+            options['json'] = True
+            i += 1
+        elif arg in converters:
+            if i + 1 >= len(args):
+                raise ValueError(f"Missing value for {arg}")
+            options[arg[2:].replace('-', '_')] = converters[arg](args[i + 1])
+            i += 2
+        elif arg.startswith('--') or options['filename'] is not None:
+            raise ValueError(f"Unknown option {arg}")
+        else:
+            options['filename'] = arg
+            i += 1
+    if options['filename'] is None:
+        raise ValueError('Missing recording file')
+    if options['stats_every'] < 0 or (options['speed'] is not None and options['speed'] <= 0):
+        raise ValueError('Invalid --stats-every/--speed')
+    return options
+
+def main():
+    try:
+        options = parse_replay_args(sys.argv[1:])
+    except ValueError as e:
+        print(f"Erro: {e}")
+        print("Uso: python replay.py <arquivo.rolrec> [--pid N] [--stats-every N] [--speed X] [--xp-table arquivo] [--json]")
+        sys.exit(2)
+
+    from session_recorder import SessionReader
+
+    filename = options['filename']
+    as_json = options['json']
+
+    reader = SessionReader(filename)
+    report = replay(
+        reader,
+        pid=options['pid'],
+        stats_every=options['stats_every'],
+        speed=options['speed'],
+        xp_table_file=options['xp_table'],
+        time_origin=reader.header.get('created', 0.0)
+    )
+
+    if as_json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+
+    print(f"Amostras: {report['samples']:,} ({report['errors']} erros) em {report['elapsed']:.2f}s")
+    print(f"Throughput: {report['samplesPerSecond']:,.0f} amostras/s "
+          f"({report['speedup']:,.0f}x o tempo real)")
+    for sample_pid, stats in report['final'].items():
+        print(f"PID {sample_pid}: {stats['monstersKilled']} kills, "
+              f"{stats['totalBaseXPGained']:,} XP base, {stats['totalDamageTaken']:,} de dano, "
+              f"sessão {stats['sessionTimeFormatted']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""
+Amostragem dos clientes do jogo fora da thread da interface.
+- MultiSampler: lê todos os PIDs monitorados a cada tick em um pool pequeno
+  de threads, com timeout por PID para que um cliente travado não atrase os demais.
+- BackgroundSampler: produtor em taxa fixa que entrega amostras por uma fila limitada.
+"""
+
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+import memory_reader
+from game_snapshot import ReadError
+
+class MultiSampler:
+    """Lê todos os processos monitorados em uma única passada agendada"""
+
+    def __init__(self, pids=None, max_workers: int = 4, timeout: float = 0.5, profile: Optional[str] = None):
+        self.timeout = timeout
+        self.profile = profile
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='rolens-sampler')
+        self.pids: List[int] = []
+        # Leituras ainda em andamento (PID travado não recebe nova leitura)
+        self._pending = {}
+        # Latência por PID: {'last', 'avg', 'max', 'count', 'timeouts'}
+        self.latency: Dict[int, Dict] = {}
+        self._lock = threading.Lock()
+        for pid in pids or []:
+            self.track(pid)
+
+    def track(self, pid: int):
+        """Passa a monitorar um PID"""
+        with self._lock:
+            if pid not in self.pids:
+                self.pids.append(pid)
+                self.latency[pid] = {'last': 0.0, 'avg': 0.0, 'max': 0.0, 'count': 0, 'timeouts': 0}
+
+    def untrack(self, pid: int):
+        """Deixa de monitorar um PID e fecha sua sessão"""
+        with self._lock:
+            if pid in self.pids:
+                self.pids.remove(pid)
+            self.latency.pop(pid, None)
+        self._close_session(pid)
+
+    def _close_session(self, pid: int):
+        """Fecha a sessão do PID; se houver leitura em andamento, só quando ela terminar"""
+        pending = self._pending.pop(pid, None)
+        if pending is not None and not pending.done():
+            pending.add_done_callback(lambda future: memory_reader.close_session(pid))
+        else:
+            memory_reader.close_session(pid)
+
+    def _read(self, pid: int) -> Dict:
+        """Lê um PID e mede a latência (executa no pool)"""
+        start = time.perf_counter()
+        data = memory_reader.read_game_data(pid, self.profile)
+        return {'pid': pid, 't': time.monotonic(), 'latency': time.perf_counter() - start, 'data': data}
+
+    def _record_latency(self, pid: int, latency: float, timed_out: bool = False):
+        with self._lock:
+            stats = self.latency.get(pid)
+            if stats is None:
+                return
+            if timed_out:
+                stats['timeouts'] += 1
+            stats['last'] = latency
+            stats['count'] += 1
+            # Média móvel exponencial
+            stats['avg'] = latency if stats['count'] == 1 else stats['avg'] * 0.9 + latency * 0.1
+            if latency > stats['max']:
+                stats['max'] = latency
+
+    def sample(self) -> Dict:
+        """
+        Lê todos os PIDs monitorados e retorna o lote:
+        {
+            't': início do tick (monotônico),
+            'duration': duração da passada,
+            'snapshots': [{'pid', 't', 'latency', 'data' (GameSnapshot)} ou {'pid', 't', 'latency', 'error'}]
+        }
+        """
+        tick_start = time.monotonic()
+        with self._lock:
+            pids = list(self.pids)
+
+        futures = {}
+        snapshots = []
+        for pid in pids:
+            pending = self._pending.get(pid)
+            if pending is not None and not pending.done():
+                # Leitura anterior ainda travada: não empilha outra
+                snapshots.append({
+                    'pid': pid,
+                    't': tick_start,
+                    'latency': tick_start - pending.started_at,
+                    'error': 'Read still pending'
+                })
+                continue
+            future = self.executor.submit(self._read, pid)
+            future.started_at = tick_start
+            self._pending[pid] = future
+            futures[future] = pid
+
+        done, not_done = wait(futures, timeout=self.timeout)
+
+        for future in done:
+            pid = futures[future]
+            self._pending.pop(pid, None)
+            try:
+                snapshot = future.result()
+            except Exception as e:
+                snapshot = {'pid': pid, 't': time.monotonic(), 'latency': time.monotonic() - tick_start, 'error': str(e)}
+            else:
+                if snapshot['data'].error:
+                    snapshot['error'] = snapshot.pop('data').error
+            self._record_latency(pid, snapshot['latency'])
+            snapshots.append(snapshot)
+
+        now = time.monotonic()
+        for future in not_done:
+            pid = futures[future]
+            self._record_latency(pid, now - tick_start, timed_out=True)
+            snapshots.append({'pid': pid, 't': now, 'latency': now - tick_start, 'error': 'Timeout'})
+
+        snapshots.sort(key=lambda snapshot: snapshot['pid'])
+        return {'t': tick_start, 'duration': time.monotonic() - tick_start, 'snapshots': snapshots}
+
+    def get_latency_stats(self) -> Dict[int, Dict]:
+        """Retorna as estatísticas de latência por PID"""
+        with self._lock:
+            return {pid: dict(stats) for pid, stats in self.latency.items()}
+
+    def close(self):
+        """Encerra o pool e fecha as sessões (as que ainda estão sendo lidas, ao fim da leitura)"""
+        self.executor.shutdown(wait=False)
+        with self._lock:
+            pids = list(self.pids)
+            self.pids = []
+        for pid in pids:
+            self._close_session(pid)
+
+def sample_once(pids, max_workers: int = 4, timeout: float = 1.0) -> Dict[int, Dict]:
+    """Lê uma única vez vários PIDs em paralelo. Retorna {pid: GameSnapshot ou ReadError}"""
+    pids = list(pids)
+    # Sessões que já existiam pertencem a outro leitor; as criadas aqui são fechadas no fim
+    opened = [pid for pid in pids if not memory_reader.has_session(pid)]
+    sampler = MultiSampler(pids, max_workers=max_workers, timeout=timeout)
+    try:
+        batch = sampler.sample()
+    finally:
+        sampler.executor.shutdown(wait=False)
+        for pid in opened:
+            # Leitura travada: a sessão é fechada quando ela terminar
+            sampler._close_session(pid)
+    return {
+        snapshot['pid']: snapshot['data'] if 'data' in snapshot else ReadError(snapshot['error'])
+        for snapshot in batch['snapshots']
+    }
+
+class BackgroundSampler:
+    """
+    Produtor em thread própria: amostra em taxa fixa (relógio compensado,
+    agendado por deadline) e entrega os resultados por uma fila limitada.
+    O consumidor (ex.: a interface) esvazia a fila no seu próprio ritmo.
+    """
+
+    def __init__(self, read, hz: float = 5.0, maxsize: int = 8, process=None, on_error=None):
+        self.read = read
+        # Processamento opcional no produtor (retornar None descarta a amostra)
+        self.process = process
+        # Erros da leitura/processamento (ex.: log_debug da interface); padrão: print
+        self.on_error = on_error
+        self.hz = hz
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.missed_ticks = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Inicia a thread de amostragem"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='rolens-background-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """Para a thread de amostragem"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def set_rate(self, hz: float):
+        """Altera a taxa de amostragem (vale a partir do próximo tick)"""
+        if hz > 0:
+            self.hz = hz
+
+    def _put(self, item):
+        """Enfileira descartando o item mais antigo se a fila estiver cheia"""
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                item = self.read()
+                if self.process is not None:
+                    item = self.process(item)
+                if item is not None:
+                    self._put(item)
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(e)
+                else:
+                    print(f"Erro na amostragem: {e}")
+
+            # Agenda pelo deadline para que a duração da leitura não acumule atraso
+            period = 1.0 / self.hz
+            next_tick += period
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                # Atrasou: conta os ticks perdidos e realinha o relógio
+                missed = int(-delay / period)
+                if missed:
+                    self.missed_ticks += missed
+                    next_tick += missed * period
+                delay = max(0.0, next_tick - time.monotonic())
+            self._stop.wait(delay)
+
+    def drain(self) -> List:
+        """Retorna (e remove) todos os itens disponíveis, do mais antigo ao mais novo"""
+        items = []
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                return items
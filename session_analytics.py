@@ -0,0 +1,167 @@
+"""
+Análises da sessão inteira com NumPy sobre o histórico em colunas (EventStore).
+
+Em vez de médias, gera distribuições: percentis de XP por kill, intervalo entre
+kills, histograma do dano recebido e segmentos de XP/h por nível. O NumPy é
+opcional (só este módulo o importa); sem ele, StatsCalculator.get_analytics()
+retorna None.
+
+SessionAnalytics.update() é incremental: a cada chamada converte apenas os
+eventos novos do EventStore e os acrescenta a buffers NumPy.
+"""
+
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from event_store import EventStore
+
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+class _GrowableArray:
+    """Buffer NumPy com crescimento geométrico (append amortizado O(1) por elemento)"""
+
+    def __init__(self, dtype, capacity: int = 1024):
+        self.data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values):
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            grown = np.empty(max(needed, 2 * len(self.data)), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = values
+        self.size = needed
+
+    def values(self):
+        return self.data[:self.size]
+
+def _column(column, i: int, j: int, dtype):
+    """Cópia NumPy das linhas [i, j) de uma coluna array (o array original continua podendo crescer)"""
+    return np.frombuffer(column[i:j], dtype=dtype)
+
+def _distribution(values, percentiles, bins: Optional[int] = None) -> Optional[Dict]:
+    """Resumo de uma amostra: count, mean, min, max, pXX e, opcionalmente, histograma"""
+    if len(values) == 0:
+        return None
+    points = np.percentile(values, percentiles)
+    result = {
+        'count': int(len(values)),
+        'mean': float(values.mean()),
+        'min': float(values.min()),
+        'max': float(values.max())
+    }
+    for p, value in zip(percentiles, points):
+        result[f'p{p}'] = float(value)
+    if bins:
+        counts, edges = np.histogram(values, bins=bins)
+        result['histogram'] = {'counts': counts.tolist(), 'edges': edges.tolist()}
+    return result
+
+class SessionAnalytics:
+    """Distribuições da sessão, atualizadas incrementalmente a partir de um EventStore"""
+
+    def __init__(self, events: EventStore, start_index: int = 0):
+        if np is None:
+            raise ImportError("NumPy não está instalado (necessário para as análises da sessão)")
+        self.events = events
+        self.reset(start_index)
+
+    def reset(self, start_index: int = 0):
+        self.start_index = start_index
+        self.position = start_index
+        self.kill_xp = _GrowableArray(np.int64)
+        self.kill_times = _GrowableArray(np.float64)
+        self.damage = _GrowableArray(np.int64)
+        # Segmentos contíguos por nível: [nível, início, fim, XP base, kills]
+        self.segments: List[list] = []
+
+    def update(self, end_index: Optional[int] = None) -> int:
+        """Processa os eventos novos (até end_index). Retorna quantos foram processados"""
+        events = self.events
+        if self.position > len(events):
+            # Histórico foi limpo (reset da sessão)
+            self.reset()
+        i = self.position
+        j = len(events) if end_index is None else min(end_index, len(events))
+        if j <= i:
+            return 0
+
+        t = _column(events.t, i, j, np.float64)
+        base_xp = _column(events.base_xp, i, j, np.int64)
+        hp = _column(events.hp, i, j, np.int64)
+        level = _column(events.level, i, j, np.int64)
+
+        kills = base_xp > 0
+        self.kill_xp.extend(base_xp[kills])
+        self.kill_times.extend(t[kills])
+        self.damage.extend(-hp[hp < 0])
+        self._update_segments(t, base_xp, kills, level)
+
+        self.position = j
+        return j - i
+
+    def _update_segments(self, t, base_xp, kills, level):
+        """Agrega XP e kills por trecho contíguo de mesmo nível (reduceat nos pontos de troca)"""
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(level)) + 1))
+        ends = np.concatenate((starts[1:], [len(level)]))
+        xp_sums = np.add.reduceat(base_xp, starts)
+        kill_counts = np.add.reduceat(kills.astype(np.int64), starts)
+
+        for start, end, xp, count in zip(starts.tolist(), ends.tolist(), xp_sums.tolist(), kill_counts.tolist()):
+            run_level = int(level[start])
+            last = self.segments[-1] if self.segments else None
+            if last is not None and last[0] == run_level:
+                last[2] = float(t[end - 1])
+                last[3] += xp
+                last[4] += count
+                continue
+            # O tempo do segmento começa no último evento do segmento anterior
+            begin = last[2] if last is not None else float(t[start])
+            self.segments.append([run_level, begin, float(t[end - 1]), xp, count])
+
+    def level_segments(self) -> List[Dict]:
+        """XP/h por trecho de nível: [{'level', 'start', 'end', 'duration', 'baseXP', 'kills', 'xpPerHour'}]"""
+        result = []
+        for level, start, end, xp, count in self.segments:
+            duration = end - start
+            result.append({
+                'level': level,
+                'start': start,
+                'end': end,
+                'duration': duration,
+                'baseXP': xp,
+                'kills': count,
+                'xpPerHour': int(xp / duration * 3600) if duration > 0 else None
+            })
+        return result
+
+    def summary(self, percentiles=DEFAULT_PERCENTILES, bins: int = 20, end_index: Optional[int] = None) -> Dict:
+        """
+        Distribuições da sessão (processa antes os eventos novos): {
+            'events', 'kills',
+            'xpPerKill': {count, mean, min, max, p10..p99, histogram} ou None,
+            'timeBetweenKills': idem (segundos),
+            'damageTaken': idem (dano por evento),
+            'levelSegments': [...]
+        }
+        """
+        self.update(end_index)
+        kill_xp = self.kill_xp.values()
+        return {
+            'events': self.position - self.start_index,
+            'kills': int(len(kill_xp)),
+            'xpPerKill': _distribution(kill_xp, percentiles, bins),
+            'timeBetweenKills': _distribution(np.diff(self.kill_times.values()), percentiles, bins),
+            'damageTaken': _distribution(self.damage.values(), percentiles, bins),
+            'levelSegments': self.level_segments()
+        }
+
+def analyze(events: EventStore, start: Optional[float] = None, end: Optional[float] = None, **options) -> Dict:
+    """Análise sob demanda de um intervalo de tempo do histórico"""
+    i, j = events.index_range(start, end)
+    return SessionAnalytics(events, start_index=i).summary(end_index=j, **options)
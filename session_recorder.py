@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Gravação binária compacta das amostras do leitor de memória.
+
+Formato do arquivo (.rolrec):
+    cabeçalho:  b'ROLSREC' + versão (1 byte) + uint32 tamanho + JSON
+                {'format', 'created', 'profile', 'profileData', 'fields'}
+    blocos:     BLOCK_HEADER (<4sBIIIq: b'RBLK', flags, amostras, tamanho bruto,
+                tamanho gravado, t0 em µs) + payload (zlib se flags & 1)
+    índice:     INDEX_ENTRY (<Qq I: offset, t0 em µs, amostras) por bloco
+    rodapé:     TRAILER (<QI4s: offset do índice, blocos, b'RIDX')
+
+Cada bloco é decodificável sozinho. Dentro dele, cada amostra é:
+    uvarint(Δt em µs desde a amostra anterior)
+    uvarint(slot << 1 | erro)       slot novo no bloco => uvarint(pid) em seguida
+    erro:     uvarint(tamanho) + mensagem UTF-8
+    snapshot: uvarint(máscara dos campos que mudaram) + para cada campo marcado:
+              inteiros => zigzag varint do delta em relação à amostra anterior do slot
+              nome/extra => uvarint(tamanho) + UTF-8 (extra em JSON)
+
+Uma amostra sem mudanças ocupa ~4 bytes antes da compressão do bloco. Se o
+arquivo não foi fechado (sem rodapé), o leitor percorre os blocos em sequência.
+
+Uso:
+    python session_recorder.py info <arquivo>
+    python session_recorder.py dump <arquivo> [--start s] [--end s]   # NDJSON
+"""
+
+import sys
+import json
+import time
+import zlib
+import struct
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+from game_snapshot import GameSnapshot, ReadError
+
+MAGIC = b'ROLSREC'
+FORMAT_VERSION = 1
+FILE_HEADER = struct.Struct('<7sBI')
+BLOCK_HEADER = struct.Struct('<4sBIIIq')
+BLOCK_MAGIC = b'RBLK'
+INDEX_ENTRY = struct.Struct('<QqI')
+TRAILER = struct.Struct('<QI4s')
+TRAILER_MAGIC = b'RIDX'
+FLAG_ZLIB = 1
+
+# Campos do snapshot na ordem da máscara de mudanças
+FIELDS = tuple(name for name in GameSnapshot._fields)
+STRING_FIELDS = frozenset(('nome', 'extra'))
+DEFAULT_VALUES = tuple(GameSnapshot())
+
+def _put_uvarint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _get_uvarint(data, pos: int) -> Tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+def _put_bytes(out: bytearray, data: bytes):
+    _put_uvarint(out, len(data))
+    out += data
+
+class SessionRecorder:
+    """Grava amostras (pid, GameSnapshot/ReadError) em blocos delta + varint comprimidos"""
+
+    def __init__(self, filename: str, profile: Optional[str] = None, profile_data: Optional[Dict] = None,
+                 block_samples: int = 4096, compress: bool = True):
+        self.filename = filename
+        self.block_samples = block_samples
+        self.compress = compress
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._t0 = None
+        self._last_us = 0
+        self._index: List[Tuple[int, int, int]] = []
+        self._file = open(filename, 'wb')
+
+        header = json.dumps({
+            'format': FORMAT_VERSION,
+            'created': time.time(),
+            'profile': profile,
+            'profileData': profile_data,
+            'fields': list(FIELDS)
+        }).encode('utf-8')
+        self._file.write(FILE_HEADER.pack(MAGIC, FORMAT_VERSION, len(header)))
+        self._file.write(header)
+        self._new_block()
+
+    def _new_block(self):
+        self._block = bytearray()
+        self._block_count = 0
+        self._block_t0 = None
+        self._block_prev_us = 0
+        # pid -> slot e último snapshot do slot (estado zerado a cada bloco)
+        self._slots: Dict[int, int] = {}
+        self._previous: List[tuple] = []
+
+    def record(self, pid: int, sample, t: Optional[float] = None):
+        """Grava uma amostra; t é monotônico (padrão: agora)"""
+        if t is None:
+            t = time.monotonic()
+        with self._lock:
+            if self._file is None:
+                return
+            if self._t0 is None:
+                self._t0 = t
+            # Timestamps monotônicos, em µs desde o início da gravação
+            t_us = max(self._last_us, int((t - self._t0) * 1_000_000))
+            self._last_us = t_us
+            if self._block_t0 is None:
+                self._block_t0 = t_us
+                self._block_prev_us = t_us
+            self._encode(pid, sample, t_us)
+            self.samples += 1
+            self._block_count += 1
+            if self._block_count >= self.block_samples:
+                self._write_block()
+
+    def _encode(self, pid: int, sample, t_us: int):
+        out = self._block
+        _put_uvarint(out, t_us - self._block_prev_us)
+        self._block_prev_us = t_us
+
+        is_error = 1 if sample.error else 0
+        slot = self._slots.get(pid)
+        if slot is None:
+            slot = self._slots[pid] = len(self._previous)
+            self._previous.append(DEFAULT_VALUES)
+            _put_uvarint(out, slot << 1 | is_error)
+            _put_uvarint(out, pid)
+        else:
+            _put_uvarint(out, slot << 1 | is_error)
+
+        if is_error:
+            _put_bytes(out, sample.error.encode('utf-8'))
+            return
+
+        previous = self._previous[slot]
+        mask = 0
+        for i, (value, old) in enumerate(zip(sample, previous)):
+            if value != old:
+                mask |= 1 << i
+        _put_uvarint(out, mask)
+        if mask:
+            for i, name in enumerate(FIELDS):
+                if not mask >> i & 1:
+                    continue
+                value = sample[i]
+                if name == 'nome':
+                    _put_bytes(out, value.encode('utf-8'))
+                elif name == 'extra':
+                    _put_bytes(out, json.dumps(value).encode('utf-8'))
+                else:
+                    _put_uvarint(out, _zigzag(value - previous[i]))
+            self._previous[slot] = tuple(sample)
+
+    def _write_block(self):
+        if not self._block_count:
+            return
+        raw = bytes(self._block)
+        payload = zlib.compress(raw, 6) if self.compress else raw
+        flags = FLAG_ZLIB if self.compress else 0
+        offset = self._file.tell()
+        self._file.write(BLOCK_HEADER.pack(BLOCK_MAGIC, flags, self._block_count, len(raw), len(payload), self._block_t0))
+        self._file.write(payload)
+        self._file.flush()
+        self._index.append((offset, self._block_t0, self._block_count))
+        self._new_block()
+
+    def flush(self):
+        """Fecha o bloco atual (mesmo incompleto) e grava no disco"""
+        with self._lock:
+            if self._file is not None:
+                self._write_block()
+
+    def close(self):
+        """Grava o bloco pendente, o índice e o rodapé"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._write_block()
+            index_offset = self._file.tell()
+            for entry in self._index:
+                self._file.write(INDEX_ENTRY.pack(*entry))
+            self._file.write(TRAILER.pack(index_offset, len(self._index), TRAILER_MAGIC))
+            self._file.close()
+            self._file = None
+
+class SessionReader:
+    """Lê um arquivo gravado pelo SessionRecorder"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self.data = f.read()
+        magic, version, header_size = FILE_HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Arquivo de gravação inválido: {filename}")
+        start = FILE_HEADER.size
+        self.header = json.loads(self.data[start:start + header_size].decode('utf-8'))
+        self.fields = tuple(self.header['fields'])
+        self.blocks_offset = start + header_size
+        self.index = self._load_index()
+
+    def _load_index(self) -> List[Tuple[int, int, int]]:
+        """Índice do rodapé ou, se o arquivo não foi fechado, varredura dos blocos"""
+        data = self.data
+        if len(data) >= self.blocks_offset + TRAILER.size:
+            index_offset, count, magic = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+            if magic == TRAILER_MAGIC:
+                return [INDEX_ENTRY.unpack_from(data, index_offset + i * INDEX_ENTRY.size) for i in range(count)]
+
+        index = []
+        pos = self.blocks_offset
+        while pos + BLOCK_HEADER.size <= len(data):
+            magic, _, count, _, stored, t0 = BLOCK_HEADER.unpack_from(data, pos)
+            if magic != BLOCK_MAGIC or pos + BLOCK_HEADER.size + stored > len(data):
+                break
+            index.append((pos, t0, count))
+            pos += BLOCK_HEADER.size + stored
+        return index
+
+    @property
+    def samples(self) -> int:
+        return sum(entry[2] for entry in self.index)
+
+    @property
+    def duration(self) -> float:
+        """Segundos entre o início da gravação e a última amostra (decodifica só o último bloco)"""
+        if not self.index:
+            return 0.0
+        last = None
+        for last in self._decode_block(self.index[-1][0]):
+            pass
+        return last[0] if last else self.index[-1][1] / 1_000_000
+
+    def _decode_block(self, offset: int) -> Iterator[tuple]:
+        """Decodifica um bloco: (t em segundos, pid, GameSnapshot ou ReadError)"""
+        magic, flags, count, raw_size, stored, t_us = BLOCK_HEADER.unpack_from(self.data, offset)
+        start = offset + BLOCK_HEADER.size
+        payload = self.data[start:start + stored]
+        if flags & FLAG_ZLIB:
+            payload = zlib.decompress(payload)
+
+        fields = self.fields
+        pids: List[int] = []
+        previous: List[list] = []
+        defaults = list(GameSnapshot._field_defaults.get(name, 0) for name in fields)
+        if fields == GameSnapshot._fields:
+            make = GameSnapshot._make
+        else:
+            # Gravação de outra versão do snapshot: casa os campos pelo nome
+            make = lambda values: GameSnapshot(**{
+                name: value for name, value in zip(fields, values) if name in GameSnapshot._fields
+            })
+        pos = 0
+        for _ in range(count):
+            delta, pos = _get_uvarint(payload, pos)
+            t_us += delta
+            tag, pos = _get_uvarint(payload, pos)
+            slot = tag >> 1
+            if slot == len(pids):
+                pid, pos = _get_uvarint(payload, pos)
+                pids.append(pid)
+                previous.append(list(defaults))
+            pid = pids[slot]
+
+            if tag & 1:
+                size, pos = _get_uvarint(payload, pos)
+                message = bytes(payload[pos:pos + size]).decode('utf-8')
+                pos += size
+                yield t_us / 1_000_000, pid, ReadError(message)
+                continue
+
+            mask, pos = _get_uvarint(payload, pos)
+            values = previous[slot]
+            i = 0
+            while mask:
+                if mask & 1:
+                    name = fields[i]
+                    if name in STRING_FIELDS:
+                        size, pos = _get_uvarint(payload, pos)
+                        text = bytes(payload[pos:pos + size]).decode('utf-8')
+                        pos += size
+                        values[i] = json.loads(text) if name == 'extra' else text
+                    else:
+                        encoded, pos = _get_uvarint(payload, pos)
+                        values[i] += _unzigzag(encoded)
+                mask >>= 1
+                i += 1
+            yield t_us / 1_000_000, pid, make(values)
+
+    def __iter__(self):
+        return self.read()
+
+    def read(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[tuple]:
+        """Amostras (t, pid, snapshot) entre start e end (segundos desde o início); usa o índice para pular blocos"""
+        start_us = None if start is None else int(start * 1_000_000)
+        end_us = None if end is None else int(end * 1_000_000)
+        for i, (offset, t0, _) in enumerate(self.index):
+            if end_us is not None and t0 > end_us:
+                break
+            # O bloco inteiro termina antes de start quando o próximo começa antes dele
+            if start_us is not None and i + 1 < len(self.index) and self.index[i + 1][1] < start_us:
+                continue
+            for sample in self._decode_block(offset):
+                if start is not None and sample[0] < start:
+                    continue
+                if end is not None and sample[0] > end:
+                    return
+                yield sample
+
+def parse_recorder_args(command, args):
+    """Interpreta os argumentos do comando: info (nenhum) ou dump (--start, --end em segundos)"""
+    options = {'start': None, 'end': None}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if command == 'dump' and arg in ('--start', '--end'):
+            if i + 1 >= len(args):
+                raise ValueError(f"Missing value for {arg}")
+            options[arg[2:]] = float(args[i + 1])
+            i += 2
+        else:
+            raise ValueError(f"Unknown option {arg}")
+    return options
+
+def main():
+    usage = "Uso: python session_recorder.py info|dump <arquivo> [--start s] [--end s]"
+    if len(sys.argv) < 3 or sys.argv[1] not in ('info', 'dump'):
+        print(usage)
+        sys.exit(1)
+
+    try:
+        options = parse_recorder_args(sys.argv[1], sys.argv[3:])
+    except ValueError as e:
+        print(f"Erro: {e}")
+        print(usage)
+        sys.exit(2)
+
+    reader = SessionReader(sys.argv[2])
+    if sys.argv[1] == 'info':
+        print(json.dumps({
+            'header': reader.header,
+            'blocks': len(reader.index),
+            'samples': reader.samples,
+            'bytes': len(reader.data)
+        }, indent=2, ensure_ascii=False))
+        return
+
+    out = sys.stdout
+    for t, pid, sample in reader.read(options['start'], options['end']):
+        line = {'t': t, 'pid': pid}
+        line.update(sample.to_dict())
+        out.write(json.dumps(line, ensure_ascii=False) + '\n')
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,38 @@
 import time
 from typing import Dict, Optional
+from game_snapshot import GameSnapshot
 from xp_table_manager import XPTableManager
+from rate_engine import RateEngine
+from event_store import EventStore
+
+# Campos de get_stats agrupados pelas entradas de que dependem
+STAT_GROUPS = {
+    'counters': ('monstersKilled', 'totalBaseXPGained', 'totalJobXPGained', 'totalDamageTaken',
+                 'avgBaseXPPerMob', 'avgJobXPPerMob'),
+    'clock': ('sessionTime', 'sessionTimeFormatted', 'baseXPPerHour', 'jobXPPerHour', 'damagePerMinute'),
+    'current': ('currentData',),
+    'baseProgress': ('baseProgress',),
+    'jobProgress': ('jobProgress',),
+    'rates': ('rates', 'baseXPPerHourEWMA', 'jobXPPerHourEWMA'),
+    'eta': ('baseLevelUpETA', 'jobLevelUpETA'),
+}
+STAT_GROUP_ORDER = tuple(STAT_GROUPS)
+STAT_FIELD_GROUPS = {field: group for group, group_fields in STAT_GROUPS.items() for field in group_fields}
 
 class StatsCalculator:
     """Calcula estatísticas do jogo (XP/hora, dano/minuto, monstros mortos, etc)"""
 
-    def __init__(self):
-        self.start_time = time.time()
-        self.last_update = time.time()
+    def __init__(self, clock=time.time, xp_table: Optional[XPTableManager] = None):
+        # Relógio injetável (o replay usa o tempo gravado em vez do relógio real)
+        self.clock = clock
+        self.start_time = clock()
+        self.last_update = self.start_time
 
         # Dados
-        self.initial_data: Optional[Dict] = None
-        self.previous_data: Optional[Dict] = None
-        self.current_data: Optional[Dict] = None
+        # Snapshots imutáveis: guardados por referência, sem cópia
+        self.initial_data: Optional[GameSnapshot] = None
+        self.previous_data: Optional[GameSnapshot] = None
+        self.current_data: Optional[GameSnapshot] = None
 
         # Estatísticas acumuladas
         self.monsters_killed = 0
@@ -20,67 +40,95 @@ class StatsCalculator:
         self.total_job_xp_gained = 0
         self.total_damage_taken = 0
 
-        # Histórico
-        self.xp_history = []
-        self.damage_history = []
-        self.max_history_size = 60
+        # Histórico completo da sessão (colunas: t, XP base, XP job, HP, nível)
+        self.events = EventStore()
+        self.analytics = None  # SessionAnalytics, criado sob demanda (NumPy)
+
+        # Taxas em janelas deslizantes (1/5/15/60 min) e ETA exponencial
+        self.rates = RateEngine()
 
         # Gerenciador de tabela de XP
-        self.xp_table = XPTableManager()
+        self.xp_table = xp_table if xp_table is not None else XPTableManager()
         
         # Estimativas temporárias (runtime) baseadas em % manual
         self.temp_base_xp_estimate = {}  # {level: xp_total}
         self.temp_job_xp_estimate = {}   # {level: xp_total}
 
-    def initialize(self, game_data: Dict):
+        # Cache de get_stats: {grupo: (chave das entradas, valores)}
+        self._events_version = 0
+        self._stats_cache = {}
+        self._last_stats = None
+
+    def initialize(self, game_data: GameSnapshot):
         """Inicializa com os primeiros dados do jogo"""
-        self.initial_data = game_data.copy()
-        self.previous_data = game_data.copy()
-        self.current_data = game_data.copy()
-        self.start_time = time.time()
-        self.last_update = time.time()
+        self.initial_data = game_data
+        self.previous_data = game_data
+        self.current_data = game_data
+        self.start_time = self.clock()
+        self.last_update = self.start_time
+        self.rates.reset(self.start_time)
+        self._invalidate_stats()
+
+    def _invalidate_stats(self):
+        """Descarta o cache de get_stats (início/reset da sessão)"""
+        self._events_version += 1
+        self._stats_cache = {}
+        self._last_stats = None
 
-    def update(self, game_data: Dict):
+    def update(self, game_data: GameSnapshot):
         """Atualiza as estatísticas com novos dados"""
-        if not self.initial_data:
+        if self.initial_data is None:
             self.initialize(game_data)
             return
 
-        self.previous_data = self.current_data.copy()
-        self.current_data = game_data.copy()
-        self.last_update = time.time()
+        self.previous_data = self.current_data
+        self.current_data = game_data
+        self.last_update = self.clock()
+
+        # Níveis confirmados por outras instâncias (memória compartilhada, se ativa)
+        self.xp_table.poll_shared()
 
         # Detecta eventos
-        self._detect_xp_gain()
-        self._detect_damage_taken()
+        base_xp_gained, job_xp_gained = self._detect_xp_gain()
+        hp_diff = self._detect_damage_taken()
+
+        if base_xp_gained or job_xp_gained or hp_diff:
+            self._events_version += 1
+            self.events.append(
+                self.last_update,
+                base_xp_gained,
+                job_xp_gained,
+                hp_diff,
+                self.current_data.nvBase
+            )
 
     def _detect_xp_gain(self):
-        """Detecta ganho de XP e conta monstros mortos"""
-        base_xp_diff = self.current_data['xpBase'] - self.previous_data['xpBase']
-        job_xp_diff = self.current_data['xpJob'] - self.previous_data['xpJob']
+        """Detecta ganho de XP e conta monstros mortos. Retorna (XP base ganha, XP job ganha)"""
+        base_xp_diff = self.current_data.xpBase - self.previous_data.xpBase
+        job_xp_diff = self.current_data.xpJob - self.previous_data.xpJob
 
         # Detecta evolução de nível (level up)
-        base_level_up = self.current_data['nvBase'] > self.previous_data['nvBase']
+        base_level_up = self.current_data.nvBase > self.previous_data.nvBase
 
         # Se evoluiu de nível, salva a XP ANTERIOR como confirmada (XP total do nível)
         if base_level_up:
             # Salva a XP do nível anterior (que estava em previous_data) como confirmada
             self.xp_table.update_base_xp(
-                self.previous_data['nvBase'],
-                self.previous_data['xpBase'],
+                self.previous_data.nvBase,
+                self.previous_data.xpBase,
                 confirmed=True
             )
             # Limpa estimativa temporária do nível anterior
-            if self.previous_data['nvBase'] in self.temp_base_xp_estimate:
-                del self.temp_base_xp_estimate[self.previous_data['nvBase']]
+            if self.previous_data.nvBase in self.temp_base_xp_estimate:
+                del self.temp_base_xp_estimate[self.previous_data.nvBase]
             # Evolução detectada! XP zerou mas é normal
             base_xp_diff = 0
         else:
             # Atualiza a tabela de XP com o valor atual (não confirmado)
             if base_xp_diff != 0:
                 self.xp_table.update_base_xp(
-                    self.current_data['nvBase'],
-                    self.current_data['xpBase'],
+                    self.current_data.nvBase,
+                    self.current_data.xpBase,
                     confirmed=False
                 )
 
@@ -89,86 +137,186 @@ class StatsCalculator:
             self.total_base_xp_gained += base_xp_diff
             self.monsters_killed += 1
 
-            self.xp_history.append({
-                'baseXP': base_xp_diff,
-                'jobXP': job_xp_diff,
-                'timestamp': time.time()
-            })
-
-            if len(self.xp_history) > self.max_history_size:
-                self.xp_history.pop(0)
-
         if job_xp_diff > 0:
             self.total_job_xp_gained += job_xp_diff
 
+        if base_xp_diff > 0 or job_xp_diff > 0:
+            self.rates.add(
+                self.last_update,
+                base_xp=max(0, base_xp_diff),
+                job_xp=max(0, job_xp_diff),
+                kills=1 if base_xp_diff > 0 else 0
+            )
+
+        return max(0, base_xp_diff), max(0, job_xp_diff)
+
     def _detect_damage_taken(self):
-        """Detecta dano recebido"""
-        hp_diff = self.previous_data['hp'] - self.current_data['hp']
+        """Detecta dano recebido. Retorna a variação de HP (negativa = dano)"""
+        hp_diff = self.previous_data.hp - self.current_data.hp
 
         if hp_diff > 0:
             self.total_damage_taken += hp_diff
+            self.rates.add(self.last_update, damage=hp_diff)
+
+        return -hp_diff
 
-            self.damage_history.append({
-                'damage': hp_diff,
-                'timestamp': time.time()
-            })
+    def get_stats(self, fields=None) -> Dict:
+        """
+        Retorna as estatísticas calculadas (todas, ou só as de `fields`).
+        Cada grupo de métricas só é recalculado quando suas entradas mudam; as
+        métricas que dependem do relógio avançam uma vez por segundo de sessão.
+        Sem `fields`, devolve o mesmo dict enquanto nada mudou (trate como somente leitura).
+        """
+        if fields is None:
+            groups = STAT_GROUP_ORDER
+        else:
+            needed = {STAT_FIELD_GROUPS[field] for field in fields}
+            groups = [group for group in STAT_GROUP_ORDER if group in needed]
 
-            if len(self.damage_history) > self.max_history_size:
-                self.damage_history.pop(0)
+        now = self.clock()
+        second = int(now - self.start_time)
+        keys = {}
+        results = [self._get_stat_group(group, now, second, keys) for group in groups]
+        changed = any(recomputed for _, recomputed in results)
 
-    def get_stats(self) -> Dict:
-        """Retorna todas as estatísticas calculadas"""
-        session_time = time.time() - self.start_time
-        hours_elapsed = session_time / 3600
-        minutes_elapsed = session_time / 60
+        if fields is None and not changed and self._last_stats is not None:
+            # Nada mudou: só as comparações de chave, sem montar outro dict
+            return self._last_stats
 
-        # XP por hora
-        base_xp_per_hour = int(self.total_base_xp_gained / hours_elapsed) if hours_elapsed > 0 else 0
-        job_xp_per_hour = int(self.total_job_xp_gained / hours_elapsed) if hours_elapsed > 0 else 0
+        stats = {}
+        for values, _ in results:
+            stats.update(values)
+        if fields is not None:
+            # O cache dos grupos avançou sem o dict completo: a próxima chamada completa remonta
+            if changed:
+                self._last_stats = None
+            return {field: stats[field] for field in fields}
+        self._last_stats = stats
+        return stats
 
-        # Dano por minuto
-        damage_per_minute = int(self.total_damage_taken / minutes_elapsed) if minutes_elapsed > 0 else 0
+    def _get_stat_group(self, group: str, now: float, second: int, keys: Optional[Dict] = None):
+        """Retorna (valores do grupo, recalculou?) usando o cache quando a chave não mudou"""
+        key = self._stat_group_key(group, second, keys)
+        if keys is not None:
+            keys[group] = key
+        cached = self._stats_cache.get(group)
+        if cached is not None and cached[0] == key:
+            return cached[1], False
+        values = getattr(self, '_compute_' + group)(now)
+        self._stats_cache[group] = (key, values)
+        return values, True
+
+    def _stat_group_key(self, group: str, second: int, keys: Optional[Dict] = None):
+        """Entradas de que cada grupo depende (keys: chaves já calculadas nesta chamada)"""
+        current = self.current_data
+        if group == 'counters':
+            return self._events_version
+        if group == 'current':
+            return current
+        if group == 'baseProgress':
+            # O índice da tabela é recriado quando um nível é confirmado
+            return (current.nvBase, current.xpBase, self.temp_base_xp_estimate.get(current.nvBase),
+                    self.xp_table.get_index())
+        if group == 'jobProgress':
+            return (current.nvJob, current.xpJob, self.temp_job_xp_estimate.get(current.nvJob))
+        if group == 'eta':
+            keys = keys or {}
+            base_key = keys.get('baseProgress') or self._stat_group_key('baseProgress', second)
+            job_key = keys.get('jobProgress') or self._stat_group_key('jobProgress', second)
+            return (second, self._events_version, base_key, job_key)
+        # 'clock' e 'rates'
+        return (second, self._events_version)
 
+    def _compute_counters(self, now: float) -> Dict:
         # Média de XP por monstro
         avg_base_xp_per_mob = int(self.total_base_xp_gained / self.monsters_killed) if self.monsters_killed > 0 else 0
         avg_job_xp_per_mob = int(self.total_job_xp_gained / self.monsters_killed) if self.monsters_killed > 0 else 0
-
-        # Progresso de XP (usando a tabela + estimativas temporárias)
-        base_progress = self.xp_table.get_base_progress(
-            self.current_data['nvBase'],
-            self.current_data['xpBase'],
-            temp_estimate=self.temp_base_xp_estimate.get(self.current_data['nvBase'])
-        )
-        job_progress = self.xp_table.get_job_progress(
-            self.current_data['nvJob'],
-            self.current_data['xpJob'],
-            temp_estimate=self.temp_job_xp_estimate.get(self.current_data['nvJob'])
-        )
-
         return {
             'monstersKilled': self.monsters_killed,
             'totalBaseXPGained': self.total_base_xp_gained,
             'totalJobXPGained': self.total_job_xp_gained,
             'totalDamageTaken': self.total_damage_taken,
+            'avgBaseXPPerMob': avg_base_xp_per_mob,
+            'avgJobXPPerMob': avg_job_xp_per_mob
+        }
+
+    def _compute_clock(self, now: float) -> Dict:
+        session_time = now - self.start_time
+        hours_elapsed = session_time / 3600
+        minutes_elapsed = session_time / 60
+
+        # XP por hora
+        base_xp_per_hour = int(self.total_base_xp_gained / hours_elapsed) if hours_elapsed > 0 else 0
+        job_xp_per_hour = int(self.total_job_xp_gained / hours_elapsed) if hours_elapsed > 0 else 0
+
+        # Dano por minuto
+        damage_per_minute = int(self.total_damage_taken / minutes_elapsed) if minutes_elapsed > 0 else 0
+
+        return {
             'sessionTime': session_time,
             'sessionTimeFormatted': self._format_time(session_time),
             'baseXPPerHour': base_xp_per_hour,
             'jobXPPerHour': job_xp_per_hour,
-            'damagePerMinute': damage_per_minute,
-            'avgBaseXPPerMob': avg_base_xp_per_mob,
-            'avgJobXPPerMob': avg_job_xp_per_mob,
-            'currentData': self.current_data,
-            'baseProgress': base_progress,
-            'jobProgress': job_progress
+            'damagePerMinute': damage_per_minute
+        }
+
+    def _compute_current(self, now: float) -> Dict:
+        return {'currentData': self.current_data}
+
+    def _compute_baseProgress(self, now: float) -> Dict:
+        # Progresso de XP (usando a tabela + estimativas temporárias)
+        return {'baseProgress': self.xp_table.get_base_progress(
+            self.current_data.nvBase,
+            self.current_data.xpBase,
+            temp_estimate=self.temp_base_xp_estimate.get(self.current_data.nvBase)
+        )}
+
+    def _compute_jobProgress(self, now: float) -> Dict:
+        return {'jobProgress': self.xp_table.get_job_progress(
+            self.current_data.nvJob,
+            self.current_data.xpJob,
+            temp_estimate=self.temp_job_xp_estimate.get(self.current_data.nvJob)
+        )}
+
+    def _compute_rates(self, now: float) -> Dict:
+        return {
+            'rates': self.rates.get_rates(now),
+            'baseXPPerHourEWMA': int(self.rates.ewma_rate(now, 'baseXP')),
+            'jobXPPerHourEWMA': int(self.rates.ewma_rate(now, 'jobXP'))
+        }
+
+    def _compute_eta(self, now: float) -> Dict:
+        # ETA de level up pelo ritmo recente (EWMA), não pela média da sessão inteira
+        second = int(now - self.start_time)
+        base_progress = self._get_stat_group('baseProgress', now, second)[0]['baseProgress']
+        job_progress = self._get_stat_group('jobProgress', now, second)[0]['jobProgress']
+        return {
+            'baseLevelUpETA': self.rates.eta(now, base_progress.get('xp_remaining'), 'baseXP'),
+            'jobLevelUpETA': self.rates.eta(now, job_progress.get('xp_remaining'), 'jobXP')
         }
 
+    def get_analytics(self, **options) -> Optional[Dict]:
+        """
+        Distribuições da sessão inteira (percentis de XP/kill, intervalo entre kills,
+        histograma de dano, XP/h por nível). Incremental entre chamadas.
+        Retorna None se o NumPy não estiver instalado.
+        """
+        if self.analytics is None:
+            try:
+                from session_analytics import SessionAnalytics
+                self.analytics = SessionAnalytics(self.events)
+            except ImportError as e:
+                print(f"Análises da sessão indisponíveis: {e}")
+                return None
+        return self.analytics.summary(**options)
+
     def set_base_xp_estimate_from_percentage(self, percentage: float):
         """Define estimativa de XP total baseada na porcentagem atual do nível"""
-        if not self.current_data or percentage <= 0 or percentage >= 100:
+        if self.current_data is None or percentage <= 0 or percentage >= 100:
             return False
         
-        current_level = self.current_data['nvBase']
-        current_xp = self.current_data['xpBase']
+        current_level = self.current_data.nvBase
+        current_xp = self.current_data.xpBase
         
         # Calcula XP total estimada: xp_atual / (porcentagem / 100)
         estimated_total_xp = int(current_xp / (percentage / 100))
@@ -177,11 +325,11 @@ class StatsCalculator:
     
     def set_job_xp_estimate_from_percentage(self, percentage: float):
         """Define estimativa de XP total baseada na porcentagem atual do nível"""
-        if not self.current_data or percentage <= 0 or percentage >= 100:
+        if self.current_data is None or percentage <= 0 or percentage >= 100:
             return False
         
-        current_level = self.current_data['nvJob']
-        current_xp = self.current_data['xpJob']
+        current_level = self.current_data.nvJob
+        current_xp = self.current_data.xpJob
         
         # Calcula XP total estimada: xp_atual / (porcentagem / 100)
         estimated_total_xp = int(current_xp / (percentage / 100))
@@ -197,8 +345,8 @@ class StatsCalculator:
 
     def reset(self):
         """Reseta todas as estatísticas"""
-        self.start_time = time.time()
-        self.last_update = time.time()
+        self.start_time = self.clock()
+        self.last_update = self.start_time
         self.initial_data = None
         self.previous_data = None
         self.current_data = None
@@ -206,7 +354,10 @@ class StatsCalculator:
         self.total_base_xp_gained = 0
         self.total_job_xp_gained = 0
         self.total_damage_taken = 0
-        self.xp_history = []
-        self.damage_history = []
+        self.events.clear()
+        if self.analytics is not None:
+            self.analytics.reset()
+        self.rates.reset()
         self.temp_base_xp_estimate = {}
         self.temp_job_xp_estimate = {}
+        self._invalidate_stats()
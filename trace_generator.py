@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Gerador determinístico (com seed) de sessões sintéticas de grind.
+
+Cada cliente alterna entre fases de grind (kills em intervalos exponenciais),
+rajadas de dano, períodos parados (regenera HP/SP, sem kills) e morte; sobe de
+nível base/job quando a XP alcança a curva de XP sintética. As amostras têm o
+mesmo formato do leitor: (t, pid, GameSnapshot).
+
+Usado pelos benchmarks, pelo simulador de cliente (fake_ragexe.py) e pelos
+testes de carga. Também grava um .rolrec para o replay:
+    python trace_generator.py <arquivo.rolrec> [--seed N] [--clients N] [--hz N] [--duration s]
+"""
+
+import sys
+import random
+from typing import Iterator, List, Optional, Tuple
+from game_snapshot import GameSnapshot
+
+def base_xp_required(level: int) -> int:
+    """Curva sintética de XP base por nível"""
+    return int(2000 * level ** 2.2)
+
+def job_xp_required(level: int) -> int:
+    """Curva sintética de XP job por nível"""
+    return int(1500 * level ** 2.0)
+
+class GrindingClient:
+    """Estado de um personagem sintético; advance(dt) avança a simulação"""
+
+    # Fases e duração média (segundos)
+    PHASES = {'grind': 240.0, 'burst': 20.0, 'idle': 60.0}
+
+    def __init__(self, rng: random.Random, pid: int, name: Optional[str] = None,
+                 base_level: int = 0, job_level: int = 0):
+        self.rng = rng
+        self.pid = pid
+        self.name = name or f"Char{pid}"
+        self.base_level = base_level or rng.randint(60, 120)
+        self.job_level = job_level or rng.randint(20, 60)
+        self.xp_base = rng.randint(0, base_xp_required(self.base_level) // 2)
+        self.xp_job = rng.randint(0, job_xp_required(self.job_level) // 2)
+        self.hp_max = 3000 + self.base_level * 60
+        self.sp_max = 200 + self.base_level * 5
+        self.hp = self.hp_max
+        self.sp = self.sp_max
+        # XP média por kill do mapa atual (muda ao trocar de fase)
+        self.mob_xp = base_xp_required(self.base_level) / rng.uniform(400, 900)
+        self.phase = 'grind'
+        self.phase_left = rng.expovariate(1 / self.PHASES['grind'])
+        self.next_kill = rng.expovariate(1 / 6.0)
+        self.dead_left = 0.0
+        self.kills = 0
+        self.level_ups = 0
+
+    def _next_phase(self):
+        rng = self.rng
+        roll = rng.random()
+        self.phase = 'idle' if roll < 0.15 else 'burst' if roll < 0.35 else 'grind'
+        self.phase_left = rng.expovariate(1 / self.PHASES[self.phase])
+        if self.phase == 'grind' and rng.random() < 0.3:
+            # Troca de mapa: muda a XP média por kill
+            self.mob_xp = base_xp_required(self.base_level) / rng.uniform(400, 900)
+
+    def _kill(self):
+        rng = self.rng
+        self.kills += 1
+        self.xp_base += max(1, int(rng.gauss(self.mob_xp, self.mob_xp * 0.15)))
+        self.xp_job += max(1, int(rng.gauss(self.mob_xp * 0.7, self.mob_xp * 0.1)))
+        self.sp = max(0, self.sp - rng.randint(0, 15))
+
+        required = base_xp_required(self.base_level)
+        if self.xp_base >= required:
+            self.xp_base -= required
+            self.base_level += 1
+            self.level_ups += 1
+            self.hp_max = 3000 + self.base_level * 60
+            self.hp = self.hp_max
+        required = job_xp_required(self.job_level)
+        if self.xp_job >= required:
+            self.xp_job -= required
+            self.job_level += 1
+
+    def _hit(self, scale: float):
+        self.hp -= int(self.rng.expovariate(1 / (self.hp_max * scale)))
+        if self.hp <= 0:
+            # Morreu: fica um tempo no chão e volta com HP cheio
+            self.hp = 0
+            self.dead_left = self.rng.uniform(10, 40)
+
+    def advance(self, dt: float):
+        """Avança dt segundos de simulação"""
+        rng = self.rng
+        if self.dead_left > 0:
+            self.dead_left -= dt
+            if self.dead_left <= 0:
+                self.hp = self.hp_max
+                self.sp = self.sp_max
+                self._next_phase()
+            return
+
+        self.phase_left -= dt
+        if self.phase_left <= 0:
+            self._next_phase()
+
+        if self.phase == 'idle':
+            self.hp = min(self.hp_max, self.hp + int(self.hp_max * 0.01 * dt) + 1)
+            self.sp = min(self.sp_max, self.sp + int(self.sp_max * 0.02 * dt) + 1)
+            return
+
+        self.next_kill -= dt
+        while self.next_kill <= 0:
+            self._kill()
+            self.next_kill += rng.expovariate(1 / (4.0 if self.phase == 'burst' else 6.0))
+
+        hit_rate = 2.0 if self.phase == 'burst' else 0.3
+        if rng.random() < hit_rate * dt:
+            self._hit(0.08 if self.phase == 'burst' else 0.02)
+        elif self.hp < self.hp_max and rng.random() < 0.2 * dt:
+            self.hp = min(self.hp_max, self.hp + int(self.hp_max * 0.02))
+
+    def snapshot(self, base_address: int = 0x400000) -> GameSnapshot:
+        return GameSnapshot(
+            xpBase=self.xp_base,
+            xpJob=self.xp_job,
+            hp=self.hp,
+            sp=self.sp,
+            nvBase=self.base_level,
+            nvJob=self.job_level,
+            hpMax=self.hp_max,
+            spMax=self.sp_max,
+            nome=self.name,
+            baseAddress=base_address
+        )
+
+def make_clients(seed: int = 1, clients: int = 1, first_pid: int = 10000) -> List[GrindingClient]:
+    """Cria os clientes sintéticos (cada um com seu próprio gerador derivado da seed)"""
+    return [
+        GrindingClient(random.Random(seed * 1000003 + i), first_pid + i)
+        for i in range(clients)
+    ]
+
+def generate_trace(seed: int = 1, clients: int = 1, hz: float = 10.0, duration: float = 3600.0,
+                   samples: Optional[int] = None) -> Iterator[Tuple[float, int, GameSnapshot]]:
+    """
+    Amostras (t, pid, GameSnapshot) de `clients` clientes a `hz` amostras por segundo,
+    por `duration` segundos (ou até `samples` amostras no total).
+    """
+    population = make_clients(seed, clients)
+    dt = 1.0 / hz
+    ticks = int(duration * hz)
+    emitted = 0
+    for tick in range(1, ticks + 1):
+        t = tick * dt
+        for client in population:
+            client.advance(dt)
+            yield t, client.pid, client.snapshot()
+            emitted += 1
+            if samples is not None and emitted >= samples:
+                return
+
+def parse_trace_args(args):
+    """Interpreta os argumentos: <arquivo.rolrec>, --seed, --clients, --hz e --duration (com valor)"""
+    options = {'filename': None, 'seed': 1, 'clients': 1, 'hz': 10.0, 'duration': 3600.0}
+    converters = {'--seed': int, '--clients': int, '--hz': float, '--duration': float}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in converters:
+            if i + 1 >= len(args):
+                raise ValueError(f"Missing value for {arg}")
+            options[arg[2:]] = converters[arg](args[i + 1])
+            i += 2
+        elif arg.startswith('--') or options['filename'] is not None:
+            raise ValueError(f"Unknown option {arg}")
+        else:
+            options['filename'] = arg
+            i += 1
+    if options['filename'] is None:
+        raise ValueError('Missing output file')
+    if options['clients'] <= 0 or options['hz'] <= 0 or options['duration'] <= 0:
+        raise ValueError('Invalid client count/rate/duration')
+    return options
+
+def main():
+    try:
+        options = parse_trace_args(sys.argv[1:])
+    except ValueError as e:
+        print(f"Erro: {e}")
+        print("Uso: python trace_generator.py <arquivo.rolrec> [--seed N] [--clients N] [--hz N] [--duration s]")
+        sys.exit(2)
+
+    from session_recorder import SessionRecorder
+
+    filename = options['filename']
+    recorder = SessionRecorder(filename, profile='synthetic')
+    for t, pid, snapshot in generate_trace(options['seed'], options['clients'], options['hz'], options['duration']):
+        recorder.record(pid, snapshot, t)
+    recorder.close()
+    print(f"✓ {recorder.samples:,} amostras gravadas em {filename}")
+
+if __name__ == '__main__':
+    main()
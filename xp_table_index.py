@@ -0,0 +1,130 @@
+from array import array
+from typing import Dict, List, Optional
+
+# Maior nível guardado nos arrays densos: um nível absurdo (ex.: int32 lido por um
+# perfil de offsets errado) não pode alocar gigabytes
+MAX_DENSE_LEVEL = 1000
+
+class XPTableIndex:
+    """
+    Índice denso da tabela de XP base, indexado pelo nível.
+    - xp[nível]: XP total do nível (0 se desconhecido)
+    - bitmap de níveis confirmados
+    - XP acumulada dos níveis confirmados e contagem acumulada de níveis sem confirmação,
+      para responder "XP de (nível, xp) até o nível N" e ETA em O(1)
+    Níveis fora do intervalo denso (negativos, ex.: int8 lido de um cliente antigo,
+    ou acima de MAX_DENSE_LEVEL) ficam em um dict à parte e só respondem get_xp_required.
+    """
+
+    def __init__(self, base_table: Optional[Dict] = None, max_level: int = 0):
+        base_table = base_table or {}
+        entries = []
+        # {nível: (xp, confirmed)} dos níveis que não cabem no índice denso
+        self.outside = {}
+        for level, entry in base_table.items():
+            if isinstance(entry, dict):
+                xp, confirmed = entry['xp'], entry.get('confirmed', False)
+            else:
+                xp, confirmed = entry, False
+            try:
+                level = int(level)
+            except (TypeError, ValueError):
+                continue
+            if level < 0 or level > MAX_DENSE_LEVEL:
+                self.outside[level] = (xp, confirmed)
+            else:
+                entries.append((level, xp, confirmed))
+
+        top = max([min(max_level, MAX_DENSE_LEVEL)] + [level for level, _, _ in entries])
+        self.max_level = top
+        size = top + 2
+        self.xp = array('q', bytes(8 * size))
+        self.known = bytearray((size + 7) // 8)
+        self.confirmed = bytearray((size + 7) // 8)
+
+        for level, xp, confirmed in entries:
+            self.xp[level] = xp
+            self.known[level >> 3] |= 1 << (level & 7)
+            if confirmed:
+                self.confirmed[level >> 3] |= 1 << (level & 7)
+
+        self._build_prefix()
+
+    def _build_prefix(self):
+        """Recalcula os acumulados: cumulative[n] = soma da XP confirmada dos níveis < n"""
+        size = self.max_level + 2
+        self.cumulative = array('q', bytes(8 * size))
+        self.missing = array('i', bytes(4 * size))
+        total = 0
+        missing = 0
+        for level in range(1, size):
+            previous = level - 1
+            if self.is_confirmed(previous):
+                total += self.xp[previous]
+            elif previous >= 1:
+                missing += 1
+            self.cumulative[level] = total
+            self.missing[level] = missing
+
+    def is_confirmed(self, level: int) -> bool:
+        if level < 0 or level > self.max_level:
+            return False
+        return bool(self.confirmed[level >> 3] >> (level & 7) & 1)
+
+    def is_known(self, level: int) -> bool:
+        if level < 0 or level > self.max_level:
+            return False
+        return bool(self.known[level >> 3] >> (level & 7) & 1)
+
+    def get_xp_required(self, level: int, confirmed_only: bool = True) -> Optional[int]:
+        """XP total do nível (None se desconhecido ou, com confirmed_only, não confirmado)"""
+        if level < 0 or level > self.max_level:
+            entry = self.outside.get(level)
+            if entry is None or (confirmed_only and not entry[1]):
+                return None
+            return entry[0]
+        if confirmed_only:
+            return self.xp[level] if self.is_confirmed(level) else None
+        return self.xp[level] if self.is_known(level) else None
+
+    def set_observed(self, level: int, xp: int) -> bool:
+        """
+        Atualiza em O(1) a XP observada (não confirmada) de um nível.
+        Retorna False se o índice precisa ser reconstruído (nível fora do intervalo ou já confirmado).
+        """
+        if level < 0 or level > MAX_DENSE_LEVEL:
+            entry = self.outside.get(level)
+            if entry is not None and entry[1]:
+                return False
+            self.outside[level] = (xp, False)
+            return True
+        if level > self.max_level or self.is_confirmed(level):
+            return False
+        self.xp[level] = xp
+        self.known[level >> 3] |= 1 << (level & 7)
+        return True
+
+    def xp_to_level(self, level: int, current_xp: int, target_level: int) -> Optional[int]:
+        """
+        XP que falta de (level, current_xp) até alcançar target_level.
+        None se algum nível no intervalo não estiver confirmado.
+        """
+        if target_level <= level:
+            return 0
+        if level < 1 or target_level > self.max_level + 1:
+            return None
+        # Nenhum nível sem confirmação em [level, target_level)
+        if self.missing[target_level] != self.missing[level]:
+            return None
+        return max(0, self.cumulative[target_level] - self.cumulative[level] - current_xp)
+
+    def eta_to_level(self, level: int, current_xp: int, target_level: int, xp_per_hour: float) -> Optional[float]:
+        """Segundos estimados até target_level no ritmo xp_per_hour (None se desconhecido)"""
+        remaining = self.xp_to_level(level, current_xp, target_level)
+        if remaining is None or xp_per_hour <= 0:
+            return None
+        return remaining / xp_per_hour * 3600
+
+    def levels(self) -> List[int]:
+        """Níveis conhecidos em ordem"""
+        return [level for level in range(self.max_level + 1) if self.is_known(level)]
@@ -1,79 +1,352 @@
 import json
 import os
+import time
+import atexit
+import weakref
+import threading
 import urllib.request
+from contextlib import contextmanager
 from typing import Dict, Optional
 from filelock import FileLock
+from xp_table_index import XPTableIndex
+from stage_timers import timers
+
+# Instâncias com gravação adiada em andamento (fechadas na saída do interpretador).
+# WeakSet: a thread de gravação mantém viva a instância enquanto houver pendências,
+# e instâncias fechadas ou descartadas não ficam presas até o fim do processo
+_open_managers = weakref.WeakSet()
+
+@atexit.register
+def _close_open_managers():
+    for manager in list(_open_managers):
+        manager.close()
 
 class XPTableManager:
     """Gerencia a tabela de XP necessária por nível com suporte a múltiplos processos"""
     
     GITHUB_XP_TABLE_URL = "https://raw.githubusercontent.com/dev-edilsonmelo/ROLens/main/xp_table.json"
+    GITHUB_XP_PATCH_URL = "https://raw.githubusercontent.com/dev-edilsonmelo/ROLens/main/xp_table.patch.json"
 
-    def __init__(self, filename='xp_table.json', auto_download=True):
+    def __init__(self, filename='xp_table.json', auto_download=True, write_behind=True, flush_interval=5.0,
+                 storage='json', db_filename=None, shared_memory=False):
         self.filename = filename
         self.lock_filename = filename + '.lock'
         self.lock = FileLock(self.lock_filename, timeout=5)
+        # Espera para adquirir o lock do arquivo (segundos): {'last', 'total', 'max', 'count'}
+        self.lock_wait = {'last': 0.0, 'total': 0.0, 'max': 0.0, 'count': 0}
         # Agora armazena dict com 'xp' e 'confirmed'
         self.base_table: Dict[str, Dict] = {}
+        # Protege base_table entre a thread de amostragem e a de gravação
+        self.table_lock = threading.RLock()
+        # Índice denso (arrays por nível), reconstruído sob demanda quando a tabela muda
+        self._index: Optional[XPTableIndex] = None
+
+        # Gravação adiada (write-behind): níveis alterados ficam em memória e são
+        # gravados em lote após flush_interval segundos, no level up ou no close()
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.dirty = set()
+        self._flush_requested = threading.Event()
+        self._flush_now = threading.Event()
+        self._flush_thread = None
+        self._closed = False
+
+        # Atualização pela rede (URL configurável para testes com servidor local)
+        self.github_url = self.GITHUB_XP_TABLE_URL
+        self.patch_url = self.GITHUB_XP_PATCH_URL
+        self.http_cache_filename = filename + '.http'
+        self.last_refresh_status = None
+
+        # Armazenamento opcional em SQLite (WAL, upsert por nível) no lugar do JSON com lock
+        self.store = None
+        if storage == 'sqlite':
+            from xp_table_sqlite import SQLiteXPTableStore
+            self.store = SQLiteXPTableStore(db_filename or os.path.splitext(filename)[0] + '.db')
+            # Primeira execução com SQLite: importa o JSON existente
+            if self.store.is_empty() and os.path.exists(self.filename):
+                self.store.import_json(self.filename)
         
-        # Se não existe e auto_download está ativo, tenta baixar do GitHub
-        if auto_download and not os.path.exists(self.filename):
-            print("xp_table.json não encontrado. Baixando do GitHub...")
-            if self.download_from_github():
-                print("✓ Tabela XP baixada com sucesso!")
-            else:
-                print("⚠ Não foi possível baixar. Criando tabela vazia...")
-        
+        # Tabela compartilhada em memória entre instâncias (opcional)
+        self.shared = None
+        if shared_memory:
+            try:
+                from xp_table_shm import SharedXPTable
+                self.shared = SharedXPTable()
+            except Exception as e:
+                print(f"Erro ao abrir tabela XP compartilhada: {e}")
+
         self.load()
 
+        # Se não existe e auto_download está ativo, baixa do GitHub em segundo plano
+        # (a tabela é recarregada quando o download terminar)
+        if auto_download and not self._has_local_table():
+            print("xp_table.json não encontrado. Baixando do GitHub em segundo plano...")
+            self.refresh_async(callback=self._report_initial_download)
+
+    def _report_initial_download(self, result: Dict):
+        if result['success']:
+            print("✓ Tabela XP baixada com sucesso!")
+        else:
+            print("⚠ Não foi possível baixar. Usando tabela vazia...")
+
+    def _has_local_table(self) -> bool:
+        """Verifica se já existe tabela local (arquivo JSON ou banco SQLite com dados)"""
+        if self.store is not None:
+            return not self.store.is_empty()
+        return os.path.exists(self.filename)
+
+    @contextmanager
+    def _file_lock(self):
+        """Adquire o lock do arquivo medindo o tempo de espera"""
+        start = time.perf_counter_ns()
+        with self.lock:
+            wait_ns = time.perf_counter_ns() - start
+            timers.record('xp_table.lock', wait_ns)
+            wait = wait_ns / 1e9
+            stats = self.lock_wait
+            stats['last'] = wait
+            stats['total'] += wait
+            stats['count'] += 1
+            if wait > stats['max']:
+                stats['max'] = wait
+            yield
+
     def load(self):
         """Carrega a tabela de XP do arquivo JSON com lock"""
+        # Grava alterações pendentes antes de substituir a tabela em memória
+        if self.dirty:
+            self.flush()
+
+        if self.store is not None:
+            try:
+                self._replace_table(self.store.load())
+            except Exception as e:
+                print(f"Erro ao carregar tabela de XP: {e}")
+            self._sync_shared()
+            return
+
         if os.path.exists(self.filename):
             try:
                 # Adquire lock antes de ler
-                with self.lock:
+                with self._file_lock():
                     with open(self.filename, 'r', encoding='utf-8') as f:
                         data = json.load(f)
-                        # Converte formato antigo (int) para novo formato (dict)
-                        self.base_table = self._convert_to_new_format(data.get('base', {}))
+                # Converte formato antigo (int) para novo formato (dict)
+                table = self._convert_to_new_format(data.get('base', {}))
             except Exception as e:
                 print(f"Erro ao carregar tabela de XP: {e}")
-                self.base_table = {}
+                table = {}
         else:
-            self.base_table = {}
+            table = {}
+
+        self._replace_table(table)
+        self._sync_shared()
+
+    def _replace_table(self, table: Dict[str, Dict]):
+        """
+        Troca a tabela em memória pela carregada. Níveis alterados depois do
+        flush (ainda pendentes) são mesclados na nova tabela para não se perderem.
+        """
+        with self.table_lock:
+            for level in self.dirty:
+                local = self.base_table.get(level)
+                if local is None:
+                    continue
+                loaded = table.get(level)
+                if loaded is None:
+                    table[level] = dict(local)
+                    continue
+                if local['xp'] > loaded['xp']:
+                    loaded['xp'] = local['xp']
+                if local.get('confirmed', False):
+                    loaded['confirmed'] = True
+            self.base_table = table
+            self._index = None
+
+    def _sync_shared(self):
+        """Publica os níveis confirmados na memória compartilhada e traz os das outras instâncias"""
+        if self.shared is None:
+            return
+        with self.table_lock:
+            confirmed = {
+                level: (entry['xp'], True)
+                for level, entry in self.base_table.items()
+                if entry.get('confirmed', False)
+            }
+        self.shared.publish(confirmed)
+        self.poll_shared(force=True)
+
+    def poll_shared(self, force: bool = False) -> bool:
+        """
+        Incorpora níveis publicados por outras instâncias na memória compartilhada.
+        Barato quando nada mudou (só compara o contador de versão); pode ser chamado a cada tick.
+        """
+        if self.shared is None or not (force or self.shared.has_changed()):
+            return False
+        table = self.shared.read_table()
+        if table is None:
+            return False
+
+        changed = False
+        with self.table_lock:
+            for level, entry in table.items():
+                local = self.base_table.get(level)
+                if local is None:
+                    self.base_table[level] = entry
+                    changed = True
+                    continue
+                if entry['xp'] > local['xp']:
+                    local['xp'] = entry['xp']
+                    changed = True
+                if entry['confirmed'] and not local.get('confirmed', False):
+                    local['confirmed'] = True
+                    changed = True
+            if changed:
+                self._index = None
+        return changed
+
+    def _save_to_store(self, levels=None) -> bool:
+        """Grava no SQLite apenas os níveis informados (todos se None) e traz as linhas de outras instâncias"""
+        try:
+            with self.table_lock:
+                keys = self.base_table.keys() if levels is None else levels
+                rows = [
+                    (level, self.base_table[level]['xp'], self.base_table[level].get('confirmed', False))
+                    for level in keys if level in self.base_table
+                ]
+            self.store.upsert_many(rows)
+
+            # Merge do que outras instâncias gravaram (mesma regra do upsert)
+            stored = self.store.load()
+            with self.table_lock:
+                self._index = None
+                for level, entry in stored.items():
+                    local = self.base_table.get(level)
+                    if local is None:
+                        self.base_table[level] = entry
+                    else:
+                        if entry['xp'] > local['xp']:
+                            local['xp'] = entry['xp']
+                        if entry['confirmed']:
+                            local['confirmed'] = True
+            return True
+        except Exception as e:
+            print(f"Erro ao salvar tabela de XP: {e}")
+            return False
 
     def save(self):
         """Salva a tabela de XP no arquivo JSON com lock"""
+        if self.store is not None:
+            return self._save_to_store()
+
         try:
             # Adquire lock antes de escrever
-            with self.lock:
+            with self._file_lock():
                 # Re-lê o arquivo para pegar atualizações de outros processos
+                existing_base = {}
+                metadata = {}
                 if os.path.exists(self.filename):
                     with open(self.filename, 'r', encoding='utf-8') as f:
                         data = json.load(f)
                         existing_base = self._convert_to_new_format(data.get('base', {}))
+                        # Mantém 'version'/'hash' da tabela publicada (usados pelos patches)
+                        metadata = {key: value for key, value in data.items() if key != 'base'}
 
-                        # Merge: mantém o maior valor de XP para cada nível
-                        # IMPORTANTE: preserva flag confirmed se qualquer versão estiver confirmada
-                        for level, entry in existing_base.items():
-                            if level not in self.base_table:
-                                self.base_table[level] = entry
-                            else:
-                                # Se XP do arquivo é maior, atualiza XP
-                                if entry['xp'] > self.base_table[level]['xp']:
-                                    self.base_table[level]['xp'] = entry['xp']
-                                # Preserva confirmed se qualquer versão estiver confirmada
-                                if entry.get('confirmed', False) or self.base_table[level].get('confirmed', False):
-                                    self.base_table[level]['confirmed'] = True
+                with self.table_lock:
+                    changed = False
+                    # Merge: mantém o maior valor de XP para cada nível
+                    # IMPORTANTE: preserva flag confirmed se qualquer versão estiver confirmada
+                    for level, entry in existing_base.items():
+                        if level not in self.base_table:
+                            self.base_table[level] = entry
+                            changed = True
+                        else:
+                            current = self.base_table[level]
+                            # Se XP do arquivo é maior, atualiza XP
+                            if entry['xp'] > current['xp']:
+                                current['xp'] = entry['xp']
+                                changed = True
+                            # Preserva confirmed se qualquer versão estiver confirmada
+                            if entry.get('confirmed', False) and not current.get('confirmed', False):
+                                current['confirmed'] = True
+                                changed = True
+                    # O índice só é reconstruído se o arquivo trouxe algo novo
+                    if changed:
+                        self._index = None
+
+                    # Cópia para gravar sem segurar o lock da tabela durante o I/O
+                    data = dict(metadata, base={level: dict(entry) for level, entry in self.base_table.items()})
 
                 # Salva dados mesclados
-                data = {
-                    'base': self.base_table
-                }
                 with open(self.filename, 'w', encoding='utf-8') as f:
                     json.dump(data, f, indent=2, ensure_ascii=False)
+            return True
         except Exception as e:
             print(f"Erro ao salvar tabela de XP: {e}")
+            return False
+
+    def flush(self):
+        """Grava imediatamente os níveis pendentes (se houver)"""
+        with self.table_lock:
+            if not self.dirty:
+                return True
+            pending = self.dirty
+            self.dirty = set()
+
+        start = time.perf_counter_ns()
+        saved = self._save_to_store(pending) if self.store is not None else self.save()
+        timers.record('xp_table.flush', time.perf_counter_ns() - start)
+        if saved:
+            return True
+
+        # Falhou (ex.: timeout do lock): mantém os níveis pendentes para a próxima tentativa
+        with self.table_lock:
+            self.dirty |= pending
+        return False
+
+    def _mark_dirty(self, level_key: str, urgent: bool = False):
+        """Marca um nível como alterado e agenda a gravação"""
+        if not self.write_behind or self._closed:
+            self.save()
+            return
+
+        with self.table_lock:
+            self.dirty.add(level_key)
+        if self._flush_thread is None:
+            self._flush_thread = threading.Thread(target=self._flush_loop, name='rolens-xp-flush', daemon=True)
+            self._flush_thread.start()
+            _open_managers.add(self)
+        if urgent:
+            self._flush_now.set()
+        self._flush_requested.set()
+
+    def _flush_loop(self):
+        """Thread de gravação: agrupa alterações por flush_interval segundos"""
+        while not self._closed:
+            self._flush_requested.wait()
+            if self._closed:
+                break
+            # Debounce: espera o intervalo, a menos que um level up peça gravação imediata
+            self._flush_now.wait(self.flush_interval)
+            self._flush_requested.clear()
+            self._flush_now.clear()
+            self.flush()
+
+    def close(self):
+        """Grava pendências e encerra a thread de gravação"""
+        if self._closed:
+            return
+        self._closed = True
+        self._flush_requested.set()
+        self._flush_now.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join(timeout=10)
+            _open_managers.discard(self)
+        self.flush()
+        if self.store is not None:
+            self.store.close()
+        if self.shared is not None:
+            self.shared.close()
 
     def _convert_to_new_format(self, table: Dict) -> Dict:
         """Converte formato antigo (int) para novo formato (dict com xp e confirmed)"""
@@ -95,22 +368,47 @@ class XPTableManager:
         """
         level_key = str(level)
 
-        # Se não existe ou o novo valor é maior, atualiza
-        if level_key not in self.base_table or current_xp > self.base_table[level_key]['xp']:
-            self.base_table[level_key] = {'xp': current_xp, 'confirmed': confirmed}
-            self.save()
-            return True
-        # Se já existe mas agora está confirmado, atualiza a flag
-        elif confirmed and not self.base_table[level_key].get('confirmed', False):
-            self.base_table[level_key]['confirmed'] = True
-            self.save()
-            return True
-        return False
+        with self.table_lock:
+            # Se não existe ou o novo valor é maior, atualiza
+            if level_key not in self.base_table or current_xp > self.base_table[level_key]['xp']:
+                self.base_table[level_key] = {'xp': current_xp, 'confirmed': confirmed}
+            # Se já existe mas agora está confirmado, atualiza a flag
+            elif confirmed and not self.base_table[level_key].get('confirmed', False):
+                self.base_table[level_key]['confirmed'] = True
+            else:
+                return False
+
+            # XP observada (não confirmada) não altera os acumulados: atualiza o índice em O(1)
+            if self._index is not None and (confirmed or not self._index.set_observed(level, current_xp)):
+                self._index = None
+            # Pendente já dentro do lock: um load() concorrente mescla o nível em vez de descartá-lo
+            if self.write_behind and not self._closed:
+                self.dirty.add(level_key)
+        self._mark_dirty(level_key, urgent=confirmed)
+        # Level up confirmado: visível para as outras instâncias no próximo tick
+        if confirmed and self.shared is not None:
+            self.shared.publish({level: (self.base_table[level_key]['xp'], True)})
+        return True
+
+    def get_index(self) -> XPTableIndex:
+        """Retorna o índice denso da tabela (reconstrói se a tabela mudou)"""
+        index = self._index
+        if index is None:
+            with self.table_lock:
+                index = self._index = XPTableIndex(self.base_table)
+        return index
 
     def get_base_xp_required(self, level: int) -> Optional[int]:
         """Retorna a XP necessária para um nível base"""
-        entry = self.base_table.get(str(level))
-        return entry['xp'] if entry else None
+        return self.get_index().get_xp_required(level, confirmed_only=False)
+
+    def xp_to_level(self, current_level: int, current_xp: int, target_level: int) -> Optional[int]:
+        """XP que falta de (nível, xp atual) até target_level (None se faltar nível confirmado)"""
+        return self.get_index().xp_to_level(current_level, current_xp, target_level)
+
+    def eta_to_level(self, current_level: int, current_xp: int, target_level: int, xp_per_hour: float) -> Optional[float]:
+        """Segundos estimados até target_level no ritmo xp_per_hour (None se desconhecido)"""
+        return self.get_index().eta_to_level(current_level, current_xp, target_level, xp_per_hour)
 
     def get_base_progress(self, current_level: int, current_xp: int, temp_estimate: Optional[int] = None) -> Dict:
         """
@@ -124,9 +422,6 @@ class XPTableManager:
             'manual_estimate': bool
         }
         """
-        # Busca dados do nível ATUAL, não do próximo
-        entry = self.base_table.get(str(current_level))
-        
         # Prioridade 1: Estimativa manual (runtime)
         if temp_estimate is not None:
             xp_remaining = temp_estimate - current_xp
@@ -139,23 +434,19 @@ class XPTableManager:
                 'manual_estimate': True
             }
         
-        # Prioridade 2: Dados confirmados (ignora observados não confirmados)
-        if entry is not None:
-            confirmed = entry.get('confirmed', False)
-            
-            # Apenas usa se estiver confirmado
-            if confirmed:
-                xp_required = entry['xp']
-                xp_remaining = xp_required - current_xp
-                percentage = (current_xp / xp_required * 100) if xp_required > 0 else 0
-
-                return {
-                    'xp_required': xp_required,
-                    'xp_remaining': max(0, xp_remaining),
-                    'percentage': min(100, percentage),
-                    'confirmed': True,
-                    'manual_estimate': False
-                }
+        # Prioridade 2: Dados confirmados do nível ATUAL (ignora observados não confirmados)
+        xp_required = self.get_index().get_xp_required(current_level)
+        if xp_required is not None:
+            xp_remaining = xp_required - current_xp
+            percentage = (current_xp / xp_required * 100) if xp_required > 0 else 0
+
+            return {
+                'xp_required': xp_required,
+                'xp_remaining': max(0, xp_remaining),
+                'percentage': min(100, percentage),
+                'confirmed': True,
+                'manual_estimate': False
+            }
         
         # Nenhum dado disponível
         return {
@@ -199,52 +490,147 @@ class XPTableManager:
             'manual_estimate': False
         }
 
-    def download_from_github(self) -> bool:
-        """Baixa a tabela XP do GitHub"""
+    def _load_http_cache(self) -> Dict:
+        """
+        Lê os metadados de sincronização: ETag/Last-Modified da tabela e do patch,
+        e a versão/hash da tabela publicada com que estamos sincronizados
+        """
+        try:
+            with open(self.http_cache_filename, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_http_cache(self, values: Dict):
+        """Atualiza (merge) os metadados de sincronização"""
+        cache = self._load_http_cache()
+        cache.update(values)
+        try:
+            with open(self.http_cache_filename, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+        except OSError as e:
+            print(f"Erro ao salvar cache HTTP da tabela: {e}")
+
+    def _fetch(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None, report=None):
+        """
+        GET condicional. Retorna (conteúdo, validadores) ou (None, None) se o servidor responder 304.
+        """
+        request = urllib.request.Request(url)
+        if etag:
+            request.add_header('If-None-Match', etag)
+        if last_modified:
+            request.add_header('If-Modified-Since', last_modified)
+
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                total = int(response.headers.get('Content-Length') or 0)
+                chunks = []
+                received = 0
+                while True:
+                    chunk = response.read(16384)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    received += len(chunk)
+                    if report is not None:
+                        report('downloading', bytes=received, total=total)
+                validators = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')
+                }
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None, None
+            raise
+        return b''.join(chunks), validators
+
+    def _merge_remote_base(self, remote_base: Dict, metadata: Optional[Dict] = None):
+        """
+        Mescla níveis vindos do GitHub na tabela local (arquivo ou SQLite).
+        metadata ('version'/'hash' da versão publicada) substitui a do arquivo local.
+        """
+        # SQLite: o upsert já faz o merge (maior XP, confirmed preservado)
+        if self.store is not None:
+            self.store.upsert_table(remote_base)
+            return
+
+        with self._file_lock():
+            local_metadata = {}
+            # Se já existe arquivo local, faz merge
+            if os.path.exists(self.filename):
+                with open(self.filename, 'r', encoding='utf-8') as f:
+                    local_table = json.load(f)
+                local_metadata = {key: value for key, value in local_table.items() if key != 'base'}
+                
+                # Merge: prioriza dados confirmados e maiores valores
+                local_base = self._convert_to_new_format(local_table.get('base', {}))
+                
+                for level, github_entry in remote_base.items():
+                    if level not in local_base:
+                        local_base[level] = github_entry
+                    else:
+                        # Mantém o maior XP
+                        if github_entry['xp'] > local_base[level]['xp']:
+                            local_base[level]['xp'] = github_entry['xp']
+                        # Preserva confirmed se qualquer versão estiver confirmada
+                        if github_entry.get('confirmed', False) or local_base[level].get('confirmed', False):
+                            local_base[level]['confirmed'] = True
+            else:
+                # Não existe local, salva direto do GitHub
+                local_base = remote_base
+            
+            # Salva merged (mantendo a versão/hash da tabela publicada)
+            local_metadata.update(metadata or {})
+            merged_table = dict(local_metadata, base=local_base)
+            with open(self.filename, 'w', encoding='utf-8') as f:
+                json.dump(merged_table, f, indent=2, ensure_ascii=False)
+
+    def download_from_github(self, conditional: bool = True, progress=None) -> bool:
+        """
+        Baixa a tabela XP do GitHub.
+        Com conditional=True envia If-None-Match/If-Modified-Since; se o servidor
+        responder 304 nada é baixado nem processado.
+        progress(info) recebe {'stage': 'connecting'|'downloading'|'merging', ...}.
+        O resultado detalhado fica em self.last_refresh_status
+        ('updated', 'not_modified' ou 'error').
+        """
+        def report(stage, **info):
+            if progress is not None:
+                info['stage'] = stage
+                progress(info)
+
+        self.last_refresh_status = 'error'
         try:
-            print(f"Baixando de: {self.GITHUB_XP_TABLE_URL}")
+            print(f"Baixando de: {self.github_url}")
+            report('connecting')
+
+            cache = self._load_http_cache() if conditional and self._has_local_table() else {}
             
             # Baixa o arquivo
-            with urllib.request.urlopen(self.GITHUB_XP_TABLE_URL, timeout=10) as response:
-                data = response.read().decode('utf-8')
-                github_table = json.loads(data)
+            content, validators = self._fetch(self.github_url, cache.get('etag'), cache.get('last_modified'), report)
+            if content is None:
+                # Não mudou desde o último download: nada a processar
+                self.last_refresh_status = 'not_modified'
+                return True
+
+            report('merging')
+            github_table = json.loads(content.decode('utf-8'))
             
             # Valida estrutura básica
             if 'base' not in github_table:
                 print("Erro: Formato inválido do arquivo do GitHub")
                 return False
-            
-            # Se já existe arquivo local, faz merge
-            if os.path.exists(self.filename):
-                with self.lock:
-                    with open(self.filename, 'r', encoding='utf-8') as f:
-                        local_table = json.load(f)
-                    
-                    # Merge: prioriza dados confirmados e maiores valores
-                    github_base = self._convert_to_new_format(github_table.get('base', {}))
-                    local_base = self._convert_to_new_format(local_table.get('base', {}))
-                    
-                    for level, github_entry in github_base.items():
-                        if level not in local_base:
-                            local_base[level] = github_entry
-                        else:
-                            # Mantém o maior XP
-                            if github_entry['xp'] > local_base[level]['xp']:
-                                local_base[level]['xp'] = github_entry['xp']
-                            # Preserva confirmed se qualquer versão estiver confirmada
-                            if github_entry.get('confirmed', False) or local_base[level].get('confirmed', False):
-                                local_base[level]['confirmed'] = True
-                    
-                    # Salva merged
-                    merged_table = {'base': local_base}
-                    with open(self.filename, 'w', encoding='utf-8') as f:
-                        json.dump(merged_table, f, indent=2, ensure_ascii=False)
-            else:
-                # Não existe local, salva direto do GitHub
-                with self.lock:
-                    with open(self.filename, 'w', encoding='utf-8') as f:
-                        json.dump(github_table, f, indent=2, ensure_ascii=False)
-            
+
+            self._merge_remote_base(
+                self._convert_to_new_format(github_table['base']),
+                {key: github_table[key] for key in ('version', 'hash') if key in github_table}
+            )
+
+            # Guarda os validadores e a versão publicada para as próximas atualizações
+            validators['version'] = github_table.get('version')
+            validators['hash'] = github_table.get('hash')
+            self._save_http_cache(validators)
+            self.last_refresh_status = 'updated'
             return True
             
         except urllib.error.URLError as e:
@@ -256,10 +642,87 @@ class XPTableManager:
         except Exception as e:
             print(f"Erro ao baixar tabela do GitHub: {e}")
             return False
+
+    def update_from_github(self, progress=None) -> bool:
+        """
+        Atualiza a tabela baixando apenas o patch incremental (xp_table.patch.json).
+        Se a versão local não for coberta pelo patch (ou divergir), baixa a tabela completa.
+        """
+        import xp_table_patch
+
+        cache = self._load_http_cache()
+        version = cache.get('version')
+        if version is None or not self._has_local_table():
+            return self.download_from_github(progress=progress)
+
+        def report(stage, **info):
+            if progress is not None:
+                info['stage'] = stage
+                progress(info)
+
+        self.last_refresh_status = 'error'
+        try:
+            report('connecting')
+            content, validators = self._fetch(self.patch_url, cache.get('patch_etag'), cache.get('patch_last_modified'),
+                                              report)
+            if content is None:
+                self.last_refresh_status = 'not_modified'
+                return True
+
+            patch = json.loads(content.decode('utf-8'))
+            patch_cache = {
+                'patch_etag': validators['etag'],
+                'patch_last_modified': validators['last_modified']
+            }
+            if patch.get('version') == version and patch.get('hash') == cache.get('hash'):
+                self._save_http_cache(patch_cache)
+                self.last_refresh_status = 'not_modified'
+                return True
+
+            if not xp_table_patch.can_apply(patch, version, cache.get('hash')):
+                # Versões divergiram: volta para o download completo
+                return self.download_from_github(conditional=False, progress=progress)
+
+            report('merging')
+            self._merge_remote_base(xp_table_patch.patch_levels(patch, version),
+                                    {'version': patch['version'], 'hash': patch['hash']})
+
+            patch_cache['version'] = patch['version']
+            patch_cache['hash'] = patch['hash']
+            self._save_http_cache(patch_cache)
+            self.last_refresh_status = 'updated'
+            return True
+
+        except Exception as e:
+            print(f"Erro ao aplicar patch da tabela XP: {e}")
+            return self.download_from_github(conditional=False, progress=progress)
+
+    def refresh_async(self, callback=None, progress=None, conditional: bool = True):
+        """
+        Atualiza a tabela em segundo plano (patch incremental ou download condicional + load).
+        callback(result) recebe {'success': bool, 'status': 'updated'|'not_modified'|'error'}
+        e é chamado na thread de download: a interface deve repassar para a thread dela.
+        """
+        def run():
+            if conditional:
+                success = self.update_from_github(progress=progress)
+            else:
+                success = self.download_from_github(conditional=False, progress=progress)
+            status = self.last_refresh_status
+            # 304: a tabela local já está atualizada, não precisa recarregar
+            if success and status == 'updated':
+                self.load()
+            if callback is not None:
+                callback({'success': success, 'status': status})
+
+        thread = threading.Thread(target=run, name='rolens-xp-refresh', daemon=True)
+        thread.start()
+        return thread
     
     def get_stats(self) -> Dict:
         """Retorna estatísticas sobre a tabela"""
+        levels = self.get_index().levels()
         return {
-            'base_levels_known': len(self.base_table),
-            'base_levels': sorted([int(k) for k in self.base_table.keys()])
+            'base_levels_known': len(levels),
+            'base_levels': levels
         }
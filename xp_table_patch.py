@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Formato de patch incremental da tabela de XP.
+
+A tabela publicada (xp_table.json) é versionada: carrega 'version' e 'hash'
+(SHA-256 do conteúdo canônico). Ao lado dela é publicado um patch compacto
+(xp_table.patch.json) com os níveis alterados nas últimas versões:
+
+{
+  "format": 1,
+  "version": 12,              # versão atual da tabela
+  "hash": "…",                # hash da versão atual
+  "base_version": 2,          # menor versão a partir da qual o patch basta
+  "hashes": {"2": "…", …},    # hash de cada versão coberta (detecta divergência)
+  "levels": {"67": [1231702, 1, 12], …}   # nível: [xp, confirmed, versão em que mudou]
+}
+
+Um cliente sincronizado na versão V (com hash H) aplica apenas os níveis com
+versão > V, desde que base_version <= V e hashes[V] == H; caso contrário,
+baixa a tabela completa.
+
+Uso para publicar uma nova versão:
+    python xp_table_patch.py publish <xp_table publicado anterior> <xp_table novo> [--keep N]
+"""
+
+import sys
+import json
+import hashlib
+from typing import Dict, Optional
+
+PATCH_FORMAT = 1
+
+def canonical_table(base_table: Dict) -> Dict[str, list]:
+    """Forma canônica da tabela: {'nivel': [xp, confirmed(0/1)]} (aceita o formato antigo, só int)"""
+    canonical = {}
+    for level, entry in base_table.items():
+        if isinstance(entry, dict):
+            canonical[str(level)] = [int(entry['xp']), int(bool(entry.get('confirmed', False)))]
+        else:
+            canonical[str(level)] = [int(entry), 0]
+    return canonical
+
+def table_hash(base_table: Dict) -> str:
+    """Hash do conteúdo da tabela (independe da ordem das chaves e da formatação)"""
+    canonical = canonical_table(base_table)
+    payload = json.dumps(sorted(canonical.items(), key=lambda item: int(item[0])), separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def diff_tables(old_table: Dict, new_table: Dict) -> Dict[str, list]:
+    """Níveis adicionados ou alterados de old_table para new_table: {'nivel': [xp, confirmed]}"""
+    old = canonical_table(old_table)
+    return {
+        level: value
+        for level, value in canonical_table(new_table).items()
+        if old.get(level) != value
+    }
+
+def can_apply(patch: Dict, version: Optional[int], version_hash: Optional[str]) -> bool:
+    """Verifica se o patch pode ser aplicado sobre a versão local sincronizada"""
+    if patch.get('format') != PATCH_FORMAT or version is None:
+        return False
+    if version > patch['version'] or version < patch['base_version']:
+        return False
+    return patch['hashes'].get(str(version)) == version_hash
+
+def patch_levels(patch: Dict, since_version: int) -> Dict[str, Dict]:
+    """Níveis alterados depois de since_version, no formato do xp_table.json"""
+    return {
+        level: {'xp': xp, 'confirmed': bool(confirmed)}
+        for level, (xp, confirmed, changed_in) in patch['levels'].items()
+        if changed_in > since_version
+    }
+
+def build_patch(old_published: Dict, new_table: Dict, previous_patch: Optional[Dict] = None, keep: int = 20):
+    """
+    Gera a nova versão publicada e o patch correspondente.
+    old_published: xp_table.json publicado anteriormente (com 'version' e 'hash', se houver)
+    new_table: tabela nova (formato do xp_table.json)
+    Retorna (tabela publicada com version/hash, patch), ou (None, None) se nada mudou.
+    """
+    old_base = old_published.get('base', {})
+    new_base = new_table.get('base', {})
+    new_hash = table_hash(new_base)
+    old_version = old_published.get('version', 0)
+    old_hash = old_published.get('hash') or table_hash(old_base)
+
+    if new_hash == old_hash:
+        return None, None
+
+    version = old_version + 1
+    if previous_patch is None or previous_patch.get('version') != old_version:
+        previous_patch = {'base_version': old_version, 'hashes': {str(old_version): old_hash}, 'levels': {}}
+
+    base_version = max(previous_patch['base_version'], version - keep)
+
+    levels = {
+        level: value
+        for level, value in previous_patch['levels'].items()
+        if value[2] > base_version
+    }
+    for level, (xp, confirmed) in diff_tables(old_base, new_base).items():
+        levels[level] = [xp, confirmed, version]
+
+    hashes = {
+        key: value
+        for key, value in previous_patch['hashes'].items()
+        if int(key) >= base_version
+    }
+    hashes[str(version)] = new_hash
+
+    patch = {
+        'format': PATCH_FORMAT,
+        'version': version,
+        'hash': new_hash,
+        'base_version': base_version,
+        'hashes': hashes,
+        'levels': dict(sorted(levels.items(), key=lambda item: int(item[0])))
+    }
+    published = {'version': version, 'hash': new_hash, 'base': new_base}
+    return published, patch
+
+def parse_publish_args(args):
+    """Interpreta os argumentos do publish: <publicado> <novo>, --keep N e --patch arquivo"""
+    options = {'files': [], 'keep': 20, 'patch': 'xp_table.patch.json'}
+    converters = {'--keep': int, '--patch': str}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in converters:
+            if i + 1 >= len(args):
+                raise ValueError(f"Missing value for {arg}")
+            options[arg[2:]] = converters[arg](args[i + 1])
+            i += 2
+        elif arg.startswith('--') or len(options['files']) == 2:
+            raise ValueError(f"Unknown option {arg}")
+        else:
+            options['files'].append(arg)
+            i += 1
+    if len(options['files']) != 2:
+        raise ValueError('Expected the published and the new table files')
+    if options['keep'] <= 0:
+        raise ValueError('Invalid --keep')
+    return options
+
+def main():
+    usage = "Uso: python xp_table_patch.py publish <xp_table publicado> <xp_table novo> [--keep N] [--patch arquivo]"
+    if len(sys.argv) < 2 or sys.argv[1] != 'publish':
+        print(usage)
+        sys.exit(1)
+
+    try:
+        options = parse_publish_args(sys.argv[2:])
+    except ValueError as e:
+        print(f"Erro: {e}")
+        print(usage)
+        sys.exit(2)
+
+    old_filename, new_filename = options['files']
+    keep = options['keep']
+    patch_filename = options['patch']
+
+    with open(old_filename, 'r', encoding='utf-8') as f:
+        old_published = json.load(f)
+    with open(new_filename, 'r', encoding='utf-8') as f:
+        new_table = json.load(f)
+    try:
+        with open(patch_filename, 'r', encoding='utf-8') as f:
+            previous_patch = json.load(f)
+    except (OSError, ValueError):
+        previous_patch = None
+
+    published, patch = build_patch(old_published, new_table, previous_patch, keep)
+    if published is None:
+        print("Tabela não mudou; nada a publicar.")
+        return
+
+    with open(new_filename, 'w', encoding='utf-8') as f:
+        json.dump(published, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    with open(patch_filename, 'w', encoding='utf-8') as f:
+        json.dump(patch, f, separators=(',', ':'))
+
+    print(f"✓ Versão {patch['version']} publicada ({len(patch['levels'])} níveis no patch)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""
+Tabela de XP compartilhada entre instâncias do ROLens no mesmo computador.
+
+Um segmento de multiprocessing.shared_memory guarda a XP e as flags de cada
+nível. Leitores não usam lock: seguem o protocolo seqlock (contador ímpar =
+escrita em andamento; leitura só vale se o contador não mudou). Escritas são
+raras (níveis confirmados) e serializadas por um lock entre processos.
+
+Ciclo de vida: cada instância anexada ocupa um slot com o seu PID. No POSIX o
+segmento continua em /dev/shm até alguém chamar unlink(), então quem fecha
+libera o seu slot e, se nenhum slot restante pertence a um processo vivo (uma
+instância que travou não fica contada para sempre), remove o segmento. Abrir e
+ocupar o slot, liberar e remover acontecem sob o mesmo lock de arquivo, então
+uma instância nova não se anexa a um segmento que está sendo removido. No
+Windows o sistema libera o segmento quando o último handle fecha.
+
+Layout:
+    cabeçalho <IIQQ: magic, max_level, seq (seqlock), version (incrementa a cada escrita)
+    slots: uint32[SLOTS]         (PID de cada instância anexada; 0 = livre)
+    xp:    int64[max_level + 1]
+    flags: uint8[max_level + 1]  (bit 0 = conhecido, bit 1 = confirmado)
+"""
+
+import os
+import struct
+import tempfile
+from array import array
+from multiprocessing import shared_memory
+from typing import Dict, Optional
+from filelock import FileLock
+
+MAGIC = 0x524F4C5A  # 'ROLZ' (layout com slots de PID)
+HEADER = struct.Struct('<IIQQ')
+SEQ_OFFSET = 8
+VERSION_OFFSET = 16
+COUNTER = struct.Struct('<Q')
+SLOTS = 64
+SLOT = struct.Struct('<I')
+
+def _pid_alive(pid: int) -> bool:
+    """Verifica se o processo existe (fora do POSIX considera vivo: o sistema libera o segmento)"""
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Existe, mas é de outro usuário
+        return True
+    except OSError:
+        return False
+    return True
+
+FLAG_KNOWN = 1
+FLAG_CONFIRMED = 2
+
+def _open_segment(name: str, size: int):
+    """Cria ou abre o segmento sem registrá-lo para remoção automática ao sair do processo"""
+    try:
+        segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+    except FileExistsError:
+        segment = shared_memory.SharedMemory(name=name)
+
+    # No POSIX o resource_tracker apagaria o segmento quando este processo
+    # terminasse, mesmo com outras instâncias usando
+    if os.name == 'posix':
+        try:
+            from multiprocessing import resource_tracker
+            # SharedMemory.name não tem a barra inicial que o nome POSIX (e o tracker) usa
+            resource_tracker.unregister('/' + segment.name, 'shared_memory')
+        except Exception:
+            pass
+    return segment
+
+class SharedXPTable:
+    """Tabela de XP base em memória compartilhada (seqlock)"""
+
+    def __init__(self, name: str = 'rolens_xp_table', max_level: int = 300):
+        self.name = name
+        self.max_level = max_level
+        count = max_level + 1
+        self.slots_offset = HEADER.size
+        self.xp_offset = self.slots_offset + SLOT.size * SLOTS
+        self.flags_offset = self.xp_offset + 8 * count
+        size = self.flags_offset + count
+
+        self.lock = FileLock(os.path.join(tempfile.gettempdir(), name + '.lock'), timeout=5)
+        self.last_version = None
+        self.buf = None
+
+        # Sob o lock: a última instância não remove o segmento entre a abertura e o slot ocupado
+        with self.lock:
+            self.segment = _open_segment(name, size)
+            self.buf = self.segment.buf
+            magic, segment_max_level, _, _ = HEADER.unpack_from(self.buf, 0)
+            if magic == 0:
+                HEADER.pack_into(self.buf, 0, MAGIC, max_level, 0, 0)
+                magic, segment_max_level = MAGIC, max_level
+            if magic != MAGIC or segment_max_level != max_level:
+                self.buf = None
+                self.segment.close()
+                raise ValueError(f"Segmento {name} incompatível (magic={magic:#x}, max_level={segment_max_level})")
+
+            self._prune_slots()
+            self.slot = self._free_slot()
+            if self.slot is None:
+                self.buf = None
+                self.segment.close()
+                raise ValueError(f"Segmento {name} sem slots livres ({SLOTS} instâncias)")
+            SLOT.pack_into(self.buf, self._slot_position(self.slot), os.getpid())
+
+    def _slot_position(self, slot: int) -> int:
+        return self.slots_offset + SLOT.size * slot
+
+    def _free_slot(self) -> Optional[int]:
+        for slot in range(SLOTS):
+            if SLOT.unpack_from(self.buf, self._slot_position(slot))[0] == 0:
+                return slot
+        return None
+
+    def _prune_slots(self) -> int:
+        """Libera os slots de processos que terminaram sem fechar; retorna quantos continuam ocupados"""
+        attached = 0
+        for slot in range(SLOTS):
+            position = self._slot_position(slot)
+            pid = SLOT.unpack_from(self.buf, position)[0]
+            if not pid:
+                continue
+            if _pid_alive(pid):
+                attached += 1
+            else:
+                SLOT.pack_into(self.buf, position, 0)
+        return attached
+
+    @property
+    def attached(self) -> int:
+        """Instâncias anexadas (de processos vivos)"""
+        with self.lock:
+            return self._prune_slots()
+
+    @property
+    def version(self) -> int:
+        """Versão atual (muda a cada escrita de qualquer instância)"""
+        return COUNTER.unpack_from(self.buf, VERSION_OFFSET)[0]
+
+    def has_changed(self) -> bool:
+        """Verificação barata (uma leitura de 8 bytes) se houve escrita desde o último read_table()"""
+        return self.version != self.last_version
+
+    def publish(self, entries: Dict[int, tuple]) -> bool:
+        """
+        Publica níveis {nível: (xp, confirmed)} com merge "maior XP, confirmed = OR".
+        Retorna True se algo mudou.
+        """
+        buf = self.buf
+        with self.lock:
+            changes = []
+            for level, (xp, confirmed) in entries.items():
+                level = int(level)
+                if level < 0 or level > self.max_level:
+                    continue
+                xp_pos = self.xp_offset + 8 * level
+                current_xp = COUNTER.unpack_from(buf, xp_pos)[0]
+                current_flags = buf[self.flags_offset + level]
+                new_flags = current_flags | FLAG_KNOWN | (FLAG_CONFIRMED if confirmed else 0)
+                new_xp = max(current_xp, int(xp))
+                if new_xp != current_xp or new_flags != current_flags:
+                    changes.append((xp_pos, level, new_xp, new_flags))
+            if not changes:
+                return False
+
+            seq = COUNTER.unpack_from(buf, SEQ_OFFSET)[0]
+            # Ímpar: escrita em andamento
+            COUNTER.pack_into(buf, SEQ_OFFSET, seq + 1)
+            for xp_pos, level, new_xp, new_flags in changes:
+                COUNTER.pack_into(buf, xp_pos, new_xp)
+                buf[self.flags_offset + level] = new_flags
+            COUNTER.pack_into(buf, VERSION_OFFSET, COUNTER.unpack_from(buf, VERSION_OFFSET)[0] + 1)
+            COUNTER.pack_into(buf, SEQ_OFFSET, seq + 2)
+        return True
+
+    def read_table(self, max_retries: int = 100) -> Optional[Dict[str, Dict]]:
+        """
+        Lê a tabela inteira sem lock (seqlock). Retorna {'nivel': {'xp', 'confirmed'}}
+        ou None se não conseguir uma leitura consistente.
+        """
+        buf = self.buf
+        for _ in range(max_retries):
+            seq_before = COUNTER.unpack_from(buf, SEQ_OFFSET)[0]
+            if seq_before & 1:
+                continue
+            version = COUNTER.unpack_from(buf, VERSION_OFFSET)[0]
+            xp_bytes = bytes(buf[self.xp_offset:self.flags_offset])
+            flags = bytes(buf[self.flags_offset:self.flags_offset + self.max_level + 1])
+            if COUNTER.unpack_from(buf, SEQ_OFFSET)[0] != seq_before:
+                continue
+
+            xp_values = array('q')
+            xp_values.frombytes(xp_bytes)
+            self.last_version = version
+            return {
+                str(level): {'xp': xp_values[level], 'confirmed': bool(flag & FLAG_CONFIRMED)}
+                for level, flag in enumerate(flags)
+                if flag & FLAG_KNOWN
+            }
+        return None
+
+    def close(self):
+        """Desanexa o segmento; se nenhum processo vivo continua anexado, o remove (POSIX)"""
+        if self.buf is None:
+            return
+        with self.lock:
+            SLOT.pack_into(self.buf, self._slot_position(self.slot), 0)
+            attached = self._prune_slots()
+            self.buf = None
+            self.segment.close()
+            if attached == 0 and os.name == 'posix':
+                self.unlink()
+
+    def unlink(self):
+        """Remove o segmento do sistema (feito pelo close() da última instância; também para limpeza)"""
+        if os.name == 'posix':
+            # SharedMemory.unlink() desregistra o nome do resource_tracker; como ele foi
+            # desregistrado ao abrir, registra de novo para manter o tracker consistente
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.register('/' + self.segment.name, 'shared_memory')
+            except Exception:
+                pass
+        try:
+            self.segment.unlink()
+        except FileNotFoundError:
+            pass
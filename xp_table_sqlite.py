@@ -0,0 +1,88 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, Tuple
+
+class SQLiteXPTableStore:
+    """
+    Armazenamento da tabela de XP em SQLite (modo WAL) para várias instâncias do ROLens.
+    Cada nível é uma linha; gravações fazem upsert atômico "maior XP, confirmed = OR",
+    então escritores concorrentes não bloqueiam leitores nem reescrevem níveis que não mudaram.
+    """
+
+    UPSERT_SQL = (
+        "INSERT INTO base_xp (level, xp, confirmed) VALUES (?, ?, ?) "
+        "ON CONFLICT(level) DO UPDATE SET "
+        "xp = MAX(base_xp.xp, excluded.xp), "
+        "confirmed = (base_xp.confirmed OR excluded.confirmed)"
+    )
+
+    def __init__(self, filename='xp_table.db', timeout=5.0):
+        self.filename = filename
+        self._lock = threading.Lock()
+        # isolation_level=None: autocommit, transações explícitas em upsert_many
+        self.conn = sqlite3.connect(filename, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS base_xp ("
+            "level INTEGER PRIMARY KEY, "
+            "xp INTEGER NOT NULL, "
+            "confirmed INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def upsert(self, level: int, xp: int, confirmed: bool = False):
+        """Grava um nível (mantém o maior XP e preserva confirmed)"""
+        with self._lock:
+            self.conn.execute(self.UPSERT_SQL, (int(level), int(xp), int(bool(confirmed))))
+
+    def upsert_many(self, entries: Iterable[Tuple[int, int, bool]]):
+        """Grava vários níveis em uma única transação: [(level, xp, confirmed), ...]"""
+        rows = [(int(level), int(xp), int(bool(confirmed))) for level, xp, confirmed in entries]
+        if not rows:
+            return
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(self.UPSERT_SQL, rows)
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def upsert_table(self, table: Dict[str, Dict]):
+        """Grava uma tabela no formato do xp_table.json ({'nivel': {'xp', 'confirmed'}})"""
+        self.upsert_many(
+            (level, entry['xp'], entry.get('confirmed', False))
+            for level, entry in table.items()
+        )
+
+    def load(self) -> Dict[str, Dict]:
+        """Retorna a tabela no formato do xp_table.json"""
+        with self._lock:
+            rows = self.conn.execute("SELECT level, xp, confirmed FROM base_xp").fetchall()
+        return {str(level): {'xp': xp, 'confirmed': bool(confirmed)} for level, xp, confirmed in rows}
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM base_xp LIMIT 1").fetchone() is None
+
+    def import_json(self, filename: str):
+        """Importa um arquivo no formato do xp_table.json (aceita o formato antigo, só int)"""
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        table = {}
+        for level, value in data.get('base', {}).items():
+            table[level] = value if isinstance(value, dict) else {'xp': value, 'confirmed': False}
+        self.upsert_table(table)
+
+    def export_json(self, filename: str):
+        """Exporta a tabela no formato do xp_table.json"""
+        table = self.load()
+        ordered = {level: table[level] for level in sorted(table, key=int)}
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump({'base': ordered}, f, indent=2, ensure_ascii=False)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()